@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+岁差修正值（ayanamsa）表
+预先按天计算 1800–2200 年的 Lahiri / Raman / KP 三种 ayanamsa，存为 NumPy 数组（进程内只计算一次），
+按儒略日线性插值取值；标量和数组输入都只需一次 np.interp，批量印度星盘可逐盘调用
+
+计算口径：ayanamsa(t) = 历元值 + [p(t) - p(t0)]，p 为 IAU 1976 黄经总岁差
+各系统的历元与历元值与 Swiss Ephemeris 一致
+
+用法示例：
+python ayanamsa.py --date 2000-01-01
+python ayanamsa.py --date 2024-06-01 --system kp
+"""
+
+import argparse
+import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from sun_position import J2000, datetime64_to_jd
+
+# 各系统的 (历元儒略日, 历元ayanamsa度数)
+AYANAMSA_SYSTEMS = {
+    "lahiri": (2435553.5, 23.245522556),  # 1956-03-21
+    "raman": (2415020.0, 21.014444),      # J1900
+    "kp": (2415020.0, 22.363889),         # J1900（Krishnamurti）
+}
+
+DEFAULT_SYSTEM = "lahiri"
+
+TABLE_START = np.datetime64("1800-01-01")
+TABLE_END = np.datetime64("2201-01-01")
+
+# 已计算的表：(儒略日数组, {系统: ayanamsa数组})
+_table_cache: Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]] = None
+
+
+def general_precession(jd) -> np.ndarray:
+    """黄经总岁差（度，相对J2000.0），IAU 1976"""
+    t = (np.asarray(jd, dtype=np.float64) - J2000) / 36525.0
+    return (5029.0966 * t + 1.11113 * t**2 - 0.000006 * t**3) / 3600.0
+
+
+def compute_ayanamsa(jd, system: str = DEFAULT_SYSTEM) -> np.ndarray:
+    """直接按岁差公式计算 ayanamsa（度），不查表"""
+    epoch, value = AYANAMSA_SYSTEMS[system]
+    return value + general_precession(jd) - general_precession(epoch)
+
+
+def load_table() -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """按天生成 ayanamsa 表（进程内缓存），返回 (儒略日数组, {系统: ayanamsa数组})"""
+    global _table_cache
+    if _table_cache is None:
+        days = np.arange(TABLE_START, TABLE_END, dtype="datetime64[D]")
+        jd = datetime64_to_jd(days)
+        _table_cache = (jd, {system: compute_ayanamsa(jd, system) for system in AYANAMSA_SYSTEMS})
+    return _table_cache
+
+
+def ayanamsa(jd, system: str = DEFAULT_SYSTEM) -> np.ndarray:
+    """
+    查表插值求 ayanamsa（度）
+
+    Args:
+        jd: 儒略日，标量或任意形状数组；超出 1800–2200 年的部分直接按公式计算
+        system: lahiri / raman / kp
+
+    Returns:
+        与 jd 形状相同的数组
+    """
+    if system not in AYANAMSA_SYSTEMS:
+        raise ValueError(f"未知的 ayanamsa 系统: {system}（可选: {', '.join(AYANAMSA_SYSTEMS)}）")
+
+    grid, tables = load_table()
+    jd = np.asarray(jd, dtype=np.float64)
+    values = np.interp(jd, grid, tables[system])
+
+    outside = (jd < grid[0]) | (jd > grid[-1])
+    if outside.any():
+        values = np.where(outside, compute_ayanamsa(jd, system), values)
+    return values
+
+
+def ayanamsa_for_datetime(dt: datetime.datetime, system: str = DEFAULT_SYSTEM) -> float:
+    """单个时刻（视为世界时）的 ayanamsa（度）"""
+    return float(ayanamsa(datetime64_to_jd(np.datetime64(dt, "us")), system))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ayanamsa 查询")
+    parser.add_argument("--date", required=True, help="日期 (YYYY-MM-DD)")
+    parser.add_argument("--system", choices=list(AYANAMSA_SYSTEMS), default=DEFAULT_SYSTEM,
+                        help="ayanamsa 系统 (默认lahiri)")
+
+    args = parser.parse_args()
+
+    dt = datetime.datetime.strptime(args.date, "%Y-%m-%d")
+    value = ayanamsa_for_datetime(dt, args.system)
+    degrees = int(value)
+    minutes = (value - degrees) * 60
+    print(f"{args.system} {args.date}: {value:.6f}° ({degrees}°{int(minutes):02d}'{(minutes % 1) * 60:04.1f}\")")
+
+
+if __name__ == "__main__":
+    main()
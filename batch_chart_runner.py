@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+批量排盘工具
+从JSONL/CSV文件（或标准输入）逐行读取出生信息，逐行输出JSONL排盘结果
+
+输入字段：birth_date, birth_time, timezone, longitude, latitude, gender
+可选字段：id（原样写回输出，便于对应）
+
+用法示例：
+python triple_chart_parser.py --batch-input births.jsonl --batch-output charts.jsonl
+python triple_chart_parser.py --batch-input births.jsonl --workers 32 --chunk-size 64
+python triple_chart_parser.py --batch-input births.jsonl --batch-columnar charts.npz
+"""
+
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Iterator, Iterable, List, Tuple, Optional, TextIO
+
+from serialization import JsonLinesWriter
+
+# 必需的输入字段
+BATCH_FIELDS = ["birth_date", "birth_time", "timezone", "longitude", "latitude", "gender"]
+
+
+def detect_batch_format(source: str) -> str:
+    """根据文件扩展名判断输入格式（默认JSONL）"""
+    return "csv" if source.lower().endswith(".csv") else "jsonl"
+
+
+def _open_text(path: str, mode: str) -> TextIO:
+    """打开文本文件，'-' 表示标准输入/输出"""
+    if path == "-":
+        stream = sys.stdin if "r" in mode else sys.stdout
+        # 标准流统一使用UTF-8，避免Windows控制台编码问题
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(encoding="utf-8")
+        return stream
+    return open(path, mode, encoding="utf-8", newline="" if "r" in mode else None)
+
+
+def iter_birth_records(stream: TextIO, fmt: str = "jsonl") -> Iterator[Tuple[int, Any]]:
+    """
+    逐行读取出生信息，不会一次性载入整个文件
+
+    Yields:
+        (行序号, 记录) —— 记录为字典；JSON解析失败时为 ValueError 实例
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for index, row in enumerate(reader):
+            yield index, row
+        return
+
+    index = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("每行必须是JSON对象")
+        except ValueError as e:
+            record = ValueError(f"JSON解析错误: {e}")
+        yield index, record
+        index += 1
+
+
+def normalize_birth_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """校验并规范化一条出生记录，返回 calculate_all 所需参数"""
+    missing = [field for field in BATCH_FIELDS if record.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"缺少字段: {', '.join(missing)}")
+
+    # 时区允许写成 8 / "8" / "+8"
+    timezone = str(record["timezone"]).strip()
+    if timezone[0] not in "+-":
+        timezone = "+" + timezone
+
+    gender = int(record["gender"])
+    if gender not in (0, 1):
+        raise ValueError(f"性别取值错误: {record['gender']}（1=男, 0=女）")
+
+    return {
+        "birth_date": str(record["birth_date"]).strip(),
+        "birth_time": str(record["birth_time"]).strip(),
+        "timezone": timezone,
+        "longitude": float(record["longitude"]),
+        "latitude": float(record["latitude"]),
+        "gender": gender
+    }
+
+
+def compute_batch_record(parser_instance, index: int, record: Any, systems: Optional[List[str]] = None,
+                         fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """计算单条记录（systems / fields 见 calculate_all）；出错时返回错误记录而不是抛出异常"""
+    try:
+        if isinstance(record, Exception):
+            raise record
+        kwargs = normalize_birth_record(record)
+        result = {"batch_index": index}
+        if record.get("id") not in (None, ""):
+            result["id"] = record["id"]
+        result.update(parser_instance.calculate_all(**kwargs, systems=systems, fields=fields))
+        return result
+    except Exception as e:
+        error_record = {"batch_index": index, "error": f"{e}"}
+        if isinstance(record, dict):
+            error_record["record"] = record
+        return error_record
+
+
+def is_successful(result: Dict[str, Any], systems: Iterable[str]) -> bool:
+    """至少一个系统计算成功才算成功；整行出错或各系统都返回 error（如排盘库未安装）时算失败"""
+    if "error" in result:
+        return False
+    sections = [result[name] for name in systems if name in result]
+    return not sections or any(not (isinstance(section, dict) and "error" in section) for section in sections)
+
+
+# ==================== 多进程并行 ====================
+
+# 工作进程内的解析器实例（每个进程只初始化一次）
+_worker_parser = None
+
+
+def _init_worker(worker_config: Dict[str, Any]):
+    """
+    工作进程初始化：导入排盘库、加载规则表并创建解析器，之后整个进程复用
+
+    Args:
+        worker_config: 工作进程配置（与主进程命令行参数一致），支持的键：
+            ziwei_cache_size / ziwei_cache_dir —— 紫微星盘缓存
+            ayanamsa_system —— 印度星盘 ayanamsa 系统（默认 DEFAULT_AYANAMSA）
+            timings —— 每条结果附加 _timings
+    """
+    global _worker_parser
+    from triple_chart_parser import TripleChartParser, configure_worker, DEFAULT_AYANAMSA
+    from bazi_enhanced_analyzer import BaziEnhancedAnalyzer
+    configure_worker(worker_config)
+    BaziEnhancedAnalyzer.shared()
+    _worker_parser = TripleChartParser(worker_config.get("ayanamsa_system", DEFAULT_AYANAMSA),
+                                       worker_config.get("timings", False))
+
+
+def compute_chunk(chunk: List[Tuple[int, Any]], systems: Optional[List[str]] = None,
+                  fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """在工作进程中计算一批记录"""
+    return [compute_batch_record(_worker_parser, index, record, systems, fields) for index, record in chunk]
+
+
+def worker_ready() -> int:
+    """预热用的空任务：确保工作进程已启动并完成初始化，返回进程号"""
+    return os.getpid()
+
+
+def create_worker_pool(workers: int, worker_config: Optional[Dict[str, Any]] = None,
+                       mp_context=None) -> ProcessPoolExecutor:
+    """创建工作进程池（每个进程启动时执行 _init_worker；mp_context 为 multiprocessing 上下文，默认平台默认方式）"""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker,
+                               initargs=(worker_config or {},))
+
+
+def _iter_chunks(records: Iterable[Tuple[int, Any]], chunk_size: int) -> Iterator[List[Tuple[int, Any]]]:
+    """按 chunk_size 切分记录流"""
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_parallel_results(records: Iterable[Tuple[int, Any]], workers: int, chunk_size: int = 32,
+                          ordered: bool = True, worker_config: Optional[Dict[str, Any]] = None,
+                          systems: Optional[List[str]] = None,
+                          fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    使用进程池并行计算记录流
+
+    同时在途的分块数限制为 workers * 2，读取速度不会超前于计算速度，内存占用保持平稳。
+
+    Args:
+        records: (行序号, 记录) 迭代器
+        workers: 工作进程数
+        chunk_size: 每次提交给工作进程的记录数
+        ordered: True 按输入顺序输出；False 按完成顺序输出（吞吐更高）
+        worker_config: 传给工作进程初始化函数的配置
+        systems / fields: 计算的系统与输出字段（见 calculate_all）
+    """
+    max_pending = workers * 2
+
+    with create_worker_pool(workers, worker_config) as executor:
+        if ordered:
+            pending = deque()
+            for chunk in _iter_chunks(records, chunk_size):
+                pending.append(executor.submit(compute_chunk, chunk, systems, fields))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        else:
+            pending = set()
+            for chunk in _iter_chunks(records, chunk_size):
+                pending.add(executor.submit(compute_chunk, chunk, systems, fields))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            for future in pending:
+                yield from future.result()
+
+
+def run_batch(parser_instance, source: str, output: Optional[str] = "-", fmt: Optional[str] = None,
+              workers: int = 1, chunk_size: int = 32, ordered: bool = True,
+              worker_config: Optional[Dict[str, Any]] = None, systems: Optional[List[str]] = None,
+              fields: Optional[List[str]] = None, columnar: Optional[str] = None) -> Dict[str, int]:
+    """
+    批量排盘主流程：复用同一个解析器实例，逐条读取、逐条写出，内存占用与输入规模无关
+
+    Args:
+        parser_instance: TripleChartParser 实例（workers > 1 时由各工作进程自行创建）
+        source: 输入文件路径，'-' 表示标准输入
+        output: 输出文件路径，'-' 表示标准输出，None 表示不输出JSONL（只写列式文件）
+        fmt: 输入格式 jsonl / csv，默认根据扩展名判断
+        workers: 工作进程数，1 表示在当前进程串行计算
+        chunk_size: 并行模式下每个任务包含的记录数
+        ordered: 并行模式下是否按输入顺序输出
+        worker_config: 并行模式下工作进程的配置（见 _init_worker）
+        systems: 只计算其中的系统，默认全部
+        fields: 只输出这些字段路径，默认全部
+        columnar: 同时写出列式文件（.npz / .parquet / .npy 目录，见 chart_columns）
+
+    Returns:
+        统计信息 {"total": 总数, "ok": 成功数, "errors": 失败数}（见 is_successful）
+    """
+    from triple_chart_parser import CHART_SYSTEMS
+    requested = systems or CHART_SYSTEMS
+    fmt = fmt or detect_batch_format(source)
+    stats = {"total": 0, "ok": 0, "errors": 0}
+
+    column_writer = None
+    if columnar:
+        from chart_columns import ColumnarWriter
+        column_writer = ColumnarWriter(columnar)
+
+    in_stream = _open_text(source, "r")
+    # 输出文件以二进制写入，编码后的字节直接落盘
+    out_stream = None
+    if output is not None:
+        out_stream = _open_text(output, "w") if output == "-" else open(output, "wb")
+    writer = JsonLinesWriter(out_stream) if out_stream is not None else None
+    try:
+        records = iter_birth_records(in_stream, fmt)
+        if workers > 1:
+            results = iter_parallel_results(records, workers, chunk_size, ordered, worker_config, systems, fields)
+        else:
+            results = (compute_batch_record(parser_instance, index, record, systems, fields)
+                       for index, record in records)
+
+        for result in results:
+            if writer is not None:
+                writer.write(result)
+            if column_writer is not None:
+                column_writer.write(result)
+
+            stats["total"] += 1
+            stats["ok" if is_successful(result, requested) else "errors"] += 1
+        if column_writer is not None:
+            column_writer.close()
+    finally:
+        if out_stream is not None:
+            out_stream.flush()
+            if output != "-":
+                out_stream.close()
+        if source != "-":
+            in_stream.close()
+
+    return stats
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+批量绘图工具（无界面）
+把一个目录下的排盘结果JSON文件，或批量排盘输出的JSONL文件，分发到进程池中用 Agg 后端绘图，
+每个工作进程只导入一次 matplotlib，结束时报告吞吐（张/秒）
+
+输出文件名与 chart_visualizer.py 一致：{名称}_八字排盘图.png 等；
+JSONL 中每行的名称取 id 字段，没有时取 batch_index（再没有时取行号）；
+结果中缺少某个系统或该系统计算出错时，跳过对应的图；
+--template 时每个工作进程只绘制一次各图表的静态框架，之后每张图只绘制文字（见 ChartTemplateRenderer）；
+--format svg 时由 chart_svg 直接生成，不加载 matplotlib
+
+用法示例：
+python batch_renderer.py charts.jsonl --output-dir images --workers 8
+python batch_renderer.py results/ --output-dir images --dpi 100 --format jpg --chart-type bazi
+python batch_renderer.py charts.jsonl --output-dir images --template --dpi 100
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from chart_visualizer import CHART_FILE_SUFFIXES, IMAGE_FORMATS, ChartTemplateRenderer, ChartVisualizer, use_backend
+
+# 模板绘图支持的格式
+TEMPLATE_FORMATS = ["png", "jpg"]
+
+# 工作进程内的绘图配置与模板渲染器（每个进程初始化一次）
+_render_config: Dict[str, Any] = {}
+_template_renderer: Optional[ChartTemplateRenderer] = None
+
+
+def iter_chart_sources(source: str) -> Iterator[Tuple[str, str]]:
+    """
+    列出待绘制的排盘结果，不读取内容
+
+    Yields:
+        (名称, JSON文件路径或JSONL中的一行)
+    """
+    path = Path(source)
+    if path.is_dir():
+        for json_file in sorted(path.glob("*.json")):
+            yield json_file.stem, str(json_file)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            line = line.strip()
+            if line:
+                yield f"{line_no:06d}", line
+
+
+def _load_chart(name: str, source: str) -> Tuple[str, Dict[str, Any]]:
+    """读取一条排盘结果，返回 (名称, 结果)"""
+    if source.startswith("{"):
+        data = json.loads(source)
+        for key in ("id", "batch_index"):
+            if data.get(key) not in (None, ""):
+                name = str(data[key])
+                break
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    return name.replace(os.sep, "_"), data
+
+
+def _init_render_worker(config: Dict[str, Any]):
+    """工作进程初始化：使用 Agg 后端并预先导入 matplotlib（svg 不需要 matplotlib）"""
+    global _render_config, _template_renderer
+    _render_config = config
+    use_backend("Agg")
+    if config["fmt"] != "svg":
+        from chart_visualizer import _pyplot
+        _pyplot()
+    _template_renderer = ChartTemplateRenderer(config["dpi"]) if config.get("template") else None
+
+
+def render_chunk(chunk: List[Tuple[str, str]]) -> Dict[str, int]:
+    """在工作进程中绘制一批排盘结果，返回 {"charts": 已生成, "skipped": 跳过, "errors": 出错}"""
+    config = _render_config
+    counts = {"charts": 0, "skipped": 0, "errors": 0}
+    for name, source in chunk:
+        try:
+            name, data = _load_chart(name, source)
+        except Exception as e:
+            print(f"❌ 读取排盘结果失败 {name}: {e}", file=sys.stderr)
+            counts["errors"] += 1
+            continue
+
+        visualizer = ChartVisualizer(name, data=data, verbose=False)
+        for chart_type in config["chart_types"]:
+            result = data.get(chart_type)
+            if not isinstance(result, dict) or "error" in result:
+                counts["skipped"] += 1
+                continue
+            save_path = os.path.join(config["output_dir"],
+                                     f"{name}_{CHART_FILE_SUFFIXES[chart_type]}.{config['fmt']}")
+            try:
+                if _template_renderer is not None:
+                    _template_renderer.render(chart_type, data, save_path, config["fmt"])
+                else:
+                    getattr(visualizer, f"generate_{chart_type}_chart")(save_path, config["dpi"])
+                counts["charts"] += 1
+            except Exception as e:
+                print(f"❌ 绘图失败 {save_path}: {e}", file=sys.stderr)
+                counts["errors"] += 1
+    return counts
+
+
+def _iter_chunks(items: Iterator[Tuple[str, str]], chunk_size: int) -> Iterator[List[Tuple[str, str]]]:
+    """按 chunk_size 切分"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_batch(source: str, output_dir: str, chart_types: Optional[List[str]] = None,
+                 dpi: int = 300, fmt: str = "png", workers: int = 1, chunk_size: int = 8,
+                 template: bool = False) -> Dict[str, Any]:
+    """
+    批量绘图主流程
+
+    Args:
+        source: 排盘结果JSON文件所在目录，或批量排盘输出的JSONL文件
+        output_dir: 图片输出目录（不存在时自动创建）
+        chart_types: 绘制的图表类型（bazi / ziwei / vedic），默认全部
+        dpi: 分辨率
+        fmt: 图片格式（png / jpg / pdf / svg）
+        workers: 工作进程数，1 表示在当前进程中绘制
+        chunk_size: 每次提交给工作进程的排盘结果数
+        template: 使用模板复用绘图（只支持 png / jpg）
+
+    Returns:
+        统计信息 {"records", "charts", "skipped", "errors", "seconds", "charts_per_second"}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    config = {
+        "output_dir": output_dir,
+        "chart_types": chart_types or list(CHART_FILE_SUFFIXES),
+        "dpi": dpi,
+        "fmt": fmt,
+        "template": template
+    }
+    stats = {"records": 0, "charts": 0, "skipped": 0, "errors": 0}
+
+    def add(counts: Dict[str, int], size: int):
+        stats["records"] += size
+        for key, value in counts.items():
+            stats[key] += value
+
+    begin = time.perf_counter()
+    chunks = _iter_chunks(iter_chart_sources(source), chunk_size)
+    if workers > 1:
+        # 同时在途的分块数限制为 workers * 2，避免一次性读入全部输入
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                                 initargs=(config,)) as executor:
+            pending = {}
+            for chunk in chunks:
+                pending[executor.submit(render_chunk, chunk)] = len(chunk)
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        add(future.result(), pending.pop(future))
+            for future, size in pending.items():
+                add(future.result(), size)
+    else:
+        _init_render_worker(config)
+        for chunk in chunks:
+            add(render_chunk(chunk), len(chunk))
+
+    seconds = time.perf_counter() - begin
+    stats["seconds"] = round(seconds, 3)
+    stats["charts_per_second"] = round(stats["charts"] / seconds, 2) if seconds > 0 else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量绘图工具（无界面，多进程）")
+    parser.add_argument("source", help="排盘结果JSON文件所在目录，或批量排盘输出的JSONL文件")
+    parser.add_argument("--output-dir", "-o", required=True, help="图片输出目录")
+    parser.add_argument("--chart-type", "-t", choices=list(CHART_FILE_SUFFIXES) + ["all"], default="all",
+                        help="生成的图表类型（默认：all）")
+    parser.add_argument("--dpi", type=int, default=300, help="图片分辨率（默认：300）")
+    parser.add_argument("--format", "-f", choices=IMAGE_FORMATS, default="png", help="图片格式（默认：png）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="工作进程数（默认：CPU核数）")
+    parser.add_argument("--chunk-size", type=int, default=8, help="每个任务的排盘结果数（默认：8）")
+    parser.add_argument("--template", action="store_true",
+                        help="模板复用绘图：静态框架只绘制一次，每张图只绘制文字（仅 png/jpg）")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        parser.error(f"输入不存在: {args.source}")
+    if args.workers < 1 or args.chunk_size < 1 or args.dpi < 1:
+        parser.error("--workers、--chunk-size 和 --dpi 必须为正整数")
+    if args.template and args.format not in TEMPLATE_FORMATS:
+        parser.error(f"--template 只支持 {' / '.join(TEMPLATE_FORMATS)} 格式")
+
+    chart_types = None if args.chart_type == "all" else [args.chart_type]
+    stats = render_batch(args.source, args.output_dir, chart_types, args.dpi, args.format,
+                         args.workers, args.chunk_size, args.template)
+
+    print(f"✅ 批量绘图完成: {stats['records']} 条结果, 生成 {stats['charts']} 张, "
+          f"跳过 {stats['skipped']} 张, 失败 {stats['errors']} 张, "
+          f"耗时 {stats['seconds']:.1f} 秒, {stats['charts_per_second']:.2f} 张/秒", file=sys.stderr)
+    if stats["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,37 @@
 """
 
 import json
-import os
+import threading
 from typing import Dict, List, Any, Optional
 
+from rule_registry import get_rule_registry
+
+# 天干地支顺序（编译查表时的整数下标）
+GAN_NAMES = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
+ZHI_NAMES = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+
+# 六十甲子：下标 i 对应 GAN_NAMES[i % 10] + ZHI_NAMES[i % 12]
+GANZHI_NAMES = [GAN_NAMES[i % 10] + ZHI_NAMES[i % 12] for i in range(60)]
+
 class BaziEnhancedAnalyzer:
     """增强八字分析器"""
     
-    def __init__(self):
-        """初始化分析器，加载规则表"""
-        self.rules = self._load_rules()
+    # 进程内共享的分析器（按规则表版本缓存）
+    _shared_instance = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, rules: Optional[Dict[str, Any]] = None, rules_version: Optional[str] = None):
+        """
+        初始化分析器，加载规则表
+        
+        Args:
+            rules: 规则表；默认从进程级规则表注册中心获取（只解析一次，多实例共享）
+            rules_version: 规则表版本号，随增强结果一起输出
+        """
+        if rules is None:
+            rules, rules_version = get_rule_registry().snapshot()
+        self.rules = rules
+        self.rules_version = rules_version
         
         # 十二长生对应表（长生、沐浴、冠带、临官、帝旺、衰、病、死、墓、绝、胎、养）
         self.twelve_states = [
@@ -21,48 +43,118 @@ class BaziEnhancedAnalyzer:
             "病", "死", "墓", "绝", "胎", "养"
         ]
         
-    def _load_rules(self) -> Dict[str, Any]:
-        """加载规则表"""
-        try:
-            # 获取当前文件所在目录
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            rules_file = os.path.join(current_dir, 'bazi_rule_tables.json')
-            
-            with open(rules_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"警告：无法加载规则表 {e}")
-            return {}
+        self._compile_tables()
+    
+    @classmethod
+    def shared(cls) -> "BaziEnhancedAnalyzer":
+        """
+        获取进程内共享的分析器
+        
+        分析器构造后只读，可被多线程共享；规则表文件变化后自动按新版本重建。
+        """
+        rules, version = get_rule_registry().snapshot()
+        instance = cls._shared_instance
+        if instance is None or instance.rules_version != version:
+            with cls._shared_lock:
+                instance = cls._shared_instance
+                if instance is None or instance.rules_version != version:
+                    instance = cls(rules, version)
+                    cls._shared_instance = instance
+        return instance
+    
+    def _compile_tables(self):
+        """
+        将规则表编译为整数下标的稠密表
+        
+        各表均通过调用字符串查表路径（*_by_rules）逐项生成，结果与参考实现完全一致：
+        - ten_god_table[日干][天干]：10×10 十神
+        - twelve_state_table[日干][地支]：10×12 十二长生
+        - nayin_table[甲子序]：60 纳音
+        - kongwang_table[甲子序]：60 空亡
+        - canggan_table[地支]：12 藏干元组
+        """
+        self.gan_index = {gan: i for i, gan in enumerate(GAN_NAMES)}
+        self.zhi_index = {zhi: i for i, zhi in enumerate(ZHI_NAMES)}
+        self.ganzhi_index = {ganzhi: i for i, ganzhi in enumerate(GANZHI_NAMES)}
+        
+        self.ten_god_table = [
+            [self._ten_god_by_rules(day_gan, gan) for gan in GAN_NAMES] for day_gan in GAN_NAMES
+        ]
+        self.twelve_state_table = [
+            [self._twelve_state_by_rules(day_gan, zhi) for zhi in ZHI_NAMES] for day_gan in GAN_NAMES
+        ]
+        self.nayin_table = [self._nayin_by_rules(ganzhi) for ganzhi in GANZHI_NAMES]
+        self.kongwang_table = [tuple(self._kongwang_by_rules(ganzhi)) for ganzhi in GANZHI_NAMES]
+        self.canggan_table = [tuple(self._canggan_by_rules(zhi)) for zhi in ZHI_NAMES]
+    
+    # ==================== 查表接口（编译后的整数下标） ====================
     
     def get_canggan(self, dizhi: str) -> List[str]:
         """获取地支藏干"""
-        return self.rules.get("藏干", {}).get(dizhi, [])
+        index = self.zhi_index.get(dizhi)
+        if index is None:
+            return self._canggan_by_rules(dizhi)
+        return list(self.canggan_table[index])
     
     def get_nayin(self, ganzhi: str) -> str:
         """获取干支纳音"""
-        return self.rules.get("纳音", {}).get(ganzhi, "未知")
+        index = self.ganzhi_index.get(ganzhi)
+        if index is None:
+            return self._nayin_by_rules(ganzhi)
+        return self.nayin_table[index]
     
     def get_kongwang(self, day_ganzhi: str) -> List[str]:
         """获取空亡地支（基于日柱）"""
-        return self.rules.get("空亡旬空", {}).get(day_ganzhi, [])
+        index = self.ganzhi_index.get(day_ganzhi)
+        if index is None:
+            return self._kongwang_by_rules(day_ganzhi)
+        return list(self.kongwang_table[index])
     
     def get_twelve_state(self, day_gan: str, dizhi: str) -> str:
         """获取十二长生状态"""
+        gan_index = self.gan_index.get(day_gan)
+        zhi_index = self.zhi_index.get(dizhi)
+        if gan_index is None or zhi_index is None:
+            return self._twelve_state_by_rules(day_gan, dizhi)
+        return self.twelve_state_table[gan_index][zhi_index]
+    
+    def get_ten_god(self, day_gan: str, target_gan: str) -> str:
+        """计算十神"""
+        day_index = self.gan_index.get(day_gan)
+        target_index = self.gan_index.get(target_gan)
+        if day_index is None or target_index is None:
+            return self._ten_god_by_rules(day_gan, target_gan)
+        return self.ten_god_table[day_index][target_index]
+    
+    # ==================== 参考实现（字符串规则表） ====================
+    
+    def _canggan_by_rules(self, dizhi: str) -> List[str]:
+        """获取地支藏干（字符串规则表）"""
+        return self.rules.get("藏干", {}).get(dizhi, [])
+    
+    def _nayin_by_rules(self, ganzhi: str) -> str:
+        """获取干支纳音（字符串规则表）"""
+        return self.rules.get("纳音", {}).get(ganzhi, "未知")
+    
+    def _kongwang_by_rules(self, day_ganzhi: str) -> List[str]:
+        """获取空亡地支（字符串规则表）"""
+        return self.rules.get("空亡旬空", {}).get(day_ganzhi, [])
+    
+    def _twelve_state_by_rules(self, day_gan: str, dizhi: str) -> str:
+        """获取十二长生状态（字符串规则表）"""
         if day_gan not in self.rules.get("长生十二神", {}):
             return "未知"
             
         state_list = self.rules["长生十二神"][day_gan]
-        dizhi_list = ["亥", "子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌"]
         
         try:
-            dizhi_index = dizhi_list.index(dizhi)
             state_index = state_list.index(dizhi)
             return self.twelve_states[state_index]
         except (ValueError, IndexError):
             return "未知"
     
-    def get_ten_god(self, day_gan: str, target_gan: str) -> str:
-        """计算十神"""
+    def _ten_god_by_rules(self, day_gan: str, target_gan: str) -> str:
+        """计算十神（字符串规则表）"""
         if not self.rules.get("十神规则"):
             return "未知"
             
@@ -211,6 +303,7 @@ class BaziEnhancedAnalyzer:
             # 增强的八字结果
             enhanced_result = {
                 **bazi_result,  # 保留原有信息
+                "rule_table_version": self.rules_version,
                 "enhanced_analysis": {
                     "四柱详析": pillars_analysis,
                     "十神统计": ten_gods_count,
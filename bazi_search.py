@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+八字反查
+给定四柱，求时间范围内所有对应的出生时段（当地钟表时间）
+
+口径与 TripleChartParser.calculate_bazi 一致，逐柱直接求解，不逐时辰遍历：
+- 年柱、月柱：由节气表上"节"的序号决定（月柱甲子序 = 13 + 节序 对60取模），
+  只需检查与月柱同余的节序（每60个节即5年一个），每个节对应一段世界时区间
+- 日柱：真太阳时所在公历日，儒略日数 + 49 对60取模，在区间内按60天周期取日
+- 时柱：五鼠遁，子时天干 = (日干 % 5) * 2，时支决定真太阳时的两小时时段（子时为 23–1 点）
+- 真太阳时 = 钟表时间 + (经度/15 - 时区) 小时；年柱、月柱按出生的世界时刻判断
+
+用法示例：
+python bazi_search.py 庚辰 戊寅 癸卯 丁巳 --start 1901-01-01 --end 2100-01-01
+python bazi_search.py 庚辰 戊寅 癸卯 丁巳 --start 2000-01-01 --end 2001-01-01 --longitude 116.4 --timezone 8
+"""
+
+import argparse
+import bisect
+import datetime
+from typing import List, Tuple, Union
+
+import solar_terms
+
+GAN_NAMES = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
+ZHI_NAMES = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+
+# 公历日序数（date.toordinal）换算儒略日数再对60取模得日柱甲子序
+_DAY_OFFSET = 1721425 + 49
+
+Window = Tuple[datetime.datetime, datetime.datetime]
+
+
+def _pillar_index(pillar: str, label: str) -> int:
+    """干支 → 六十甲子序；不是合法干支时抛出 ValueError"""
+    if len(pillar) != 2 or pillar[0] not in GAN_NAMES or pillar[1] not in ZHI_NAMES:
+        raise ValueError(f"{label}格式错误: {pillar}")
+    stem, branch = GAN_NAMES.index(pillar[0]), ZHI_NAMES.index(pillar[1])
+    if stem % 2 != branch % 2:
+        raise ValueError(f"{label}阴阳不配: {pillar}")
+    return (6 * stem - 5 * branch) % 60
+
+
+def _as_datetime(value: Union[datetime.datetime, datetime.date, str]) -> datetime.datetime:
+    """接受 datetime、date 或 'YYYY-MM-DD[ HH:MM]' 字符串"""
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time())
+    return datetime.datetime.fromisoformat(value)
+
+
+def _hour_windows(day: datetime.date, branch: int) -> List[Window]:
+    """真太阳时某日中属于某时支的时段（子时分为当日 0–1 点与 23–24 点两段）"""
+    midnight = datetime.datetime.combine(day, datetime.time())
+    hour = datetime.timedelta(hours=1)
+    if branch == 0:
+        return [(midnight, midnight + hour), (midnight + 23 * hour, midnight + 24 * hour)]
+    return [(midnight + (2 * branch - 1) * hour, midnight + (2 * branch + 1) * hour)]
+
+
+def find_datetimes(year_pillar: str, month_pillar: str, day_pillar: str, hour_pillar: str,
+                   start: Union[datetime.datetime, datetime.date, str],
+                   end: Union[datetime.datetime, datetime.date, str],
+                   longitude: float = 120.0, tz_offset: float = 8.0) -> List[Window]:
+    """
+    反查四柱对应的出生时段
+
+    Args:
+        year_pillar / month_pillar / day_pillar / hour_pillar: 四柱干支，如 "庚辰"
+        start / end: 搜索范围 [start, end)，当地钟表时间，须在节气表范围（1900–2100）内
+        longitude: 出生地经度（用于真太阳时）
+        tz_offset: 时区（小时）
+
+    Returns:
+        按时间排序的 [(起, 止)] 列表（当地钟表时间，左闭右开）；在每个时段内出生，
+        calculate_bazi 得到的四柱都与给定四柱相同。时辰通常为完整的两小时，
+        恰逢节气交接或搜索范围边界时只取其中符合的部分
+    """
+    year_index = _pillar_index(year_pillar, "年柱")
+    month_index = _pillar_index(month_pillar, "月柱")
+    day_index = _pillar_index(day_pillar, "日柱")
+    hour_index = _pillar_index(hour_pillar, "时柱")
+    start, end = _as_datetime(start), _as_datetime(end)
+
+    # 五鼠遁：时干由日干与时支决定，不相配的四柱不存在
+    day_stem, hour_branch = day_index % 10, hour_index % 12
+    if (day_stem % 5 * 2 + hour_branch) % 10 != hour_index % 10:
+        return []
+
+    minutes, _ = solar_terms.load_table()
+    epoch = datetime.datetime(solar_terms.START_YEAR, 1, 1)
+    tz_shift = datetime.timedelta(hours=tz_offset)
+    solar_shift = datetime.timedelta(hours=longitude / 15.0 - tz_offset)
+
+    # 节气表覆盖的钟表时间范围（最后一个节气之后无法确定月柱）
+    table_start = epoch + datetime.timedelta(minutes=minutes[0]) + tz_shift
+    table_end = epoch + datetime.timedelta(minutes=minutes[-1]) + tz_shift
+    if start < table_start or end > table_end:
+        raise ValueError(f"搜索范围超出节气表范围（{table_start:%Y-%m-%d %H:%M} – {table_end:%Y-%m-%d %H:%M}）")
+    if start >= end:
+        return []
+
+    # 起点所在的节，及其后第一个月柱相同的节（月柱每60个节即5年循环一次）
+    ut_start = start - tz_shift
+    offset = (ut_start - epoch) // datetime.timedelta(minutes=1)
+    jie = (bisect.bisect_right(minutes, offset) - 1) // 2
+    jie += (month_index - solar_terms.year_month_index(ut_start)[1]) % 60
+    last_jie = (len(minutes) - 2) // 2
+
+    windows: List[Window] = []
+    while jie <= last_jie:
+        jie_start = epoch + datetime.timedelta(minutes=minutes[2 * jie]) + tz_shift
+        jie_end = epoch + datetime.timedelta(minutes=minutes[2 * jie + 2]) + tz_shift
+        if jie_start >= end:
+            break
+        lower, upper = max(jie_start, start), min(jie_end, end)
+        if lower < upper and solar_terms.year_month_index(jie_start - tz_shift)[0] == year_index:
+            windows.extend(_day_windows(lower, upper, day_index, hour_branch, solar_shift))
+        jie += 60
+    return windows
+
+
+def _day_windows(lower: datetime.datetime, upper: datetime.datetime, day_index: int, hour_branch: int,
+                 solar_shift: datetime.timedelta) -> List[Window]:
+    """钟表时间区间 [lower, upper) 内日柱、时支相符的时段"""
+    windows = []
+    first_day = (lower + solar_shift).date()
+    last_day = (upper + solar_shift).date()
+    day = first_day + datetime.timedelta(days=(day_index - first_day.toordinal() - _DAY_OFFSET) % 60)
+    while day <= last_day:
+        for true_start, true_end in _hour_windows(day, hour_branch):
+            window_start = max(true_start - solar_shift, lower)
+            window_end = min(true_end - solar_shift, upper)
+            if window_start < window_end:
+                windows.append((window_start, window_end))
+        day += datetime.timedelta(days=60)
+    return windows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="八字反查：求四柱对应的出生时段")
+    parser.add_argument("pillars", nargs=4, metavar="PILLAR", help="年柱 月柱 日柱 时柱，如 庚辰 戊寅 癸卯 丁巳")
+    parser.add_argument("--start", default="1900-02-01", help="搜索起点（当地时间，默认1900-02-01）")
+    parser.add_argument("--end", default="2100-01-01", help="搜索终点（不含，默认2100-01-01）")
+    parser.add_argument("--longitude", type=float, default=120.0, help="经度（默认120）")
+    parser.add_argument("--timezone", type=float, default=8.0, help="时区（小时，默认+8）")
+
+    args = parser.parse_args()
+
+    try:
+        windows = find_datetimes(*args.pillars, args.start, args.end, args.longitude, args.timezone)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for window_start, window_end in windows:
+        print(f"{window_start:%Y-%m-%d %H:%M:%S} – {window_end:%Y-%m-%d %H:%M:%S}")
+    print(f"✅ 共 {len(windows)} 个时段")
+
+
+if __name__ == "__main__":
+    main()
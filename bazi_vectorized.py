@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+向量化八字计算（NumPy）
+一次计算N个出生时间的四柱、五行统计与身强身弱，不逐条调用 sxtwl
+
+口径与 TripleChartParser.calculate_bazi 一致：
+- 真太阳时 = 出生时间 + (经度/15 - 时区) 小时
+- 日柱取真太阳时所在公历日（儒略日数取模60）
+- 时柱按 calculate_hour_pillar_traditional 的五鼠遁口诀
+- 年柱以立春为界，月柱以节为界，按出生的世界时刻在节气表上查找（searchsorted）；
+  超出节气表范围（1900–2100）时改用太阳视黄经直接判断
+
+用法示例：
+python bazi_vectorized.py --start-year 1900 --end-year 2000
+"""
+
+import argparse
+import time
+from typing import Dict, Any
+
+import numpy as np
+
+from sun_position import datetime64_to_jd, jd_ut_to_jde, apparent_solar_longitude
+from solar_terms import has_table, year_month_indices_many
+
+GAN_NAMES = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
+ZHI_NAMES = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+
+# 五行顺序与 calculate_bazi 中 five_elements_count 一致
+WUXING_NAMES = ["木", "火", "土", "金", "水"]
+
+# 天干五行下标：甲乙木 丙丁火 戊己土 庚辛金 壬癸水
+GAN_WUXING = np.array([0, 0, 1, 1, 2, 2, 3, 3, 4, 4], dtype=np.int8)
+
+# 地支五行下标：子水 丑土 寅木 卯木 辰土 巳火 午火 未土 申金 酉金 戌土 亥水
+ZHI_WUXING = np.array([4, 2, 0, 0, 2, 1, 1, 2, 3, 3, 2, 4], dtype=np.int8)
+
+# 1970-01-01 的儒略日数（整数）
+_UNIX_EPOCH_JDN = 2440588
+
+_US_PER_HOUR = 3600 * 10**6
+
+
+def true_solar_times(datetimes, longitudes, tz_offsets) -> np.ndarray:
+    """
+    向量化计算真太阳时（与 calculate_true_solar_time 相同的简化公式）
+
+    Args:
+        datetimes: 出生时间（当地钟表时间），datetime64 数组或 datetime 列表
+        longitudes: 经度数组
+        tz_offsets: 时区（小时）数组
+    """
+    local = np.asarray(datetimes, dtype='datetime64[us]')
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    tz_offsets = np.asarray(tz_offsets, dtype=np.float64)
+    offset_us = np.rint((longitudes / 15.0 - tz_offsets) * _US_PER_HOUR).astype(np.int64)
+    return local + offset_us.astype('timedelta64[us]')
+
+
+def year_month_indices(ut_times, calendar_year, calendar_month):
+    """
+    计算年柱、月柱的六十甲子序：优先查节气表，表外的时间按太阳视黄经计算
+
+    Args:
+        ut_times: 世界时 datetime64 数组
+        calendar_year: 公历年
+        calendar_month: 公历月
+
+    Returns:
+        (年柱甲子序, 月柱甲子序)
+    """
+    if not has_table():
+        return year_month_from_longitude(ut_times, calendar_year, calendar_month)
+
+    year_index, month_index, valid = year_month_indices_many(ut_times)
+    if not valid.all():
+        outside = ~valid
+        year_index[outside], month_index[outside] = year_month_from_longitude(
+            ut_times[outside], calendar_year[outside], calendar_month[outside]
+        )
+    return year_index, month_index
+
+
+def year_month_from_longitude(ut_times, calendar_year, calendar_month):
+    """
+    根据太阳视黄经计算年柱、月柱的六十甲子序
+
+    Args:
+        ut_times: 世界时 datetime64 数组
+        calendar_year: 公历年（用于判断立春前后）
+        calendar_month: 公历月
+
+    Returns:
+        (年柱甲子序, 月柱甲子序)
+    """
+    longitude = apparent_solar_longitude(jd_ut_to_jde(datetime64_to_jd(ut_times)))
+
+    # 月序：0=寅月（立春，黄经315°）… 11=丑月（小寒，黄经285°）
+    month_order = (np.floor(np.mod(longitude - 315.0, 360.0) / 30.0)).astype(np.int64)
+
+    # 1、2月处于子月/丑月时尚未立春，属上一年
+    before_lichun = (calendar_month <= 2) & (month_order >= 10)
+    year = calendar_year - before_lichun
+
+    year_index = np.mod(year - 4, 60)
+
+    # 五虎遁：甲己之年丙作首 …，寅月天干 = (年干 % 5) * 2 + 2
+    month_stem = np.mod((year_index % 10) % 5 * 2 + 2 + month_order, 10)
+    month_branch = np.mod(month_order + 2, 12)
+    month_index = _ganzhi_index(month_stem, month_branch)
+
+    return year_index, month_index
+
+
+def _ganzhi_index(stem, branch):
+    """由天干、地支下标求六十甲子序（要求阴阳相配）"""
+    return np.mod(6 * stem - 5 * branch, 60)
+
+
+def calculate_bazi_many(datetimes, longitudes, tz_offsets) -> Dict[str, np.ndarray]:
+    """
+    向量化计算八字
+
+    Args:
+        datetimes: 出生时间（当地钟表时间），长度N
+        longitudes: 经度，长度N或标量
+        tz_offsets: 时区（小时），长度N或标量
+
+    Returns:
+        {
+            "stems": (N,4) int8 天干下标（年、月、日、时），
+            "branches": (N,4) int8 地支下标，
+            "five_elements_count": (N,5) uint8 五行统计（木火土金水），
+            "body_strong": (N,) bool 身强为True
+        }
+    """
+    local = np.atleast_1d(np.asarray(datetimes, dtype='datetime64[us]'))
+    longitudes = np.broadcast_to(np.asarray(longitudes, dtype=np.float64), local.shape)
+    tz_offsets = np.broadcast_to(np.asarray(tz_offsets, dtype=np.float64), local.shape)
+
+    true_dt = true_solar_times(local, longitudes, tz_offsets)
+
+    # 日柱：儒略日数 + 49 对60取模，0 = 甲子
+    days = true_dt.astype('datetime64[D]')
+    day_index = np.mod(days.astype(np.int64) + _UNIX_EPOCH_JDN + 49, 60)
+    day_stem = day_index % 10
+
+    # 时柱：时辰 = (小时 + 1) // 2 % 12，五鼠遁：子时天干 = (日干 % 5) * 2
+    hours = (true_dt - days).astype('timedelta64[h]').astype(np.int64)
+    time_index = (hours + 1) // 2 % 12
+    hour_stem = (day_stem % 5 * 2 + time_index) % 10
+
+    # 年柱、月柱：以世界时刻判断节气
+    ut_times = local - np.rint(tz_offsets * _US_PER_HOUR).astype(np.int64).astype('timedelta64[us]')
+    calendar_year = days.astype('datetime64[Y]').astype(np.int64) + 1970
+    calendar_month = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    year_index, month_index = year_month_indices(ut_times, calendar_year, calendar_month)
+
+    stems = np.stack([year_index % 10, month_index % 10, day_stem, hour_stem], axis=1).astype(np.int8)
+    branches = np.stack([year_index % 12, month_index % 12, day_index % 12, time_index], axis=1).astype(np.int8)
+
+    # 五行统计：8个字各计一次
+    elements = np.concatenate([GAN_WUXING[stems], ZHI_WUXING[branches]], axis=1)
+    five_elements_count = (elements[:, :, None] == np.arange(5)).sum(axis=1).astype(np.uint8)
+
+    # 身强身弱（简化版）：日主五行占比 > 0.3
+    day_element = GAN_WUXING[stems[:, 2]]
+    same_count = five_elements_count[np.arange(len(local)), day_element]
+    body_strong = same_count / five_elements_count.sum(axis=1) > 0.3
+
+    return {
+        "stems": stems,
+        "branches": branches,
+        "five_elements_count": five_elements_count,
+        "body_strong": body_strong
+    }
+
+
+def bazi_many_row(result: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+    """将 calculate_bazi_many 的第 i 行转换为 calculate_bazi 的基础结果格式"""
+    stems = result["stems"][i]
+    branches = result["branches"][i]
+    pillars = [GAN_NAMES[s] + ZHI_NAMES[b] for s, b in zip(stems, branches)]
+    counts = result["five_elements_count"][i]
+
+    return {
+        "year_pillar": pillars[0],
+        "month_pillar": pillars[1],
+        "day_pillar": pillars[2],
+        "hour_pillar": pillars[3],
+        "day_master": GAN_NAMES[stems[2]],
+        "five_elements_count": {name: int(count) for name, count in zip(WUXING_NAMES, counts)},
+        "body_strength": "强" if result["body_strong"][i] else "弱"
+    }
+
+
+def two_hour_slots(start_year: int, end_year: int) -> np.ndarray:
+    """生成 [start_year, end_year) 内每个时辰（两小时）一个时间点"""
+    start = np.datetime64(f"{start_year:04d}-01-01T00:00", 'm')
+    end = np.datetime64(f"{end_year:04d}-01-01T00:00", 'm')
+    return np.arange(start, end, np.timedelta64(120, 'm'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量化八字批量计算")
+    parser.add_argument("--start-year", type=int, default=1900, help="起始年份")
+    parser.add_argument("--end-year", type=int, default=2000, help="结束年份（不含）")
+    parser.add_argument("--longitude", type=float, default=120.0, help="经度")
+    parser.add_argument("--timezone", type=float, default=8.0, help="时区（小时）")
+
+    args = parser.parse_args()
+
+    slots = two_hour_slots(args.start_year, args.end_year)
+    begin = time.perf_counter()
+    result = calculate_bazi_many(slots, args.longitude, args.timezone)
+    elapsed = time.perf_counter() - begin
+
+    print(f"✅ 计算 {len(slots)} 个时辰，用时 {elapsed:.2f} 秒")
+    print(f"身强占比: {result['body_strong'].mean():.3f}")
+    print(f"五行平均: {dict(zip(WUXING_NAMES, result['five_elements_count'].mean(axis=0).round(3)))}")
+
+
+if __name__ == "__main__":
+    main()
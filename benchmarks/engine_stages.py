@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+排盘各阶段基准与金标准校验
+按 1 / 1k / 100k 条输入分别计时排盘的每个阶段：
+- parse_input、calculate_bazi（含增强分析）、BaziEnhancedAnalyzer.enhance_bazi_result
+- ZiweiAdvancedAPI 构造（清空星盘缓存后计时）与常用查询、calculate_vedic
+- ChartVisualizer.generate_bazi_chart / generate_ziwei_chart / generate_vedic_chart（Agg 后端）
+输入由固定随机种子生成，不同提交之间可直接比较；未安装对应库的阶段记为跳过
+
+金标准：重新计算 ba_zi_computed_table.json 等样例文件中的出生信息，逐字段与文件内的结果比较
+（只比较文件中出现的字段，数值允许 --tolerance 误差），未安装对应库的系统记为跳过，
+STALE_GOLDEN 中登记的过时样例只提示不比较
+
+结果可保存为JSON；指定 --baseline 时与之前保存的结果比较单条耗时，变慢超过 --threshold 的阶段记为回归，
+金标准不一致或出现回归时退出码为1
+
+用法示例：
+python benchmarks/engine_stages.py --sizes 1,1000 --output bench.json
+python benchmarks/engine_stages.py --baseline bench.json --threshold 0.2
+python benchmarks/engine_stages.py --stages parse_input,calculate_bazi --sizes 100000
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# 无显示环境下绘图
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import triple_chart_parser
+from triple_chart_parser import TripleChartParser
+
+DEFAULT_SIZES = [1, 1000, 100000]
+
+# 默认金标准样例文件（相对仓库根目录）
+DEFAULT_GOLDEN_FILES = ["ba_zi_computed_table.json", "1_20000101_0000_北京_116.4_39.9.json"]
+
+# 已知过时的样例结果：{文件名: {系统: 原因}}，记为 stale，不参与比较
+STALE_GOLDEN = {
+    "ba_zi_computed_table.json": {"bazi": "样例生成于时柱口诀与十神判断修正之前"},
+}
+
+# 样例文件未给出性别时使用的默认值
+DEFAULT_GENDER = 1
+
+# 紫微查询阶段复用的星盘数上限（查询耗时与星盘数量无关，避免为100k条输入常驻100k张星盘）
+ZIWEI_QUERY_POOL = 1000
+
+# 绘图阶段默认的条数上限（单张图约在百毫秒到秒级，超过上限的规模记为跳过）
+DEFAULT_RENDER_LIMIT = 20
+
+# 单条耗时过短时重复测量取最小值的规模上限
+REPEAT_MAX_SIZE = 1000
+
+
+# ==================== 输入生成 ====================
+
+def generate_inputs(n: int, seed: int = 2024) -> List[Dict[str, Any]]:
+    """生成 n 条出生信息（1900–2100年，固定随机种子）"""
+    rng = random.Random(seed)
+    start = datetime.datetime(1900, 2, 1)
+    span_minutes = int((datetime.datetime(2100, 12, 1) - start).total_seconds() // 60)
+    records = []
+    for _ in range(n):
+        dt = start + datetime.timedelta(minutes=rng.randrange(span_minutes))
+        tz = rng.randint(-11, 12)
+        records.append({
+            "birth_date": dt.strftime("%Y-%m-%d"),
+            "birth_time": dt.strftime("%H:%M"),
+            "timezone": f"{'+' if tz >= 0 else '-'}{abs(tz)}",
+            "longitude": round(tz * 15 + rng.uniform(-7.5, 7.5), 4),
+            "latitude": round(rng.uniform(-60, 60), 4),
+            "gender": rng.choice([0, 1])
+        })
+    return records
+
+
+def ziwei_args(input_data: Dict[str, Any]) -> Tuple[str, int, str]:
+    """与 calculate_ziwei 相同口径的 ZiweiAdvancedAPI 构造参数"""
+    true_dt = input_data["true_solar_time"]
+    return (true_dt.strftime("%Y-%m-%d"), (true_dt.hour + 1) // 2 % 12, input_data["gender_str"])
+
+
+def ziwei_queries(api, year: int):
+    """一组常用紫微查询"""
+    api.star_position("紫微")
+    api.is_empty_house("迁移")
+    api.major_fortune(35)
+    api.flow_year(year)
+    api.flow_trans(year)
+    api.tri_has_star("命宫", ["紫微", "天府"])
+    api.tri_has_trans("财帛", "禄")
+
+
+# ==================== 阶段定义 ====================
+
+class Stage:
+    """一个计时阶段"""
+
+    def __init__(self, name: str, available: bool, setup: Callable[[List[Dict[str, Any]]], Any],
+                 run: Callable[[Any], None], limit: Optional[int] = None, reset: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            name: 阶段名
+            available: 依赖库是否可用
+            setup: 由输入生成本阶段的参数（不计时）
+            run: 处理全部参数（计时）
+            limit: 条数上限，超过时跳过
+            reset: 每次计时前执行（不计时），如清空缓存
+        """
+        self.name = name
+        self.available = available
+        self.setup = setup
+        self.run = run
+        self.limit = limit
+        self.reset = reset
+
+
+def build_stages(parser: TripleChartParser, render_limit: int, work_dir: str) -> List[Stage]:
+    """全部计时阶段"""
+    has_bazi = triple_chart_parser.HAS_SXTWL or triple_chart_parser.HAS_SOLAR_TERMS
+    has_ziwei = triple_chart_parser.HAS_ZIWEI_ADVANCED
+    has_vedic = triple_chart_parser.HAS_FLATLIB
+
+    def parse_all(records):
+        return [parser.parse_input(r["birth_date"], r["birth_time"], r["timezone"],
+                                   r["longitude"], r["latitude"], r["gender"]) for r in records]
+
+    def basic_bazi(records):
+        parts = {"year_pillar", "month_pillar", "day_pillar", "hour_pillar",
+                 "day_master", "five_elements_count", "body_strength"}
+        return [parser.calculate_bazi(data, parts) for data in parse_all(records)]
+
+    def enhance_all(results):
+        analyzer = triple_chart_parser.BaziEnhancedAnalyzer.shared()
+        for result in results:
+            analyzer.enhance_bazi_result(dict(result))
+
+    def ziwei_construct_all(args):
+        from ziwei_advanced_api import ZiweiAdvancedAPI
+        for birth_date, time_index, gender in args:
+            ZiweiAdvancedAPI(birth_date, time_index, gender)
+
+    def ziwei_clear_cache():
+        from ziwei_advanced_api import get_astrolabe_cache
+        get_astrolabe_cache().clear()
+
+    def ziwei_query_setup(records):
+        from ziwei_advanced_api import ZiweiAdvancedAPI
+        pool = [ZiweiAdvancedAPI(*ziwei_args(data)) for data in parse_all(records[:ZIWEI_QUERY_POOL])]
+        years = [int(r["birth_date"][:4]) + 30 for r in records]
+        return [(pool[i % len(pool)], year) for i, year in enumerate(years)]
+
+    def ziwei_query_all(items):
+        for api, year in items:
+            ziwei_queries(api, year)
+
+    def render_setup(records):
+        outputs = []
+        for data in parse_all(records):
+            outputs.append(parser.generate_output(
+                data,
+                parser.calculate_bazi(data) if has_bazi else None,
+                parser.calculate_ziwei(data) if has_ziwei else None,
+                parser.calculate_vedic(data) if has_vedic else None
+            ))
+        return outputs
+
+    def render(method: str):
+        def run(outputs):
+            from chart_visualizer import ChartVisualizer
+            path = os.path.join(work_dir, "chart.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(outputs[0], f, ensure_ascii=False)
+            visualizer = ChartVisualizer(path)
+            for output in outputs:
+                visualizer.data = output
+                getattr(visualizer, method)(os.path.join(work_dir, f"{method}.png"))
+        return run
+
+    return [
+        Stage("parse_input", True, lambda records: records,
+              lambda records: parse_all(records)),
+        Stage("calculate_bazi", has_bazi, parse_all,
+              lambda items: [parser.calculate_bazi(data) for data in items]),
+        Stage("enhance_bazi_result", has_bazi and triple_chart_parser.HAS_BAZI_ENHANCED, basic_bazi,
+              enhance_all),
+        Stage("ziwei_construct", has_ziwei, lambda records: [ziwei_args(data) for data in parse_all(records)],
+              ziwei_construct_all, reset=ziwei_clear_cache),
+        Stage("ziwei_queries", has_ziwei, ziwei_query_setup, ziwei_query_all),
+        Stage("calculate_vedic", has_vedic, parse_all,
+              lambda items: [parser.calculate_vedic(data) for data in items]),
+        Stage("generate_bazi_chart", has_bazi, render_setup, render("generate_bazi_chart"), limit=render_limit),
+        Stage("generate_ziwei_chart", has_ziwei, render_setup, render("generate_ziwei_chart"), limit=render_limit),
+        Stage("generate_vedic_chart", has_vedic, render_setup, render("generate_vedic_chart"), limit=render_limit),
+    ]
+
+
+def time_stage(stage: Stage, records: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    """计时一个阶段（屏蔽阶段内的打印与警告），返回耗时统计"""
+    n = len(records)
+    if not stage.available:
+        return {"status": "skipped", "reason": "依赖库未安装"}
+    if stage.limit is not None and n > stage.limit:
+        return {"status": "skipped", "reason": f"超过条数上限 {stage.limit}"}
+
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        items = stage.setup(records)
+        timings = []
+        for _ in range(repeat if n <= REPEAT_MAX_SIZE else 1):
+            if stage.reset is not None:
+                stage.reset()
+            begin = time.perf_counter()
+            stage.run(items)
+            timings.append(time.perf_counter() - begin)
+
+    total = min(timings)
+    return {
+        "status": "ok",
+        "total_s": round(total, 6),
+        "per_item_us": round(total / n * 1e6, 3),
+        "per_second": round(n / total, 1) if total > 0 else None
+    }
+
+
+# ==================== 金标准 ====================
+
+def compare_golden(expected: Any, actual: Any, tolerance: float, path: str = "") -> List[str]:
+    """逐字段比较（只比较 expected 中出现的字段），返回不一致的字段说明"""
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict):
+            return [f"{path}: 期望对象，实际为 {type(actual).__name__}"]
+        diffs = []
+        for key, value in expected.items():
+            child = f"{path}.{key}" if path else key
+            if key not in actual:
+                diffs.append(f"{child}: 缺少字段")
+            else:
+                diffs.extend(compare_golden(value, actual[key], tolerance, child))
+        return diffs
+    if isinstance(expected, list):
+        if not isinstance(actual, list) or len(actual) != len(expected):
+            return [f"{path}: 列表长度不一致"]
+        diffs = []
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            diffs.extend(compare_golden(e, a, tolerance, f"{path}[{i}]"))
+        return diffs
+    if isinstance(expected, float) and isinstance(actual, (int, float)) and not isinstance(actual, bool):
+        return [] if abs(expected - actual) <= tolerance else [f"{path}: 期望 {expected}，实际 {actual}"]
+    return [] if expected == actual else [f"{path}: 期望 {expected!r}，实际 {actual!r}"]
+
+
+def check_golden(parser: TripleChartParser, golden_file: str, tolerance: float) -> Dict[str, Any]:
+    """重新计算样例文件中的出生信息并与其结果比较，返回各系统的校验结果"""
+    with open(golden_file, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    given = golden["input"]
+    available = {
+        "bazi": triple_chart_parser.HAS_SXTWL or triple_chart_parser.HAS_SOLAR_TERMS,
+        "ziwei": triple_chart_parser.HAS_IZTRO,
+        "vedic": triple_chart_parser.HAS_FLATLIB
+    }
+    systems = [name for name in triple_chart_parser.CHART_SYSTEMS if name in golden and available[name]]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        output = parser.calculate_all(given["birth_date"], given["birth_time"], given["timezone"],
+                                      given["longitude"], given["latitude"],
+                                      given.get("gender", DEFAULT_GENDER), systems) if systems else {}
+
+    stale = STALE_GOLDEN.get(os.path.basename(golden_file), {})
+    checks = {}
+    for name in triple_chart_parser.CHART_SYSTEMS:
+        if name not in golden:
+            continue
+        if name in stale:
+            checks[name] = {"status": "stale", "reason": stale[name]}
+            continue
+        if name not in systems:
+            checks[name] = {"status": "skipped", "reason": "依赖库未安装"}
+            continue
+        diffs = compare_golden(golden[name], output.get(name), tolerance)
+        checks[name] = {"status": "ok" if not diffs else "mismatch", "diffs": diffs[:20], "diff_count": len(diffs)}
+    return checks
+
+
+# ==================== 回归比较 ====================
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """比较两次结果中都成功的 (阶段, 规模)，单条耗时变慢超过 threshold（比例）的记为回归"""
+    regressions = []
+    for stage, sizes in current["stages"].items():
+        for size, result in sizes.items():
+            before = baseline.get("stages", {}).get(stage, {}).get(size)
+            if result.get("status") != "ok" or not before or before.get("status") != "ok":
+                continue
+            ratio = result["per_item_us"] / before["per_item_us"] if before["per_item_us"] else 1.0
+            if ratio > 1 + threshold:
+                regressions.append({
+                    "stage": stage,
+                    "size": int(size),
+                    "baseline_us": before["per_item_us"],
+                    "current_us": result["per_item_us"],
+                    "ratio": round(ratio, 3)
+                })
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    """当前提交（非git仓库时为 None）"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="排盘各阶段基准与金标准校验")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="输入条数，逗号分隔 (默认1,1000,100000)")
+    parser.add_argument("--stages", help="只运行这些阶段，逗号分隔 (默认全部)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help=f"条数不超过{REPEAT_MAX_SIZE}时重复测量次数，取最小值 (默认3)")
+    parser.add_argument("--render-limit", type=int, default=DEFAULT_RENDER_LIMIT,
+                        help=f"绘图阶段的条数上限 (默认{DEFAULT_RENDER_LIMIT})")
+    parser.add_argument("--seed", type=int, default=2024, help="输入生成的随机种子 (默认2024)")
+    parser.add_argument("--golden", nargs="*", help="金标准样例文件 (默认 ba_zi_computed_table.json 等)")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="金标准数值比较误差 (默认0.05)")
+    parser.add_argument("--baseline", help="之前保存的结果JSON，用于回归比较")
+    parser.add_argument("--threshold", type=float, default=0.2, help="回归阈值：单条耗时变慢比例 (默认0.2)")
+    parser.add_argument("--output", help="结果保存为JSON文件")
+
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(",")]
+    except ValueError:
+        parser.error("--sizes 必须为逗号分隔的正整数")
+    if any(size < 1 for size in sizes) or args.repeat < 1:
+        parser.error("--sizes 必须为正整数，--repeat 必须为正整数")
+
+    chart_parser = TripleChartParser()
+    golden_files = args.golden if args.golden is not None else \
+        [os.path.join(REPO_ROOT, name) for name in DEFAULT_GOLDEN_FILES]
+
+    golden = {}
+    for golden_file in golden_files:
+        golden[os.path.basename(golden_file)] = check_golden(chart_parser, golden_file, args.tolerance)
+        for name, check in golden[os.path.basename(golden_file)].items():
+            mark = {"ok": "✅", "mismatch": "❌", "skipped": "⏭️", "stale": "⚠️"}[check["status"]]
+            detail = f"{check['diff_count']} 处不一致" if check["status"] == "mismatch" else check.get("reason", "")
+            print(f"{mark} 金标准 {os.path.basename(golden_file)} [{name}] {detail}")
+            for diff in check.get("diffs", [])[:5]:
+                print(f"     {diff}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        stages = build_stages(chart_parser, args.render_limit, work_dir)
+        if args.stages:
+            wanted = args.stages.split(",")
+            unknown = [name for name in wanted if name not in {stage.name for stage in stages}]
+            if unknown:
+                parser.error(f"未知阶段: {', '.join(unknown)}（可选: {', '.join(stage.name for stage in stages)}）")
+            stages = [stage for stage in stages if stage.name in wanted]
+
+        records = generate_inputs(max(sizes), args.seed)
+        results: Dict[str, Dict[str, Any]] = {}
+        print(f"\n{'阶段':<24}{'条数':>8}{'总耗时(s)':>12}{'单条(us)':>12}{'条/秒':>12}")
+        for stage in stages:
+            results[stage.name] = {}
+            for size in sizes:
+                result = time_stage(stage, records[:size], args.repeat)
+                results[stage.name][str(size)] = result
+                if result["status"] == "ok":
+                    print(f"{stage.name:<24}{size:>8}{result['total_s']:>12.4f}"
+                          f"{result['per_item_us']:>12.1f}{result['per_second'] or 0:>12.0f}")
+                else:
+                    print(f"{stage.name:<24}{size:>8}  跳过（{result['reason']}）")
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "sizes": sizes,
+        "seed": args.seed,
+        "golden": golden,
+        "stages": results
+    }
+
+    ok = all(check["status"] != "mismatch" for checks in golden.values() for check in checks.values())
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        report["baseline"] = {"revision": baseline.get("revision"), "threshold": args.threshold,
+                              "regressions": regressions}
+        print(f"\n与基准 {baseline.get('revision') or args.baseline} 比较（阈值 {args.threshold:.0%}）:")
+        for item in regressions:
+            print(f"❌ {item['stage']} ×{item['size']}: {item['baseline_us']:.1f} → {item['current_us']:.1f} us"
+                  f"（{item['ratio']:.2f}倍）")
+        if not regressions:
+            print("✅ 无性能回归")
+        ok = ok and not regressions
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
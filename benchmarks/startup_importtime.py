@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准（只算八字的路径）
+用 python -X importtime 多次运行 triple_chart_parser.py --systems bazi，统计模块导入总耗时，
+检查其不超过预算，且没有加载紫微斗数、印度星盘、绘图等其他系统的库
+
+用法示例：
+python benchmarks/startup_importtime.py
+python benchmarks/startup_importtime.py --budget-ms 200 --runs 10 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 默认预算（毫秒）：全部模块导入耗时之和
+DEFAULT_BUDGET_MS = 250.0
+
+# 只算八字时不应加载的库
+FORBIDDEN_MODULES = ["py_iztro", "flatlib", "matplotlib", "sxtwl"]
+
+# 只算八字的命令行
+BAZI_ONLY_ARGS = [
+    "triple_chart_parser.py", "--systems", "bazi",
+    "--birth-date", "2000-08-16", "--birth-time", "10:00", "--timezone", "+8",
+    "--longitude", "116.4", "--latitude", "39.9", "--gender", "1"
+]
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    解析 -X importtime 输出
+
+    Returns:
+        (顶层模块累计耗时之和（毫秒）, [(模块名, 累计耗时毫秒)])
+    """
+    total_us = 0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        cumulative_us = int(cumulative_us)
+        # 模块名前的缩进表示嵌套层级，无缩进（仅一个空格）为顶层导入
+        if not name[1:].startswith(" "):
+            total_us += cumulative_us
+        modules.append((name.strip(), cumulative_us / 1000))
+    return total_us / 1000, modules
+
+
+def run_once() -> Dict[str, Any]:
+    """运行一次只算八字的排盘，返回导入耗时与已加载模块"""
+    begin = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime"] + BAZI_ONLY_ARGS,
+        cwd=REPO_ROOT, capture_output=True, text=True, encoding="utf-8"
+    )
+    wall_ms = (time.perf_counter() - begin) * 1000
+    if completed.returncode != 0:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("排盘进程运行失败:\n" + "\n".join(errors))
+
+    import_ms, modules = parse_importtime(completed.stderr)
+    return {"import_ms": import_ms, "wall_ms": wall_ms, "modules": modules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="只算八字路径的启动耗时基准")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"导入耗时预算（毫秒，默认{DEFAULT_BUDGET_MS:.0f}）")
+    parser.add_argument("--runs", type=int, default=5, help="运行次数，取中位数 (默认5)")
+    parser.add_argument("--top", type=int, default=10, help="列出累计耗时最长的模块数 (默认10)")
+    parser.add_argument("--output", help="结果保存为JSON文件")
+
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    wall_ms = statistics.median(run["wall_ms"] for run in runs)
+
+    loaded = {name for run in runs for name, _ in run["modules"]}
+    forbidden = sorted(name for name in loaded if name.split(".")[0] in FORBIDDEN_MODULES)
+
+    slowest = sorted(runs[-1]["modules"], key=lambda item: item[1], reverse=True)[:args.top]
+    ok = import_ms <= args.budget_ms and not forbidden
+
+    result = {
+        "budget_ms": args.budget_ms,
+        "runs": args.runs,
+        "import_ms": round(import_ms, 1),
+        "wall_ms": round(wall_ms, 1),
+        "forbidden_loaded": forbidden,
+        "slowest": [[name, round(ms, 1)] for name, ms in slowest],
+        "ok": ok
+    }
+
+    print(f"导入耗时中位数: {import_ms:.1f} ms（预算 {args.budget_ms:.0f} ms），进程总耗时中位数: {wall_ms:.1f} ms")
+    for name, ms in slowest:
+        print(f"  {ms:8.1f} ms  {name}")
+    if forbidden:
+        print(f"❌ 只算八字时加载了其他系统的库: {', '.join(forbidden)}")
+    print("✅ 通过" if ok else "❌ 超出预算")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,750 @@
+#!/usr/bin/env python3
+"""
+排盘结果二进制编码
+把 calculate_all 的结果编码为定长记录（396字节，缩进JSON约7–10KB），用于大规模存储：
+
+- 干支：天干、地支各4位，一柱一个字节
+- 紫微星曜：按宫位存位集（每宫主星、辅星各16位，杂曜64位），星曜在宫内的顺序取编码表顺序
+- 星体度数：float32（结果中度数保留两位小数，解码后按两位小数还原）
+- 记录头：魔数 b"LC"、版本号、各部分是否已编码的标志、附加部分长度
+
+记录 = 定长部分（记录头 + input / bazi / ziwei / vedic 四个固定偏移的槽位）+ 变长附加部分。
+编码时逐个部分校验"解码后与原结果完全一致"（键顺序、类型、数值），不一致（如 --fields 投影、
+出错的系统、编码表外的星曜）的部分整体以紧凑JSON存入附加部分，因此任何结果都能无损还原；
+结果中的其他顶层字段（batch_index、id 等）与键顺序也记录在附加部分。
+
+ChartRecord 按需解码：读取某个字段只解码所在部分（紫微按 chart、basic_info 等子项），
+四柱直接从固定偏移读取。编码表只能在末尾追加；布局变化时递增 CODEC_VERSION。
+
+用法示例：
+python chart_codec.py charts.jsonl --output charts.lcb
+python chart_codec.py charts.lcb --decode --output charts_decoded.jsonl
+"""
+
+import argparse
+import json
+import re
+import struct
+import sys
+import zlib
+from typing import Dict, Any, BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from serialization import dumps
+
+RECORD_MAGIC = b"LC"
+CODEC_VERSION = 1
+
+# 记录头：魔数、版本、标志（低4位对应四个部分，FLAG_RESIDUAL_ZLIB 表示附加部分经过压缩）、附加部分长度
+HEADER = struct.Struct("<2sBBI")
+FLAG_RESIDUAL_ZLIB = 0x80
+
+# 附加部分超过此长度时尝试压缩
+RESIDUAL_COMPRESS_MIN = 128
+
+# 长度前缀（记录流）
+LENGTH_PREFIX = struct.Struct("<I")
+
+# ==================== 编码表（只能在末尾追加） ====================
+
+STEMS = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
+BRANCHES = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+FIVE_ELEMENTS = ["木", "火", "土", "金", "水"]
+BODY_STRENGTHS = ["强", "弱"]
+TEN_GODS = ["比肩", "劫财", "食神", "伤官", "偏财", "正财", "七杀", "正官", "偏印", "正印"]
+TWELVE_STATES = ["长生", "沐浴", "冠带", "临官", "帝旺", "衰", "病", "死", "墓", "绝", "胎", "养"]
+NAYIN = [
+    "海中金", "炉中火", "大林木", "路旁土", "剑锋金", "山头火", "涧下水", "城头土", "白腊金", "杨柳木",
+    "泉中水", "屋上土", "霹雳火", "松柏木", "长流水", "砂中金", "山下火", "平地木", "壁上土", "金箔金",
+    "覆灯火", "天河水", "大驿土", "钗钏金", "桑柘木", "大溪水", "沙中土", "天上火", "石榴木", "大海水"
+]
+PILLAR_KEYS = ["year_pillar", "month_pillar", "day_pillar", "hour_pillar"]
+PILLAR_NAMES = ["年柱", "月柱", "日柱", "时柱"]
+
+# 紫微：星曜顺序与 py-iztro 安星顺序一致（宫内星曜按此顺序排列）
+MAJOR_STARS = ["紫微", "天机", "太阳", "武曲", "天同", "廉贞", "天府",
+               "太阴", "贪狼", "巨门", "天相", "天梁", "七杀", "破军"]
+MINOR_STARS = ["左辅", "右弼", "文昌", "文曲", "天魁", "天钺", "禄存",
+               "天马", "地空", "地劫", "火星", "铃星", "擎羊", "陀罗"]
+ADJECTIVE_STARS = [
+    "红鸾", "天喜", "天姚", "咸池", "解神", "三台", "八座", "恩光", "天贵", "龙池",
+    "凤阁", "天才", "天寿", "台辅", "封诰", "天巫", "华盖", "天官", "天福", "天厨",
+    "天月", "天德", "月德", "天空", "旬空", "截路", "空亡", "孤辰", "寡宿", "蜚廉",
+    "破碎", "天刑", "阴煞", "天哭", "天虚", "天使", "天伤", "年解"
+]
+ALL_STARS = MAJOR_STARS + MINOR_STARS + ADJECTIVE_STARS
+PALACE_NAMES = ["命宫", "兄弟", "夫妻", "子女", "财帛", "疾厄", "迁移", "仆役", "官禄", "田宅", "福德", "父母"]
+BRIGHTNESS = ["", "庙", "旺", "得", "利", "平", "不", "陷"]
+MUTAGENS = ["", "禄", "权", "科", "忌"]
+FOUR_TRANS = ["禄", "权", "科", "忌"]
+FIVE_ELEMENTS_CLASSES = ["水二局", "木三局", "金四局", "土五局", "火六局"]
+ZIWEI_PARTS = ["basic_info", "chart", "four_pillars", "year_four_trans",
+               "A_functions", "B_functions", "C_functions", "enhanced_features"]
+
+# 农历日期文字（一九九九年冬月廿四）
+CHINESE_DIGITS = "〇一二三四五六七八九"
+LUNAR_MONTHS = ["正", "二", "三", "四", "五", "六", "七", "八", "九", "十", "冬", "腊"]
+LUNAR_DAYS = (["初" + d for d in "一二三四五六七八九十"] + ["十" + d for d in "一二三四五六七八九"]
+              + ["二十"] + ["廿" + d for d in "一二三四五六七八九"] + ["三十"])
+LUNAR_DATE_PATTERN = re.compile(r"^(.+)年(闰?)(.)月(.+)$")
+
+# 印度星盘
+SIGNS = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+         "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+PLANETS = ["Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn",
+           "North Node", "South Node", "Uranus", "Neptune", "Pluto"]
+AXIS_POINTS = ["Descendant", "Midheaven", "Imum Coeli", "Pars Fortuna"]
+AYANAMSA_TYPES = ["lahiri", "raman", "kp"]
+
+# 固定文字
+BAZI_NOTES = {
+    "主星": "天干对应的十神",
+    "藏干": "地支中隐藏的天干",
+    "纳音": "干支组合的五行属性",
+    "空亡": "基于日柱的空亡地支",
+    "星运": "基于日干的十二长生状态"
+}
+ZIWEI_FEATURES = {
+    "A类基础信息": "5个功能全部实现",
+    "B类运势核心": "4个功能全部实现",
+    "C类三方四正": "4个功能全部实现",
+    "总计": "13个核心功能完整实现"
+}
+
+
+def _index(vocab: List[str], value: str) -> int:
+    """编码表下标（不在表中时抛出 ValueError，由调用方改存附加部分）"""
+    return vocab.index(value)
+
+
+# ==================== 干支 ====================
+
+def _pillar_code(pillar: str) -> int:
+    """干支 → 一个字节（高4位天干，低4位地支）"""
+    if len(pillar) != 2:
+        raise ValueError(f"干支格式错误: {pillar}")
+    return _index(STEMS, pillar[0]) << 4 | _index(BRANCHES, pillar[1])
+
+
+def _pillar_name(code: int) -> str:
+    return STEMS[code >> 4] + BRANCHES[code & 0x0F]
+
+
+def _bitset(vocab: List[str], names: List[str]) -> int:
+    bits = 0
+    for name in names:
+        bits |= 1 << _index(vocab, name)
+    return bits
+
+
+def _names(vocab: List[str], bits: int) -> List[str]:
+    return [name for i, name in enumerate(vocab) if bits >> i & 1]
+
+
+# ==================== input ====================
+
+INPUT = struct.Struct("<hBBBBhddB")
+
+
+def _format_timezone(quarters: int) -> str:
+    hours = quarters / 4
+    return f"{'+' if hours >= 0 else '-'}{abs(hours):g}"
+
+
+def _encode_input(data: Dict[str, Any]) -> bytes:
+    year, month, day = (int(part) for part in data["birth_date"].split("-"))
+    hour, minute = (int(part) for part in data["birth_time"].split(":"))
+    quarters = round(float(data["timezone"]) * 4)
+    return INPUT.pack(year, month, day, hour, minute, quarters,
+                      data["longitude"], data["latitude"], data["gender"])
+
+
+def _decode_input(buffer: bytes, offset: int) -> Dict[str, Any]:
+    year, month, day, hour, minute, quarters, longitude, latitude, gender = INPUT.unpack_from(buffer, offset)
+    return {
+        "birth_date": f"{year:04d}-{month:02d}-{day:02d}",
+        "birth_time": f"{hour:02d}:{minute:02d}",
+        "timezone": _format_timezone(quarters),
+        "longitude": longitude,
+        "latitude": latitude,
+        "gender": gender,
+        "gender_str": "男" if gender == 1 else "女"
+    }
+
+
+# ==================== bazi ====================
+
+# 四柱、五行统计、身强身弱、标志（1=有规则表版本，2=有增强分析）、规则表版本（12位十六进制）、四柱详析
+BAZI = struct.Struct("<4s5sBB6s28s")
+BAZI_DETAIL_SIZE = 7
+
+
+def _encode_pillar_detail(detail: Dict[str, Any]) -> bytes:
+    """四柱详析的一柱 → 7字节：主星|星运、纳音、空亡、藏干个数|藏干、藏干十神"""
+    canggan = detail["藏干"]
+    gods = [item["十神"] for item in detail["藏干十神"]]
+    kongwang = detail["空亡"]
+    if len(canggan) > 3 or len(gods) != len(canggan) or len(kongwang) != 2:
+        raise ValueError("四柱详析格式不符")
+    stems = [_index(STEMS, gan) for gan in canggan] + [0] * (3 - len(canggan))
+    god_codes = [_index(TEN_GODS, god) for god in gods] + [0] * (3 - len(gods))
+    return bytes([
+        _index(TEN_GODS, detail["主星"]) << 4 | _index(TWELVE_STATES, detail["星运（十二长生）"]),
+        _index(NAYIN, detail["纳音"]),
+        _index(BRANCHES, kongwang[0]) << 4 | _index(BRANCHES, kongwang[1]),
+        len(canggan) << 4 | stems[0],
+        stems[1] << 4 | stems[2],
+        god_codes[0] << 4 | god_codes[1],
+        god_codes[2] << 4
+    ])
+
+
+def _decode_pillar_detail(name: str, pillar: str, detail: bytes) -> Dict[str, Any]:
+    count = detail[3] >> 4
+    stems = [detail[3] & 0x0F, detail[4] >> 4, detail[4] & 0x0F][:count]
+    gods = [detail[5] >> 4, detail[5] & 0x0F, detail[6] >> 4][:count]
+    canggan = [STEMS[i] for i in stems]
+    return {
+        "柱序": name,
+        "天干": pillar[0],
+        "地支": pillar[1],
+        "干支": pillar,
+        "主星": TEN_GODS[detail[0] >> 4],
+        "藏干": canggan,
+        "纳音": NAYIN[detail[1]],
+        "空亡": [BRANCHES[detail[2] >> 4], BRANCHES[detail[2] & 0x0F]],
+        "星运（十二长生）": TWELVE_STATES[detail[0] & 0x0F],
+        "藏干十神": [{"藏干": gan, "十神": TEN_GODS[god]} for gan, god in zip(canggan, gods)]
+    }
+
+
+def _encode_bazi(data: Dict[str, Any]) -> bytes:
+    pillars = bytes(_pillar_code(data[key]) for key in PILLAR_KEYS)
+    counts = bytes(data["five_elements_count"][element] for element in FIVE_ELEMENTS)
+    flags = 0
+    version = bytes(6)
+    details = bytes(BAZI.size - 22)
+    if "rule_table_version" in data:
+        version = bytes.fromhex(data["rule_table_version"])
+        if len(version) != 6:
+            raise ValueError("规则表版本格式不符")
+        flags |= 1
+    if "enhanced_analysis" in data:
+        pillar_details = data["enhanced_analysis"]["四柱详析"]
+        if len(pillar_details) != 4:
+            raise ValueError("四柱详析不完整")
+        details = b"".join(_encode_pillar_detail(detail) for detail in pillar_details)
+        flags |= 2
+    return BAZI.pack(pillars, counts, _index(BODY_STRENGTHS, data["body_strength"]), flags, version, details)
+
+
+def _decode_bazi(buffer: bytes, offset: int) -> Dict[str, Any]:
+    pillar_codes, counts, strength, flags, version, details = BAZI.unpack_from(buffer, offset)
+    pillars = [_pillar_name(code) for code in pillar_codes]
+    result = dict(zip(PILLAR_KEYS, pillars))
+    result["day_master"] = pillars[2][0]
+    result["five_elements_count"] = dict(zip(FIVE_ELEMENTS, counts))
+    result["body_strength"] = BODY_STRENGTHS[strength]
+    if flags & 1:
+        result["rule_table_version"] = version.hex()
+    if flags & 2:
+        pillar_details = [
+            _decode_pillar_detail(name, pillar, details[i * BAZI_DETAIL_SIZE:(i + 1) * BAZI_DETAIL_SIZE])
+            for i, (name, pillar) in enumerate(zip(PILLAR_NAMES, pillars))
+        ]
+        # 十神统计的键顺序与 BaziEnhancedAnalyzer 的统计顺序一致（逐柱：天干十神、藏干十神）
+        ten_gods_count: Dict[str, int] = {}
+        for detail in pillar_details:
+            for god in [detail["主星"]] + [item["十神"] for item in detail["藏干十神"]]:
+                ten_gods_count[god] = ten_gods_count.get(god, 0) + 1
+        result["enhanced_analysis"] = {
+            "四柱详析": pillar_details,
+            "十神统计": ten_gods_count,
+            "分析说明": dict(BAZI_NOTES)
+        }
+    return result
+
+
+# ==================== ziwei ====================
+
+ZIWEI = struct.Struct(
+    "<HBB"       # 农历年、月（最高位=闰月）、日
+    "BBB"        # 命主、身主、五行局
+    "4s4s4s"     # chinese_date、four_pillars、year_four_trans
+    "12s12sH"    # 各宫宫名、宫干|宫支、身宫位集
+    "12H12H12Q"  # 各宫主星、辅星、杂曜位集
+    "14s"        # 各主星亮度|四化
+    "BB"         # A类：紫微所在宫、标志（1=命宫空宫，2=三方有紫微天府，4=三方有禄）
+    "BBBHH4sB"   # B类：25岁大限宫、2024流年宫、流年地支、流年主星、流年辅星、流年四化、流年命宫
+    "4s4s"       # C类：命宫三方四正、紫微三方四正
+)
+
+
+def _palace_index(name: str) -> int:
+    return _index(PALACE_NAMES, name)
+
+
+def _parse_lunar_date(text: str) -> Tuple[int, int, int]:
+    match = LUNAR_DATE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"农历日期格式不符: {text}")
+    year = int("".join(str(CHINESE_DIGITS.index(char)) for char in match.group(1)))
+    month = _index(LUNAR_MONTHS, match.group(3)) + 1
+    return year, month | (0x80 if match.group(2) else 0), LUNAR_DAYS.index(match.group(4)) + 1
+
+
+def _format_lunar_date(year: int, month: int, day: int) -> str:
+    leap = "闰" if month & 0x80 else ""
+    digits = "".join(CHINESE_DIGITS[int(char)] for char in str(year))
+    return f"{digits}年{leap}{LUNAR_MONTHS[(month & 0x7F) - 1]}月{LUNAR_DAYS[day - 1]}"
+
+
+def _star_codes(names: List[str]) -> bytes:
+    return bytes(_index(ALL_STARS, name) for name in names)
+
+
+def _encode_ziwei(data: Dict[str, Any]) -> bytes:
+    if list(data) != ZIWEI_PARTS:
+        raise ValueError("紫微结果不是完整的高级API输出")
+    basic = data["basic_info"]
+    palaces = data["chart"]["palaces"]
+    if len(palaces) != 12:
+        raise ValueError("宫位数量不符")
+
+    names, stems_branches = [], []
+    body_mask = 0
+    major_bits, minor_bits, adjective_bits = [], [], []
+    star_attrs = bytearray(len(MAJOR_STARS))
+    for slot, (name, palace) in enumerate(palaces.items()):
+        names.append(_palace_index(name))
+        stems_branches.append(_pillar_code(palace["heavenly_stem"] + palace["earthly_branch"]))
+        if palace["is_body_palace"]:
+            body_mask |= 1 << slot
+        major_bits.append(_bitset(MAJOR_STARS, [star["name"] for star in palace["major_stars"]]))
+        minor_bits.append(_bitset(MINOR_STARS, palace["minor_stars"]))
+        adjective_bits.append(_bitset(ADJECTIVE_STARS, palace["adjective_stars"]))
+        for star in palace["major_stars"]:
+            star_attrs[_index(MAJOR_STARS, star["name"])] = \
+                _index(BRIGHTNESS, star["brightness"]) << 4 | _index(MUTAGENS, star["mutagen"])
+
+    a_part, b_part, c_part = data["A_functions"], data["B_functions"], data["C_functions"]
+    flow_year = b_part["flow_year_2024"]
+    flags = (1 if a_part["is_empty_house_example"] else 0) \
+        | (2 if c_part["tri_has_star_example"] else 0) | (4 if c_part["tri_has_trans_example"] else 0)
+    return ZIWEI.pack(
+        *_parse_lunar_date(basic["lunar_date"]),
+        _index(ALL_STARS, basic["soul"]), _index(ALL_STARS, basic["body"]),
+        _index(FIVE_ELEMENTS_CLASSES, basic["five_elements_class"]),
+        bytes(_pillar_code(pillar) for pillar in basic["chinese_date"].split(" ")),
+        bytes(_pillar_code(data["four_pillars"][key]) for key in PILLAR_KEYS),
+        _star_codes([data["year_four_trans"][trans] for trans in FOUR_TRANS]),
+        bytes(names), bytes(stems_branches), body_mask,
+        *major_bits, *minor_bits, *adjective_bits,
+        bytes(star_attrs),
+        _palace_index(a_part["star_position_example"]), flags,
+        _palace_index(b_part["major_fortune_25"]), _palace_index(flow_year["palace"]),
+        _index(BRANCHES, flow_year["earthly_branch"]),
+        _bitset(MAJOR_STARS, flow_year["major_stars"]), _bitset(MINOR_STARS, flow_year["minor_stars"]),
+        _star_codes([b_part["flow_trans_2024"][trans] for trans in FOUR_TRANS]),
+        _palace_index(b_part["house_of_flow_2024"]),
+        bytes(_palace_index(name) for name in c_part["tri_house_ming"]),
+        bytes(_palace_index(name) for name in c_part["star_tri_house_example"])
+    )
+
+
+def _unpack_ziwei(buffer: bytes, offset: int) -> Dict[str, Any]:
+    """按名称取出紫微布局的各字段"""
+    f = ZIWEI.unpack_from(buffer, offset)
+    return {
+        "lunar_date": f[0:3], "soul": f[3], "body": f[4], "five_elements_class": f[5],
+        "chinese_date": f[6], "four_pillars": f[7], "year_four_trans": f[8],
+        "palace_names": f[9], "palace_pillars": f[10], "body_mask": f[11],
+        "major": f[12:24], "minor": f[24:36], "adjective": f[36:48], "star_attrs": f[48],
+        "star_position": f[49], "flags": f[50],
+        "major_fortune": f[51], "flow_palace": f[52], "flow_branch": f[53], "flow_major": f[54],
+        "flow_minor": f[55], "flow_trans": f[56], "house_of_flow": f[57],
+        "tri_house": f[58], "star_tri_house": f[59]
+    }
+
+
+def _decode_ziwei_chart(fields: Dict[str, Any]) -> Dict[str, Any]:
+    names, stems_branches, body_mask = fields["palace_names"], fields["palace_pillars"], fields["body_mask"]
+    major_bits, minor_bits, adjective_bits = fields["major"], fields["minor"], fields["adjective"]
+    star_attrs = fields["star_attrs"]
+
+    palaces, star_positions = {}, {}
+    for slot in range(12):
+        name = PALACE_NAMES[names[slot]]
+        pillar = _pillar_name(stems_branches[slot])
+        major_stars = []
+        for star in _names(MAJOR_STARS, major_bits[slot]):
+            attrs = star_attrs[_index(MAJOR_STARS, star)]
+            major_stars.append({"name": star, "brightness": BRIGHTNESS[attrs >> 4], "mutagen": MUTAGENS[attrs & 0x0F]})
+            star_positions[star] = name
+        palaces[name] = {
+            "index": slot,
+            "heavenly_stem": pillar[0],
+            "earthly_branch": pillar[1],
+            "is_body_palace": bool(body_mask >> slot & 1),
+            "major_stars": major_stars,
+            "minor_stars": _names(MINOR_STARS, minor_bits[slot]),
+            "adjective_stars": _names(ADJECTIVE_STARS, adjective_bits[slot])
+        }
+    return {"palaces": palaces, "star_positions": star_positions}
+
+
+def _four_trans(codes: bytes) -> Dict[str, str]:
+    return {trans: ALL_STARS[code] for trans, code in zip(FOUR_TRANS, codes)}
+
+
+# 紫微各子项的解码（按需）
+ZIWEI_DECODERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "basic_info": lambda f: {
+        "lunar_date": _format_lunar_date(*f["lunar_date"]),
+        "chinese_date": " ".join(_pillar_name(code) for code in f["chinese_date"]),
+        "soul": ALL_STARS[f["soul"]],
+        "body": ALL_STARS[f["body"]],
+        "five_elements_class": FIVE_ELEMENTS_CLASSES[f["five_elements_class"]]
+    },
+    "chart": _decode_ziwei_chart,
+    "four_pillars": lambda f: dict(zip(PILLAR_KEYS, (_pillar_name(code) for code in f["four_pillars"]))),
+    "year_four_trans": lambda f: _four_trans(f["year_four_trans"]),
+    "A_functions": lambda f: {
+        "star_position_example": PALACE_NAMES[f["star_position"]],
+        "is_empty_house_example": bool(f["flags"] & 1)
+    },
+    "B_functions": lambda f: {
+        "major_fortune_25": PALACE_NAMES[f["major_fortune"]],
+        "flow_year_2024": {
+            "palace": PALACE_NAMES[f["flow_palace"]],
+            "earthly_branch": BRANCHES[f["flow_branch"]],
+            "major_stars": _names(MAJOR_STARS, f["flow_major"]),
+            "minor_stars": _names(MINOR_STARS, f["flow_minor"])
+        },
+        "flow_trans_2024": _four_trans(f["flow_trans"]),
+        "house_of_flow_2024": PALACE_NAMES[f["house_of_flow"]]
+    },
+    "C_functions": lambda f: {
+        "tri_house_ming": [PALACE_NAMES[i] for i in f["tri_house"]],
+        "tri_has_star_example": bool(f["flags"] & 2),
+        "tri_has_trans_example": bool(f["flags"] & 4),
+        "star_tri_house_example": [PALACE_NAMES[i] for i in f["star_tri_house"]]
+    },
+    "enhanced_features": lambda f: dict(ZIWEI_FEATURES)
+}
+
+
+def _decode_ziwei(buffer: bytes, offset: int) -> Dict[str, Any]:
+    fields = _unpack_ziwei(buffer, offset)
+    return {part: ZIWEI_DECODERS[part](fields) for part in ZIWEI_PARTS}
+
+
+# ==================== vedic ====================
+
+# ayanamsa 类型与数值、上升点、行星位集与各行星、轴点位集与各轴点（星座|宫位 一字节 + float32 度数）
+VEDIC = struct.Struct("<Bf" + "Bf" + "H" + "Bf" * len(PLANETS) + "B" + "Bf" * len(AXIS_POINTS))
+
+
+def _encode_position(position: Dict[str, Any]) -> Tuple[int, float]:
+    house = position["house"]
+    if not 1 <= house <= 12:
+        raise ValueError(f"宫位超出范围: {house}")
+    return _index(SIGNS, position["sign"]) << 4 | (house - 1), position["lon"]
+
+
+def _decode_position(code: int, lon: float) -> Dict[str, Any]:
+    return {"sign": SIGNS[code >> 4], "house": (code & 0x0F) + 1, "lon": round(lon, 2)}
+
+
+def _encode_bodies(vocab: List[str], bodies: Dict[str, Any]) -> Tuple[int, List]:
+    mask = _bitset(vocab, list(bodies))
+    values = []
+    for name in vocab:
+        values.extend(_encode_position(bodies[name]) if name in bodies else (0, 0.0))
+    return mask, values
+
+
+def _encode_vedic(data: Dict[str, Any]) -> bytes:
+    if data.get("chart_type") != "vedic_sidereal":
+        raise ValueError("不是恒星历星盘")
+    planet_mask, planets = _encode_bodies(PLANETS, data["planets"])
+    axis_mask, axis_points = _encode_bodies(AXIS_POINTS, data["axis_points"])
+    return VEDIC.pack(
+        _index(AYANAMSA_TYPES, data["ayanamsa"]["type"]), data["ayanamsa"]["value"],
+        *_encode_position(data["ascendant"]),
+        planet_mask, *planets, axis_mask, *axis_points
+    )
+
+
+def _decode_bodies(vocab: List[str], mask: int, values: Tuple) -> Dict[str, Any]:
+    return {name: _decode_position(values[2 * i], values[2 * i + 1])
+            for i, name in enumerate(vocab) if mask >> i & 1}
+
+
+def _decode_vedic(buffer: bytes, offset: int) -> Dict[str, Any]:
+    fields = VEDIC.unpack_from(buffer, offset)
+    planets_end = 5 + 2 * len(PLANETS)
+    return {
+        "chart_type": "vedic_sidereal",
+        "ayanamsa": {"type": AYANAMSA_TYPES[fields[0]], "value": round(fields[1], 2)},
+        "ascendant": _decode_position(fields[2], fields[3]),
+        "planets": _decode_bodies(PLANETS, fields[4], fields[5:planets_end]),
+        "axis_points": _decode_bodies(AXIS_POINTS, fields[planets_end], fields[planets_end + 1:])
+    }
+
+
+# ==================== 记录布局 ====================
+
+# 部分名 → (布局, 编码, 解码)；顺序即标志位与定长部分中的槽位顺序
+SECTIONS: Dict[str, Tuple[struct.Struct, Callable, Callable]] = {
+    "input": (INPUT, _encode_input, _decode_input),
+    "bazi": (BAZI, _encode_bazi, _decode_bazi),
+    "ziwei": (ZIWEI, _encode_ziwei, _decode_ziwei),
+    "vedic": (VEDIC, _encode_vedic, _decode_vedic),
+}
+
+SECTION_OFFSETS: Dict[str, int] = {}
+_offset = HEADER.size
+for _name, (_layout, _, _) in SECTIONS.items():
+    SECTION_OFFSETS[_name] = _offset
+    _offset += _layout.size
+RECORD_SIZE = _offset
+SECTION_FLAGS = {name: 1 << i for i, name in enumerate(SECTIONS)}
+
+
+def _canonical(value: Any) -> str:
+    """比较用的规范文本（区分键顺序与类型）"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _encode_section(name: str, value: Any) -> Optional[bytes]:
+    """编码一个部分；无法无损还原时返回 None"""
+    _, encode, decode = SECTIONS[name]
+    try:
+        encoded = encode(value)
+        if _canonical(decode(encoded, 0)) == _canonical(value):
+            return encoded
+    except Exception:
+        pass
+    return None
+
+
+def encode_chart(result: Dict[str, Any]) -> bytes:
+    """
+    编码一条排盘结果
+
+    Returns:
+        定长部分（RECORD_SIZE 字节）+ 附加部分
+    """
+    record = bytearray(RECORD_SIZE)
+    flags = 0
+    entries: List[Any] = []
+    for key, value in result.items():
+        encoded = _encode_section(key, value) if key in SECTIONS else None
+        if encoded is None:
+            entries.append([key, value])
+            continue
+        offset = SECTION_OFFSETS[key]
+        record[offset:offset + len(encoded)] = encoded
+        flags |= SECTION_FLAGS[key]
+        entries.append(key)
+
+    # 附加部分：顶层键顺序 + 未编码的部分；只含按默认顺序排列的已编码部分时为空
+    residual = b""
+    if entries != [name for name in SECTIONS if flags & SECTION_FLAGS[name]]:
+        residual = dumps(entries, compact=True)
+        if len(residual) > RESIDUAL_COMPRESS_MIN:
+            compressed = zlib.compress(residual)
+            if len(compressed) < len(residual):
+                residual = compressed
+                flags |= FLAG_RESIDUAL_ZLIB
+
+    HEADER.pack_into(record, 0, RECORD_MAGIC, CODEC_VERSION, flags, len(residual))
+    return bytes(record) + residual
+
+
+class ChartRecord:
+    """
+    编码记录的按需解码视图
+
+    record = ChartRecord(data)
+    record.pillars                         # 四柱，直接读固定偏移
+    record.get("bazi.enhanced_analysis")   # 只解码 bazi
+    record.get("ziwei.chart.palaces.命宫")  # 只解码紫微的 chart
+    record.to_dict()                       # 完整还原
+    """
+
+    def __init__(self, data: bytes):
+        if len(data) < RECORD_SIZE:
+            raise ValueError(f"记录长度不足: {len(data)} < {RECORD_SIZE}")
+        magic, version, flags, residual_size = HEADER.unpack_from(data, 0)
+        if magic != RECORD_MAGIC:
+            raise ValueError("不是排盘结果编码记录")
+        if version != CODEC_VERSION:
+            raise ValueError(f"不支持的编码版本: {version}（当前 {CODEC_VERSION}）")
+        if len(data) != RECORD_SIZE + residual_size:
+            raise ValueError("记录长度与附加部分长度不符")
+        self.data = data
+        self.flags = flags
+        self._entries: Optional[List[Any]] = None
+        self._sections: Dict[str, Any] = {}
+        self._ziwei_fields: Optional[Dict[str, Any]] = None
+
+    def _layout_entries(self) -> List[Any]:
+        """顶层键顺序（只在需要时解析附加部分）"""
+        if self._entries is None:
+            residual = self.data[RECORD_SIZE:]
+            if not residual:
+                self._entries = [name for name in SECTIONS if self.flags & SECTION_FLAGS[name]]
+            else:
+                if self.flags & FLAG_RESIDUAL_ZLIB:
+                    residual = zlib.decompress(residual)
+                self._entries = json.loads(residual)
+        return self._entries
+
+    def keys(self) -> List[str]:
+        """顶层键（按原顺序）"""
+        return [entry if isinstance(entry, str) else entry[0] for entry in self._layout_entries()]
+
+    def has(self, name: str) -> bool:
+        """是否包含某个顶层字段"""
+        if name in SECTIONS and self.flags & SECTION_FLAGS[name]:
+            return True
+        return name in self.keys()
+
+    def section(self, name: str) -> Any:
+        """解码一个顶层字段（缓存）"""
+        if name not in self._sections:
+            if name in SECTIONS and self.flags & SECTION_FLAGS[name]:
+                self._sections[name] = SECTIONS[name][2](self.data, SECTION_OFFSETS[name])
+            else:
+                for entry in self._layout_entries():
+                    if not isinstance(entry, str) and entry[0] == name:
+                        self._sections[name] = entry[1]
+                        break
+                else:
+                    raise KeyError(name)
+        return self._sections[name]
+
+    def _ziwei_part(self, part: str) -> Any:
+        """紫微的一个子项（只解码该子项）"""
+        if self._ziwei_fields is None:
+            self._ziwei_fields = _unpack_ziwei(self.data, SECTION_OFFSETS["ziwei"])
+        return ZIWEI_DECODERS[part](self._ziwei_fields)
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """按点号路径读取字段（如 bazi.day_pillar、vedic.planets.Sun.lon），不存在时返回 default"""
+        keys = path.split(".")
+        try:
+            if (len(keys) > 1 and keys[0] == "ziwei" and "ziwei" not in self._sections
+                    and self.flags & SECTION_FLAGS["ziwei"] and keys[1] in ZIWEI_DECODERS):
+                value = self._ziwei_part(keys[1])
+                keys = keys[2:]
+            else:
+                value = self.section(keys[0])
+                keys = keys[1:]
+            for key in keys:
+                value = value[int(key)] if isinstance(value, list) else value[key]
+            return value
+        except (KeyError, IndexError, ValueError, TypeError):
+            return default
+
+    @property
+    def pillars(self) -> Optional[List[str]]:
+        """八字四柱（直接读固定偏移，不解码其他字段）；八字未编码时从附加部分读取"""
+        if self.flags & SECTION_FLAGS["bazi"]:
+            offset = SECTION_OFFSETS["bazi"]
+            return [_pillar_name(code) for code in self.data[offset:offset + 4]]
+        bazi = self.get("bazi")
+        if not isinstance(bazi, dict) or "error" in bazi:
+            return None
+        return [bazi.get(key) for key in PILLAR_KEYS]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """完整还原为排盘结果"""
+        return {key: self.section(key) for key in self.keys()}
+
+
+def decode_chart(data: bytes) -> Dict[str, Any]:
+    """解码一条记录为排盘结果（与编码前完全一致）"""
+    return ChartRecord(data).to_dict()
+
+
+def write_records(stream: BinaryIO, results: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    逐条编码写入记录流（每条前加4字节长度）
+
+    Returns:
+        {"records": 条数, "bytes": 写出字节数, "residual_records": 含附加部分的条数}
+    """
+    stats = {"records": 0, "bytes": 0, "residual_records": 0}
+    for result in results:
+        data = encode_chart(result)
+        stream.write(LENGTH_PREFIX.pack(len(data)))
+        stream.write(data)
+        stats["records"] += 1
+        stats["bytes"] += LENGTH_PREFIX.size + len(data)
+        if len(data) > RECORD_SIZE:
+            stats["residual_records"] += 1
+    return stats
+
+
+def iter_records(stream: BinaryIO) -> Iterator[ChartRecord]:
+    """逐条读取记录流"""
+    while True:
+        prefix = stream.read(LENGTH_PREFIX.size)
+        if not prefix:
+            return
+        if len(prefix) < LENGTH_PREFIX.size:
+            raise ValueError("记录流被截断")
+        size, = LENGTH_PREFIX.unpack(prefix)
+        data = stream.read(size)
+        if len(data) < size:
+            raise ValueError("记录流被截断")
+        yield ChartRecord(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="排盘结果二进制编码（JSONL ↔ 定长记录流）")
+    parser.add_argument("source", help="输入文件：编码时为批量排盘输出的JSONL，--decode 时为记录流")
+    parser.add_argument("--output", "-o", help="输出文件（编码时必需；解码默认输出到标准输出）")
+    parser.add_argument("--decode", action="store_true", help="把记录流解码为JSONL")
+
+    args = parser.parse_args()
+
+    if args.decode:
+        from serialization import JsonLinesWriter
+        out_stream = open(args.output, "wb") if args.output else sys.stdout
+        try:
+            writer = JsonLinesWriter(out_stream)
+            with open(args.source, "rb") as f:
+                for record in iter_records(f):
+                    writer.write(record.to_dict())
+        finally:
+            if args.output:
+                out_stream.close()
+        print(f"✅ 解码完成: {writer.records} 条", file=sys.stderr)
+        return
+
+    if not args.output:
+        parser.error("编码时需要指定 --output")
+
+    json_bytes = 0
+
+    def read_results():
+        nonlocal json_bytes
+        with open(args.source, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    json_bytes += len(line.encode("utf-8"))
+                    yield json.loads(line)
+
+    with open(args.output, "wb") as out_stream:
+        stats = write_records(out_stream, read_results())
+    ratio = stats["bytes"] / json_bytes if json_bytes else 0.0
+    print(f"✅ 编码完成: {stats['records']} 条, {json_bytes} → {stats['bytes']} 字节 ({ratio:.1%}), "
+          f"定长部分 {RECORD_SIZE} 字节/条, 含附加部分 {stats['residual_records']} 条", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+批量排盘结果的列式导出
+把逐条的排盘结果按列写入 NumPy（.npz 或 .npy 目录）或 Parquet（需要 pyarrow），供统计分析直接读取，
+不必逐个解析JSON：
+
+- 四柱：int8，六十甲子序（甲子=0，天干 = 值 % 10，地支 = 值 % 12），缺失为 -1
+- 五行统计：uint8 矩阵（N×5，木火土金水）；十神统计：uint8 矩阵（N×10，顺序见 chart_codec.TEN_GODS）
+- 紫微各宫星曜：位集矩阵（N×12，按宫名 命宫…父母 排列），主星、辅星 uint16，杂曜 uint64，
+  第 i 位对应 chart_codec 中 MAJOR_STARS / MINOR_STARS / ADJECTIVE_STARS 的第 i 颗星
+- 印度星盘：上升星座 int8，各行星星座、宫位 int8 矩阵与度数 float32 矩阵（N×12，顺序见 chart_codec.PLANETS）
+- status：位标志，1=八字有效，2=紫微有效，4=印度星盘有效，8=该行出错
+
+.npy 目录（每列一个文件）与 Parquet 逐块写出，内存只保留一块，适合上千万条的批次；.npy 目录可用 load_columns
+内存映射读取，Parquet 中矩阵列按"列名_标签"展开为多列。.npz 是 zip 包，既不能逐块追加也不能内存映射，
+整批结果在 close 时才合并写出，只适合内存放得下的小批次。
+
+用法示例：
+python triple_chart_parser.py --batch-input births.jsonl --batch-columnar charts.npz
+python triple_chart_parser.py --batch-input births.jsonl --batch-columnar charts_columns/ --batch-output charts.jsonl
+"""
+
+import importlib.util
+import os
+import struct
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from bazi_enhanced_analyzer import GANZHI_NAMES
+from chart_codec import (
+    STEMS, BRANCHES, FIVE_ELEMENTS, BODY_STRENGTHS, TEN_GODS, PILLAR_KEYS,
+    MAJOR_STARS, MINOR_STARS, ADJECTIVE_STARS, PALACE_NAMES, SIGNS, PLANETS, _bitset
+)
+
+COLUMNAR_FORMATS = ["npz", "npy", "parquet"]
+
+STATUS_BAZI = 1
+STATUS_ZIWEI = 2
+STATUS_VEDIC = 4
+STATUS_ERROR = 8
+
+# 数值列：列名 → (类型, 矩阵列的标签（单列为 None）, 缺失值)
+NUMERIC_COLUMNS: Dict[str, Tuple[Any, Optional[List[str]], Any]] = {
+    "batch_index": (np.int64, None, -1),
+    "status": (np.uint8, None, 0),
+    "gender": (np.int8, None, -1),
+    "timezone": (np.float32, None, np.nan),
+    "longitude": (np.float64, None, np.nan),
+    "latitude": (np.float64, None, np.nan),
+    "year_pillar": (np.int8, None, -1),
+    "month_pillar": (np.int8, None, -1),
+    "day_pillar": (np.int8, None, -1),
+    "hour_pillar": (np.int8, None, -1),
+    "body_strength": (np.int8, None, -1),
+    "five_elements": (np.uint8, FIVE_ELEMENTS, 0),
+    "ten_gods": (np.uint8, TEN_GODS, 0),
+    "ziwei_body_palace": (np.int8, None, -1),
+    "ziwei_major": (np.uint16, PALACE_NAMES, 0),
+    "ziwei_minor": (np.uint16, PALACE_NAMES, 0),
+    "ziwei_adjective": (np.uint64, PALACE_NAMES, 0),
+    "vedic_ascendant_sign": (np.int8, None, -1),
+    "vedic_sign": (np.int8, PLANETS, -1),
+    "vedic_house": (np.int8, PLANETS, -1),
+    "vedic_lon": (np.float32, PLANETS, np.nan),
+}
+
+# 文本列
+STRING_COLUMNS = ["id", "birth_date", "birth_time"]
+
+
+def detect_columnar_format(path: str) -> str:
+    """按扩展名判断列式格式：.npz、.parquet，其他路径视为 .npy 目录"""
+    lower = path.lower()
+    if lower.endswith(".npz"):
+        return "npz"
+    if lower.endswith(".parquet"):
+        return "parquet"
+    return "npy"
+
+
+def ganzhi_index(pillar: str) -> int:
+    """干支 → 六十甲子序"""
+    stem, branch = STEMS.index(pillar[0]), BRANCHES.index(pillar[1])
+    return (6 * stem - 5 * branch) % 60
+
+
+def _valid(section: Any) -> bool:
+    return isinstance(section, dict) and "error" not in section
+
+
+class _NpyAppender:
+    """
+    逐块追加的 .npy 文件
+
+    先写出行数为0的文件头，之后每块直接追加原始数据，close 时按实际行数改写文件头。
+    文件头补齐到固定长度，改写时数据区位置不变
+    """
+
+    HEADER_SIZE = 128
+
+    def __init__(self, path: str, dtype: Any, row_shape: Tuple[int, ...] = ()):
+        self.dtype = np.dtype(dtype)
+        self.row_shape = row_shape
+        self.rows = 0
+        self._file = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        header = repr({
+            "descr": np.lib.format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": (self.rows,) + tuple(self.row_shape),
+        }).encode("latin1")
+        header += b" " * (self.HEADER_SIZE - 10 - len(header) - 1) + b"\n"
+        self._file.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header)
+
+    def append(self, values: np.ndarray):
+        self._file.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+        self.rows += len(values)
+
+    def close(self):
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+
+
+class ColumnarWriter:
+    """
+    逐条接收排盘结果，按块（chunk_rows 行）填入列数组
+
+    .npy 目录每块追加到各列文件，Parquet 每块写出一个 row group，内存都只保留一块；
+    .npz 无法追加，所有块保留在内存中，close 时合并写出
+    """
+
+    def __init__(self, path: str, chunk_rows: int = 65536):
+        self.path = path
+        self.format = detect_columnar_format(path)
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._chunks: List[Dict[str, Any]] = []
+        self._parquet_writer = None
+        self._npy_files: Dict[str, _NpyAppender] = {}
+        self._string_parts: Dict[str, List[str]] = {name: [] for name in STRING_COLUMNS}
+        if self.format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            raise ValueError("写出 Parquet 需要安装 pyarrow（pip install pyarrow），或改用 .npz / .npy 目录")
+        if self.format == "npy":
+            os.makedirs(self.path, exist_ok=True)
+            for name, (dtype, labels, _) in NUMERIC_COLUMNS.items():
+                row_shape = (len(labels),) if labels else ()
+                self._npy_files[name] = _NpyAppender(os.path.join(self.path, f"{name}.npy"), dtype, row_shape)
+        self._new_chunk()
+
+    def _new_chunk(self):
+        self._chunk: Dict[str, Any] = {}
+        for name, (dtype, labels, missing) in NUMERIC_COLUMNS.items():
+            shape = (self.chunk_rows, len(labels)) if labels else (self.chunk_rows,)
+            self._chunk[name] = np.full(shape, missing, dtype=dtype)
+        for name in STRING_COLUMNS:
+            self._chunk[name] = []
+        self._chunk_size = 0
+
+    def write(self, result: Dict[str, Any]):
+        """写入一条排盘结果（批量模式的一行，出错行只记录 batch_index、id 与 status）"""
+        columns = self._chunk
+        row = self._chunk_size
+        status = 0
+
+        columns["batch_index"][row] = result.get("batch_index", self.rows)
+        columns["id"].append(str(result.get("id", "")))
+        birth = result.get("input") or {}
+        columns["birth_date"].append(str(birth.get("birth_date", "")))
+        columns["birth_time"].append(str(birth.get("birth_time", "")))
+        if "error" in result:
+            status |= STATUS_ERROR
+        else:
+            self._write_input(row, birth)
+            if self._write_bazi(row, result.get("bazi")):
+                status |= STATUS_BAZI
+            if self._write_ziwei(row, result.get("ziwei")):
+                status |= STATUS_ZIWEI
+            if self._write_vedic(row, result.get("vedic")):
+                status |= STATUS_VEDIC
+        columns["status"][row] = status
+
+        self._chunk_size += 1
+        self.rows += 1
+        if self._chunk_size == self.chunk_rows:
+            self._flush()
+
+    def _assign(self, row: int, values: Dict[str, Any]) -> bool:
+        """一行的若干列先全部换成列类型，都成功后才写入；任何一项不合法则这些列保持缺失值"""
+        converted = {}
+        try:
+            for name, value in values.items():
+                column = self._chunk[name]
+                converted[name] = np.asarray(value, dtype=column.dtype)
+                if converted[name].shape != column.shape[1:]:
+                    raise ValueError(f"{name} 长度不符")
+        except (TypeError, ValueError, OverflowError):
+            return False
+        for name, value in converted.items():
+            self._chunk[name][row] = value
+        return True
+
+    def _write_input(self, row: int, birth: Dict[str, Any]):
+        for name in ("gender", "timezone", "longitude", "latitude"):
+            try:
+                value = float(birth[name]) if name == "timezone" else birth[name]
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._assign(row, {name: value})
+
+    def _write_bazi(self, row: int, bazi: Any) -> bool:
+        if not _valid(bazi):
+            return False
+        try:
+            values = {key: ganzhi_index(bazi[key]) for key in PILLAR_KEYS}
+            values["five_elements"] = [bazi["five_elements_count"].get(e, 0) for e in FIVE_ELEMENTS]
+            values["body_strength"] = BODY_STRENGTHS.index(bazi["body_strength"])
+            ten_gods = bazi.get("enhanced_analysis", {}).get("十神统计", {})
+            values["ten_gods"] = [ten_gods.get(god, 0) for god in TEN_GODS]
+        except (KeyError, TypeError, ValueError, IndexError, AttributeError):
+            return False
+        return self._assign(row, values)
+
+    def _write_ziwei(self, row: int, ziwei: Any) -> bool:
+        if not _valid(ziwei):
+            return False
+        major, minor, adjective = [0] * len(PALACE_NAMES), [0] * len(PALACE_NAMES), [0] * len(PALACE_NAMES)
+        body_palace = -1
+        try:
+            for name, palace in ziwei["chart"]["palaces"].items():
+                slot = PALACE_NAMES.index(name)
+                major[slot] = _bitset(MAJOR_STARS, [s["name"] for s in palace["major_stars"]])
+                minor[slot] = _bitset(MINOR_STARS, palace["minor_stars"])
+                adjective[slot] = _bitset(ADJECTIVE_STARS, palace["adjective_stars"])
+                if palace.get("is_body_palace"):
+                    body_palace = slot
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return False
+        return self._assign(row, {
+            "ziwei_major": major, "ziwei_minor": minor, "ziwei_adjective": adjective,
+            "ziwei_body_palace": body_palace,
+        })
+
+    def _write_vedic(self, row: int, vedic: Any) -> bool:
+        if not _valid(vedic):
+            return False
+        signs, houses, lons = [-1] * len(PLANETS), [-1] * len(PLANETS), [np.nan] * len(PLANETS)
+        try:
+            ascendant = SIGNS.index(vedic["ascendant"]["sign"])
+            for name, position in vedic.get("planets", {}).items():
+                if name in PLANETS:
+                    slot = PLANETS.index(name)
+                    signs[slot] = SIGNS.index(position["sign"])
+                    houses[slot] = position["house"]
+                    lons[slot] = position["lon"]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return False
+        return self._assign(row, {
+            "vedic_ascendant_sign": ascendant, "vedic_sign": signs, "vedic_house": houses, "vedic_lon": lons,
+        })
+
+    def _flush(self):
+        """当前块截到实际行数后写出（.npz 暂存到 close）"""
+        if self._chunk_size == 0:
+            return
+        size = self._chunk_size
+        chunk = {name: values[:size] for name, values in self._chunk.items() if name not in STRING_COLUMNS}
+        for name in STRING_COLUMNS:
+            chunk[name] = np.array(self._chunk[name], dtype=str)
+
+        if self.format == "parquet":
+            self._write_parquet(chunk)
+        elif self.format == "npy":
+            self._append_npy(chunk)
+        else:
+            self._chunks.append(chunk)
+        self._new_chunk()
+
+    def _append_npy(self, chunk: Dict[str, np.ndarray]):
+        """数值列直接追加；文本列的宽度要到最后才知道，每块先存成临时文件，close 时合并"""
+        for name, appender in self._npy_files.items():
+            appender.append(chunk[name])
+        for name, parts in self._string_parts.items():
+            part_path = os.path.join(self.path, f"{name}.part{len(parts)}")
+            with open(part_path, "wb") as f:
+                np.save(f, chunk[name])
+            parts.append(part_path)
+
+    def _close_npy(self):
+        for appender in self._npy_files.values():
+            appender.close()
+        for name, parts in self._string_parts.items():
+            # 只读文件头取各块宽度（内存映射不读入数据）
+            width = max((np.load(part_path, mmap_mode="r").dtype.itemsize // 4 for part_path in parts), default=1)
+            appender = _NpyAppender(os.path.join(self.path, f"{name}.npy"), f"<U{width}")
+            for part_path in parts:
+                appender.append(np.load(part_path))
+                os.remove(part_path)
+            appender.close()
+
+    def _write_parquet(self, chunk: Dict[str, np.ndarray]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrays = {}
+        for name, values in chunk.items():
+            labels = NUMERIC_COLUMNS[name][1] if name in NUMERIC_COLUMNS else None
+            if labels:
+                for i, label in enumerate(labels):
+                    arrays[f"{name}_{label}"] = pa.array(values[:, i])
+            else:
+                arrays[name] = pa.array(values)
+        table = pa.table(arrays)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def close(self) -> int:
+        """写出剩余数据并关闭，返回总行数"""
+        self._flush()
+        if self.format == "parquet":
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+            return self.rows
+        if self.format == "npy":
+            self._close_npy()
+            return self.rows
+
+        columns = {}
+        for name in list(NUMERIC_COLUMNS) + STRING_COLUMNS:
+            parts = [chunk[name] for chunk in self._chunks]
+            if parts:
+                columns[name] = np.concatenate(parts)
+            elif name in NUMERIC_COLUMNS:
+                dtype, labels, _ = NUMERIC_COLUMNS[name]
+                columns[name] = np.empty((0, len(labels)) if labels else (0,), dtype=dtype)
+            else:
+                columns[name] = np.empty(0, dtype=str)
+        self._chunks = []
+
+        np.savez(self.path, **columns)
+        return self.rows
+
+
+def load_columns(path: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """
+    读取列式导出
+
+    Args:
+        path: .npz 文件、.parquet 文件或 .npy 目录
+        mmap: .npy 目录时以内存映射方式读取（只读），统计时不把整列读入内存
+
+    Returns:
+        {列名: 数组}，矩阵列为二维数组（Parquet 展开的多列会重新合并）
+    """
+    fmt = detect_columnar_format(path)
+    if fmt == "npz":
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    if fmt == "npy":
+        return {
+            file_name[:-4]: np.load(os.path.join(path, file_name), mmap_mode="r" if mmap else None)
+            for file_name in sorted(os.listdir(path)) if file_name.endswith(".npy")
+        }
+
+    import pyarrow.parquet as pq
+    table = pq.read_table(path, memory_map=mmap)
+    columns = {}
+    for name in list(NUMERIC_COLUMNS) + STRING_COLUMNS:
+        labels = NUMERIC_COLUMNS[name][1] if name in NUMERIC_COLUMNS else None
+        if labels:
+            columns[name] = np.column_stack([table.column(f"{name}_{label}").to_numpy() for label in labels])
+        elif name in table.column_names:
+            columns[name] = table.column(name).to_numpy()
+    return columns
+
+
+def ganzhi_labels() -> List[str]:
+    """六十甲子序对应的干支（四柱列的取值标签）"""
+    return list(GANZHI_NAMES)
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+排盘HTTP服务
+基于 asyncio 的本地 HTTP/JSON 服务（仅用标准库；安装了 orjson 时用它编码响应），排盘在常驻的工作进程池中完成：
+每个工作进程启动时加载一次排盘库、规则表和紫微星盘缓存，之后所有请求复用，不再逐次启动子进程
+
+接口（POST，请求体为一条出生信息对象，或对象数组表示批量）：
+- /chart   三种命理系统
+- /bazi    八字
+- /ziwei   紫微斗数
+- /vedic   印度星盘
+- GET /health  服务状态与缓存统计
+
+出生信息字段同批量模式（birth_date, birth_time, timezone, longitude, latitude, gender，可选 id）；
+返回结构与 generate_output 相同（单系统接口只含对应系统），批量请求按输入顺序返回数组。
+相同输入的结果保存在主进程的LRU缓存中（键含八字规则表版本，规则表更新后旧结果不再命中），命中时不经过工作进程
+
+用法示例：
+python chart_server.py --port 8765 --workers 4
+curl -X POST http://127.0.0.1:8765/bazi -d '{"birth_date": "2000-01-01", "birth_time": "10:00", "timezone": "+8", "longitude": 116.4, "latitude": 39.9, "gender": 1}'
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple
+
+from ayanamsa import AYANAMSA_SYSTEMS, DEFAULT_SYSTEM as DEFAULT_AYANAMSA
+from batch_chart_runner import normalize_birth_record, create_worker_pool, compute_chunk, worker_ready
+from rule_registry import get_rule_registry
+from serialization import dumps
+
+# 接口 → 计算的命理系统
+ENDPOINTS = {
+    "/chart": ("bazi", "ziwei", "vedic"),
+    "/bazi": ("bazi",),
+    "/ziwei": ("ziwei",),
+    "/vedic": ("vedic",),
+}
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                500: "Internal Server Error"}
+
+# 请求体大小上限（字节）
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+class ChartService:
+    """排盘服务：工作进程池 + 结果LRU缓存"""
+
+    def __init__(self, workers: int = 2, cache_size: int = 10000,
+                 worker_config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            workers: 工作进程数
+            cache_size: 结果缓存容量（条），0 表示不缓存
+            worker_config: 工作进程配置（见 batch_chart_runner._init_worker）
+        """
+        self.workers = workers
+        self.cache_size = cache_size
+        self.worker_config = worker_config
+        self.executor = create_worker_pool(workers, worker_config)
+
+        self._cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    async def warm_up(self):
+        """启动全部工作进程并完成初始化，避免首个请求承担导入开销"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, worker_ready) for _ in range(self.workers)))
+
+    def close(self):
+        """关闭工作进程池"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def _rebuild_pool(self, broken):
+        """工作进程异常退出（或初始化失败）后进程池不可再用，重建进程池；并发请求只重建一次"""
+        if self.executor is not broken:
+            return
+        print("⚠️ 工作进程池已损坏，正在重建", file=sys.stderr)
+        broken.shutdown(wait=True, cancel_futures=True)
+        # 此时仍有客户端连接打开，直接 fork 的工作进程会继承这些套接字，服务端关闭连接后客户端收不到EOF；
+        # 支持时改由 forkserver 启动新的工作进程
+        context = None
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        self.executor = create_worker_pool(self.workers, self.worker_config, context)
+
+    # ==================== 计算与缓存 ====================
+
+    @staticmethod
+    def _cache_key(rule_version: str, systems: Tuple[str, ...], record: Any) -> Optional[Tuple]:
+        """规则表版本 + 系统 + 规范化后的出生信息；记录无效时返回 None（交给工作进程生成错误结果）"""
+        try:
+            return (rule_version, systems) + tuple(normalize_birth_record(record).values())
+        except Exception:
+            return None
+
+    @staticmethod
+    def _with_id(result: Dict[str, Any], record: Any) -> Dict[str, Any]:
+        """按请求记录补回 id 字段"""
+        if isinstance(record, dict) and record.get("id") not in (None, ""):
+            return {"id": record["id"], **result}
+        return result
+
+    async def compute(self, systems: Tuple[str, ...], records: List[Any]) -> List[Dict[str, Any]]:
+        """计算一批记录：先查缓存，未命中的记录分块交给工作进程"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+        pending = []
+        # 工作进程按文件内容热加载规则表，主进程取同一文件的版本号
+        rule_version = get_rule_registry().version if self.cache_size > 0 else ""
+
+        for position, record in enumerate(records):
+            key = self._cache_key(rule_version, systems, record) if self.cache_size > 0 else None
+            cached = self._cache.get(key) if key is not None else None
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                results[position] = self._with_id(cached, record)
+            else:
+                self.misses += 1
+                pending.append((position, record, key))
+
+        if pending:
+            loop = asyncio.get_running_loop()
+            executor = self.executor
+            chunk_size = -(-len(pending) // self.workers)
+            chunks = [pending[start:start + chunk_size] for start in range(0, len(pending), chunk_size)]
+            try:
+                chunk_results = await asyncio.gather(*(
+                    loop.run_in_executor(executor, compute_chunk,
+                                         [(position, record) for position, record, _ in chunk], list(systems))
+                    for chunk in chunks
+                ))
+            except BrokenProcessPool:
+                self._rebuild_pool(executor)
+                raise
+
+            for chunk, computed in zip(chunks, chunk_results):
+                for (position, record, key), result in zip(chunk, computed):
+                    result.pop("batch_index", None)
+                    result.pop("id", None)
+                    if key is not None and self._cacheable(result, systems):
+                        self._cache_put(key, result)
+                    results[position] = self._with_id(result, record)
+
+        return results
+
+    @staticmethod
+    def _cacheable(result: Dict[str, Any], systems: Tuple[str, ...]) -> bool:
+        """整行和所请求的各系统都没有 error 才缓存（缺库、临时故障的结果不应在缓存里一直返回）"""
+        if "error" in result:
+            return False
+        return not any(isinstance(result.get(name), dict) and "error" in result[name] for name in systems)
+
+    def _cache_put(self, key: Tuple, result: Dict[str, Any]):
+        """写入结果缓存，超出容量时淘汰最久未使用的条目"""
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """服务状态"""
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "requests": self.requests,
+            "cache": {
+                "size": len(self._cache),
+                "maxsize": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+        }
+
+    # ==================== HTTP ====================
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """处理一个请求，返回 (状态码, JSON数据)"""
+        self.requests += 1
+        path = path.split("?", 1)[0]
+
+        if path == "/health":
+            return 200, self.stats()
+
+        systems = ENDPOINTS.get(path)
+        if systems is None:
+            return 404, {"error": f"未知接口: {path}"}
+        if method != "POST":
+            return 405, {"error": f"接口 {path} 仅支持POST"}
+
+        try:
+            payload = json.loads(body.decode("utf-8"))
+        except ValueError as e:
+            return 400, {"error": f"JSON解析错误: {e}"}
+
+        batch = isinstance(payload, list)
+        results = await self.compute(systems, payload if batch else [payload])
+        return 200, results if batch else results[0]
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接（支持HTTP/1.1 keep-alive）"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                keep_alive = False
+                try:
+                    # 请求行、请求头、请求体格式错误 → 400
+                    method, path, version = request_line.decode("latin-1").split()
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        name, _, value = line.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+
+                    length = int(headers.get("content-length", 0))
+                    if not 0 <= length <= MAX_BODY_SIZE:
+                        raise ValueError(f"请求体大小错误: {length}")
+                    body = await reader.readexactly(length)
+
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                except ValueError as e:
+                    status, payload = 400, {"error": f"请求格式错误: {e}"}
+                else:
+                    # 计算过程中的任何异常（如工作进程崩溃）→ 500，连接照常返回响应
+                    try:
+                        status, payload = await self.dispatch(method.upper(), path, body)
+                    except Exception as e:
+                        status, payload = 500, {"error": f"服务内部错误: {type(e).__name__}: {e}"}
+
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        """写出JSON响应"""
+        body = dumps(payload, compact=True)
+        header = (
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        )
+        writer.write(header.encode("latin-1") + body)
+
+
+async def serve(service: ChartService, host: str = "127.0.0.1", port: int = 8765):
+    """预热工作进程后启动HTTP服务，直到进程退出"""
+    await service.warm_up()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"✅ 排盘服务已启动: http://{host}:{port}（{service.workers} 个工作进程）", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="排盘HTTP服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址 (默认127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口 (默认8765)")
+    parser.add_argument("--workers", type=int, default=2, help="工作进程数 (默认2)")
+    parser.add_argument("--cache-size", type=int, default=10000, help="结果缓存容量，0 表示不缓存 (默认10000)")
+    parser.add_argument("--ziwei-cache-size", type=int, default=4096, help="紫微星盘内存缓存容量 (默认4096)")
+    parser.add_argument("--ziwei-cache-dir", help="紫微星盘磁盘缓存目录 (默认不使用)")
+    parser.add_argument("--ayanamsa", choices=list(AYANAMSA_SYSTEMS), default=DEFAULT_AYANAMSA,
+                        help=f"印度星盘 ayanamsa 系统 (默认{DEFAULT_AYANAMSA})")
+
+    args = parser.parse_args()
+
+    if args.workers < 1 or args.cache_size < 0:
+        parser.error("--workers 必须为正整数，--cache-size 不能为负数")
+
+    worker_config = {
+        "ziwei_cache_size": args.ziwei_cache_size,
+        "ziwei_cache_dir": args.ziwei_cache_dir,
+        "ayanamsa_system": args.ayanamsa
+    }
+    service = ChartService(args.workers, args.cache_size, worker_config)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        print("排盘服务已停止", file=sys.stderr)
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
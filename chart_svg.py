@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命理图表SVG渲染（不依赖 matplotlib）
+按 chart_visualizer 的同一套布局（坐标、字号、颜色）直接拼接SVG字符串，
+用于网页展示：单张图亚毫秒级生成，输出为几KB的文本，可无损缩放
+
+坐标约定与 chart_visualizer 相同：1个坐标单位 = 1英寸 = 72像素，字号（磅）即像素；
+文字框（身宫圆圈、中央信息框、Lagna框）的大小按字符数估算
+
+用法示例：
+python chart_visualizer.py 1_20000101_0000_北京_116.4_39.9.json --format svg
+"""
+
+from html import escape
+from typing import Dict, Any, List, Optional, Tuple
+
+from chart_visualizer import (
+    CHART_CANVAS, BAZI_PILLAR_NAMES, BAZI_PILLAR_POSITIONS,
+    ZIWEI_PALACE_POSITIONS, ZIWEI_PALACE_NAMES, VEDIC_HOUSE_POSITIONS, SIGN_CHINESE,
+    ziwei_palace_texts, ziwei_center_lines, vedic_house_layout
+)
+
+# 每个坐标单位（英寸）的像素数
+SCALE = 72.0
+
+# 画布四周的边距（坐标单位），与 savefig 的 bbox_inches='tight' 默认边距一致
+PAD = 0.1
+
+# 行高（字号的倍数，与 matplotlib 默认一致）
+LINE_SPACING = 1.2
+
+FONT_FAMILY = "SimHei, 'Microsoft YaHei', 'DejaVu Sans', sans-serif"
+
+
+def _text_width(text: str, size: float) -> float:
+    """估算单行文字宽度（像素）：中日韩字符按1个字号宽，其余按0.6个"""
+    return sum(size if ord(char) >= 0x2E80 else size * 0.6 for char in text)
+
+
+class SvgCanvas:
+    """以数据坐标绘图的SVG画布"""
+
+    def __init__(self, xlim: Tuple[float, float], ylim: Tuple[float, float]):
+        self.x0, self.x1 = xlim
+        self.y0, self.y1 = ylim
+        self.width = (self.x1 - self.x0 + 2 * PAD) * SCALE
+        self.height = (self.y1 - self.y0 + 2 * PAD) * SCALE
+        self.parts: List[str] = []
+
+    def _x(self, x: float) -> float:
+        return (x - self.x0 + PAD) * SCALE
+
+    def _y(self, y: float) -> float:
+        return (self.y1 - y + PAD) * SCALE
+
+    def rect(self, x: float, y: float, width: float, height: float, fill: str,
+             stroke: str = "black", linewidth: float = 1.0):
+        """矩形，(x, y) 为左下角"""
+        self.parts.append(
+            f'<rect x="{self._x(x):.1f}" y="{self._y(y + height):.1f}" width="{width * SCALE:.1f}" '
+            f'height="{height * SCALE:.1f}" fill="{fill}" stroke="{stroke}" stroke-width="{linewidth:.1f}"/>'
+        )
+
+    def line(self, xs: List[float], ys: List[float], linewidth: float = 1.0):
+        """黑色折线"""
+        points = " ".join(f"{self._x(x):.1f},{self._y(y):.1f}" for x, y in zip(xs, ys))
+        self.parts.append(f'<polyline points="{points}" fill="none" stroke="black" stroke-width="{linewidth:.1f}"/>')
+
+    def text(self, x: float, y: float, text: str, size: float, ha: str = "left", va: str = "baseline",
+             bold: bool = False, color: str = "black", italic: bool = False,
+             box: Optional[Dict[str, Any]] = None):
+        """
+        文字（支持换行）
+
+        Args:
+            ha: left / center
+            va: baseline / center
+            box: 文字框 {"style": "round" / "circle", "pad": 边距（字号的倍数）, "facecolor", "alpha"}
+        """
+        lines = text.split("\n")
+        line_height = size * LINE_SPACING
+        cx, cy = self._x(x), self._y(y)
+
+        if box is not None:
+            pad = box["pad"] * size
+            half_w = max(_text_width(line, size) for line in lines) / 2 + pad
+            half_h = len(lines) * line_height / 2 + pad
+            style = f'fill="{box["facecolor"]}" stroke="black" stroke-width="1.0"'
+            if box.get("alpha", 1.0) != 1.0:
+                style += f' fill-opacity="{box["alpha"]}"'
+            if box["style"] == "circle":
+                self.parts.append(f'<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{max(half_w, half_h):.1f}" {style}/>')
+            else:
+                self.parts.append(
+                    f'<rect x="{cx - half_w:.1f}" y="{cy - half_h:.1f}" width="{2 * half_w:.1f}" '
+                    f'height="{2 * half_h:.1f}" rx="{pad:.1f}" {style}/>'
+                )
+
+        attrs = f'font-size="{size:g}" fill="{color}"'
+        if ha == "center":
+            attrs += ' text-anchor="middle"'
+        if bold:
+            attrs += ' font-weight="bold"'
+        if italic:
+            attrs += ' font-style="italic"'
+
+        if va == "center":
+            attrs += ' dominant-baseline="central"'
+            first = cy - (len(lines) - 1) * line_height / 2
+        else:
+            first = cy
+        if len(lines) == 1:
+            self.parts.append(f'<text x="{cx:.1f}" y="{first:.1f}" {attrs}>{escape(text)}</text>')
+        else:
+            spans = "".join(
+                f'<tspan x="{cx:.1f}" y="{first + i * line_height:.1f}">{escape(line)}</tspan>'
+                for i, line in enumerate(lines)
+            )
+            self.parts.append(f'<text {attrs}>{spans}</text>')
+
+    def to_string(self) -> str:
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width:.0f}" height="{self.height:.0f}" '
+            f'viewBox="0 0 {self.width:.0f} {self.height:.0f}" font-family="{FONT_FAMILY}">'
+            f'<rect width="100%" height="100%" fill="white"/>'
+            + "".join(self.parts) + "</svg>"
+        )
+
+
+def _canvas(chart_type: str) -> SvgCanvas:
+    _, xlim, ylim, _ = CHART_CANVAS[chart_type]
+    return SvgCanvas(xlim, ylim)
+
+
+def render_bazi_svg(data: Dict[str, Any]) -> str:
+    """八字排盘图"""
+    svg = _canvas("bazi")
+
+    birth_info = data['input']
+    title = f"八字排盘图 - {birth_info['birth_date']} {birth_info['birth_time']} {birth_info.get('location', '')}"
+    svg.text(8, 9.5, title, 18, ha="center", va="center", bold=True)
+
+    bazi_data = data['bazi']
+    pillars = bazi_data.get('enhanced_analysis', {}).get('四柱详析', [])
+
+    for name, pos, pillar in zip(BAZI_PILLAR_NAMES, BAZI_PILLAR_POSITIONS, pillars):
+        svg.text(pos, 8.5, name, 14, ha="center", va="center", bold=True)
+
+        svg.rect(pos - 0.8, 7, 1.6, 0.8, "lightblue")
+        svg.text(pos, 7.4, pillar['天干'], 16, ha="center", va="center", bold=True,
+                 color="red" if name == '日柱' else "black")
+
+        svg.rect(pos - 0.8, 6, 1.6, 0.8, "lightgreen")
+        svg.text(pos, 6.4, pillar['地支'], 16, ha="center", va="center", bold=True)
+
+        svg.rect(pos - 0.8, 5, 1.6, 0.8, "lightyellow")
+        svg.text(pos, 5.4, pillar.get('主星', ''), 12, ha="center", va="center", bold=True)
+
+        svg.rect(pos - 0.8, 4, 1.6, 0.8, "lightcyan")
+        canggan = pillar.get('藏干', [])
+        if canggan:
+            svg.text(pos, 4.4, ' '.join(canggan), 10, ha="center", va="center")
+
+        nayin = pillar.get('纳音', '')
+        if nayin:
+            svg.text(pos, 3.5, nayin, 10, ha="center", va="center", italic=True)
+
+    # 图例
+    legend_y = 2.5
+    svg.text(1, legend_y, '图例:', 12, bold=True)
+    for i, (label, color) in enumerate([('天干', 'lightblue'), ('地支', 'lightgreen'),
+                                        ('十神', 'lightyellow'), ('藏干', 'lightcyan')]):
+        x_pos = 2.5 + i * 2.5
+        svg.rect(x_pos - 0.3, legend_y - 0.2, 0.6, 0.4, color)
+        svg.text(x_pos + 0.8, legend_y, label, 10, va="center")
+
+    wuxing_count = bazi_data.get('five_elements_count', {})
+    if wuxing_count:
+        svg.text(1, 1.5, '五行统计:', 12, bold=True)
+        svg.text(1, 1, ' '.join(f"{k}:{v}" for k, v in wuxing_count.items()), 11)
+
+    body_strength = bazi_data.get('body_strength', '')
+    if body_strength:
+        svg.text(1, 0.5, f'身强身弱: {body_strength}', 12, bold=True,
+                 color='red' if body_strength == '强' else 'blue')
+
+    return svg.to_string()
+
+
+def render_ziwei_svg(data: Dict[str, Any]) -> str:
+    """紫微斗数命盘图"""
+    svg = _canvas("ziwei")
+
+    birth_info = data['input']
+    svg.text(0, 5.5, f"紫微斗数命盘 - {birth_info['birth_date']} {birth_info['birth_time']}", 16,
+             ha="center", va="center", bold=True)
+
+    ziwei_data = data.get('ziwei', {})
+    palaces_data = ziwei_data.get('chart', {}).get('palaces', {})
+
+    for (x, y), name in zip(ZIWEI_PALACE_POSITIONS, ZIWEI_PALACE_NAMES):
+        svg.rect(x - 0.9, y - 0.9, 1.8, 1.8, "lightblue", linewidth=2)
+        svg.text(x, y + 0.7, name, 10, ha="center", va="center", bold=True)
+
+        texts = ziwei_palace_texts(palaces_data, name)
+        if texts is None:
+            continue
+        star_text, minor_text, is_body_palace = texts
+        if star_text:
+            svg.text(x, y + 0.2, star_text, 8, ha="center", va="center", bold=True, color="red")
+        if minor_text:
+            svg.text(x, y - 0.2, minor_text, 7, ha="center", va="center", color="blue")
+        if is_body_palace:
+            svg.text(x + 0.6, y + 0.6, '身', 8, ha="center", va="center", bold=True, color="green",
+                     box={"style": "circle", "pad": 0.1, "facecolor": "yellow"})
+
+    basic_info = ziwei_data.get('basic_info', {})
+    center_text = ziwei_center_lines(basic_info)
+    if center_text:
+        svg.text(0, 0, '\n'.join(center_text), 12, ha="center", va="center", bold=True,
+                 box={"style": "round", "pad": 0.3, "facecolor": "lightyellow"})
+
+    lunar_date = basic_info.get('lunar_date', '')
+    if lunar_date:
+        svg.text(0, -5.5, f"农历: {lunar_date}", 10, ha="center", va="center")
+
+    return svg.to_string()
+
+
+def render_vedic_svg(data: Dict[str, Any]) -> str:
+    """印度星盘图（北印度样式）"""
+    svg = _canvas("vedic")
+
+    birth_info = data['input']
+    svg.text(0, -4.5, f"D1 North India Chart - {birth_info['birth_date']} {birth_info['birth_time']}", 14,
+             ha="center", va="center", bold=True)
+
+    # 外框与分割线
+    size = 3
+    svg.line([-size, size, size, -size, -size], [size, size, -size, -size, size], linewidth=2)
+    for xs, ys in (([-size, size], [1, 1]), ([-size, size], [-1, -1]),
+                   ([-1, -1], [-size, size]), ([1, 1], [-size, size]),
+                   ([-size, -1], [size, 1]), ([1, size], [size, 1]),
+                   ([size, 1], [-size, -1]), ([-1, -size], [-size, -1])):
+        svg.line(xs, ys)
+
+    house_signs, house_planets = vedic_house_layout(data.get('vedic', {}))
+    for house_num in range(1, 13):
+        x, y = VEDIC_HOUSE_POSITIONS[house_num]
+        sign_name = house_signs[house_num]
+        svg.text(x, y + 0.3, SIGN_CHINESE.get(sign_name, sign_name), 9, ha="center", va="center", bold=True)
+
+        planets_in_house = house_planets[house_num]
+        if len(planets_in_house) == 1:
+            svg.text(x, y - 0.2, planets_in_house[0], 8, ha="center", va="center", color="blue")
+        elif len(planets_in_house) == 2:
+            svg.text(x, y - 0.1, planets_in_house[0], 7, ha="center", va="center", color="blue")
+            svg.text(x, y - 0.35, planets_in_house[1], 7, ha="center", va="center", color="blue")
+        elif planets_in_house:
+            for i, planet in enumerate(planets_in_house[:3]):
+                svg.text(x, y - 0.05 - i * 0.12, planet, 6, ha="center", va="center", color="blue")
+            if len(planets_in_house) > 3:
+                svg.text(x + 0.3, y - 0.3, f"+{len(planets_in_house) - 3}", 5, ha="center", va="center",
+                         color="red")
+
+    lagna_x, lagna_y = VEDIC_HOUSE_POSITIONS[1]
+    svg.text(lagna_x, lagna_y, "Lagna", 7, ha="center", va="center", bold=True, color="blue",
+             box={"style": "round", "pad": 0.1, "facecolor": "lightblue", "alpha": 0.8})
+
+    return svg.to_string()
+
+
+# 图表类型 → SVG渲染函数
+SVG_RENDERERS = {
+    "bazi": render_bazi_svg,
+    "ziwei": render_ziwei_svg,
+    "vedic": render_vedic_svg,
+}
+
+
+def render_svg(chart_type: str, data: Dict[str, Any]) -> str:
+    """渲染一张图为SVG字符串（chart_type: bazi / ziwei / vedic）"""
+    return SVG_RENDERERS[chart_type](data)
@@ -5,421 +5,648 @@
 支持八字排盘图、紫微斗数命盘图、印度星盘图的生成
 """
 
+import io
 import json
 import argparse
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import Circle, Rectangle, Polygon
-import numpy as np
 from pathlib import Path
 import sys
+from typing import Dict, Any, List, Optional
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+# matplotlib 在首次绘图时才导入
+_plt = None
+
+# 绘图后端：None 表示 matplotlib 默认后端；只保存文件时使用非交互的 "Agg"
+_backend = None
+
+# 支持的输出格式（matplotlib 按扩展名选择；svg 由 chart_svg 直接生成，不经过 matplotlib）
+IMAGE_FORMATS = ["png", "jpg", "pdf", "svg"]
+
+# 图表类型 → 文件名后缀（{原文件名}_{后缀}.{格式}）
+CHART_FILE_SUFFIXES = {"bazi": "八字排盘图", "ziwei": "紫微斗数命盘图", "vedic": "印度星盘图"}
+
+def use_backend(backend):
+    """指定绘图后端（须在首次绘图前调用才能避免加载交互式后端）"""
+    global _backend
+    _backend = backend
+    if _plt is not None:
+        _plt.switch_backend(backend)
+
+def _pyplot():
+    """导入 matplotlib.pyplot 并设置中文字体（只执行一次）"""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        if _backend is not None:
+            matplotlib.use(_backend)
+        import matplotlib.pyplot as plt
+        
+        # 设置中文字体
+        plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
+        plt.rcParams['axes.unicode_minus'] = False
+        _plt = plt
+    return _plt
+
+# 各图表的画布：(图幅英寸, x范围, y范围, 是否等比例)
+CHART_CANVAS = {
+    "bazi": ((16, 10), (0, 16), (0, 10), False),
+    "ziwei": ((12, 12), (-6, 6), (-6, 6), True),
+    "vedic": ((10, 10), (-5, 5), (-5, 5), True),
+}
+
+# 八字四柱
+BAZI_PILLAR_NAMES = ['年柱', '月柱', '日柱', '时柱']
+BAZI_PILLAR_POSITIONS = [2, 5, 8, 11]
+
+# 紫微12宫位置（从命宫开始，逆时针）与名称
+ZIWEI_PALACE_POSITIONS = [
+    (2, 2), (2, 0), (2, -2), (0, -2),    # 命宫、父母、福德、田宅
+    (-2, -2), (-2, 0), (-2, 2), (0, 2),  # 官禄、交友、迁移、疾厄
+    (4, 2), (4, 0), (4, -2), (0, 4)      # 财帛、子女、夫妻、兄弟
+]
+ZIWEI_PALACE_NAMES = [
+    '命宫', '父母', '福德', '田宅',
+    '官禄', '交友', '迁移', '疾厄', 
+    '财帛', '子女', '夫妻', '兄弟'
+]
+
+# 北印度样式12宫位置（按照您的图片布局）
+VEDIC_HOUSE_POSITIONS = {
+    1: (0, 2),          # 第1宫 - 上中（牡羊座）
+    2: (-2, 2),         # 第2宫 - 左上角（金牛座）
+    3: (-2, 0),         # 第3宫 - 左中（双子座）
+    4: (-2, -2),        # 第4宫 - 左下角（巨蟹座）
+    5: (0, -2),         # 第5宫 - 下中（狮子座）
+    6: (2, -2),         # 第6宫 - 右下角（处女座）
+    7: (2, 0),          # 第7宫 - 右中（天秤座）
+    8: (2, 2),          # 第8宫 - 右上角（天蝎座）
+    9: (-0.5, 0.5),     # 第9宫 - 中左上（射手座）
+    10: (-0.5, -0.5),   # 第10宫 - 中左下（摩羯座）
+    11: (0.5, -0.5),    # 第11宫 - 中右下（水瓶座）
+    12: (0.5, 0.5)      # 第12宫 - 中右上（双鱼座）
+}
+
+# 星座中文名称映射
+SIGN_CHINESE = {
+    'Aries': '白羊座', 'Taurus': '金牛座', 'Gemini': '双子座', 'Cancer': '巨蟹座',
+    'Leo': '狮子座', 'Virgo': '处女座', 'Libra': '天秤座', 'Scorpio': '天蝎座',
+    'Sagittarius': '射手座', 'Capricorn': '摩羯座', 'Aquarius': '水瓶座', 'Pisces': '双鱼座'
+}
+
+# 行星中文名称映射
+PLANET_CHINESE = {
+    'Sun': '日', 'Moon': '月', 'Mercury': '水', 'Venus': '金',
+    'Mars': '火', 'Jupiter': '木', 'Saturn': '土', 
+    'Rahu': 'Ra', 'Ketu': 'Ke', 'Uranus': '天', 'Neptune': '海', 'Pluto': '冥'
+}
+
+SIGNS_ORDER = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 
+               'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
+
+def _setup_axes(ax, chart_type):
+    """设置坐标范围并隐藏坐标轴"""
+    _, xlim, ylim, equal = CHART_CANVAS[chart_type]
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
+    ax.axis('off')
+    if equal:
+        ax.set_aspect('equal')
+
+# ==================== 八字排盘图 ====================
+
+def _draw_bazi_frame(ax, pillar_count=4):
+    """八字排盘图的静态部分：柱名、四柱格子、图例"""
+    from matplotlib.patches import Rectangle
+    
+    for name, pos in list(zip(BAZI_PILLAR_NAMES, BAZI_PILLAR_POSITIONS))[:pillar_count]:
+        # 柱名
+        ax.text(pos, 8.5, name, ha='center', va='center', fontsize=14, fontweight='bold')
+        
+        # 天干、地支、主星（十神）、藏干格子
+        ax.add_patch(Rectangle((pos-0.8, 7), 1.6, 0.8, facecolor='lightblue', edgecolor='black'))
+        ax.add_patch(Rectangle((pos-0.8, 6), 1.6, 0.8, facecolor='lightgreen', edgecolor='black'))
+        ax.add_patch(Rectangle((pos-0.8, 5), 1.6, 0.8, facecolor='lightyellow', edgecolor='black'))
+        ax.add_patch(Rectangle((pos-0.8, 4), 1.6, 0.8, facecolor='lightcyan', edgecolor='black'))
+    
+    # 图例
+    legend_y = 2.5
+    ax.text(1, legend_y, '图例:', fontsize=12, fontweight='bold')
+    
+    # 颜色图例
+    legend_items = [
+        ('天干', 'lightblue'),
+        ('地支', 'lightgreen'), 
+        ('十神', 'lightyellow'),
+        ('藏干', 'lightcyan')
+    ]
+    
+    for i, (label, color) in enumerate(legend_items):
+        x_pos = 2.5 + i * 2.5
+        ax.add_patch(Rectangle((x_pos-0.3, legend_y-0.2), 0.6, 0.4, facecolor=color, edgecolor='black'))
+        ax.text(x_pos+0.8, legend_y, label, ha='left', va='center', fontsize=10)
+
+def _draw_bazi_content(ax, data):
+    """八字排盘图的可变部分：标题、干支、十神、藏干、纳音、五行统计、身强身弱"""
+    # 标题
+    birth_info = data['input']
+    title = f"八字排盘图 - {birth_info['birth_date']} {birth_info['birth_time']} {birth_info.get('location', '')}"
+    ax.text(8, 9.5, title, ha='center', va='center', fontsize=18, fontweight='bold')
+    
+    # 四柱数据
+    bazi_data = data['bazi']
+    enhanced = bazi_data.get('enhanced_analysis', {})
+    pillars = enhanced.get('四柱详析', [])
+    
+    for name, pos, pillar in zip(BAZI_PILLAR_NAMES, BAZI_PILLAR_POSITIONS, pillars):
+        # 天干
+        color = 'red' if name == '日柱' else 'black'  # 日主高亮
+        ax.text(pos, 7.4, pillar['天干'], ha='center', va='center', fontsize=16, fontweight='bold', color=color)
+        
+        # 地支
+        ax.text(pos, 6.4, pillar['地支'], ha='center', va='center', fontsize=16, fontweight='bold')
+        
+        # 主星（十神）
+        ax.text(pos, 5.4, pillar.get('主星', ''), ha='center', va='center', fontsize=12, fontweight='bold')
+        
+        # 藏干
+        canggan = pillar.get('藏干', [])
+        if canggan:
+            ax.text(pos, 4.4, ' '.join(canggan), ha='center', va='center', fontsize=10)
+        
+        # 纳音
+        nayin = pillar.get('纳音', '')
+        if nayin:
+            ax.text(pos, 3.5, nayin, ha='center', va='center', fontsize=10, style='italic')
+    
+    # 五行统计
+    wuxing_count = bazi_data.get('five_elements_count', {})
+    if wuxing_count:
+        ax.text(1, 1.5, '五行统计:', fontsize=12, fontweight='bold')
+        wuxing_text = ' '.join([f"{k}:{v}" for k, v in wuxing_count.items()])
+        ax.text(1, 1, wuxing_text, fontsize=11)
+    
+    # 身强身弱
+    body_strength = bazi_data.get('body_strength', '')
+    if body_strength:
+        ax.text(1, 0.5, f'身强身弱: {body_strength}', fontsize=12, fontweight='bold', 
+               color='red' if body_strength == '强' else 'blue')
+
+# ==================== 紫微斗数命盘图 ====================
+
+def _draw_ziwei_frame(ax):
+    """紫微斗数命盘图的静态部分：12宫格子与宫名"""
+    from matplotlib.patches import Rectangle
+    
+    for (x, y), name in zip(ZIWEI_PALACE_POSITIONS, ZIWEI_PALACE_NAMES):
+        # 绘制宫位方框
+        rect = Rectangle((x-0.9, y-0.9), 1.8, 1.8, facecolor='lightblue', 
+                       edgecolor='black', linewidth=2)
+        ax.add_patch(rect)
+        
+        # 宫位名称
+        ax.text(x, y+0.7, name, ha='center', va='center', fontsize=10, fontweight='bold')
+
+def ziwei_palace_texts(palaces_data, name):
+    """
+    查找宫位数据并生成显示文字
+    
+    Returns:
+        (主星文字（最多2个，换行分隔）, 副星文字（最多3个）, 是否身宫)；找不到宫位时为 None
+    """
+    # 查找对应宫位数据
+    palace_data = None
+    for palace_name, palace in palaces_data.items():
+        if palace_name in name or name in palace_name:
+            palace_data = palace
+            break
+    if not palace_data:
+        return None
+    
+    # 主星
+    star_names = []
+    for star in palace_data.get('major_stars', []):
+        star_name = star.get('name', '') if isinstance(star, dict) else str(star)
+        brightness = star.get('brightness', '') if isinstance(star, dict) else ''
+        if brightness and brightness != '':
+            star_names.append(f"{star_name}({brightness})")
+        else:
+            star_names.append(star_name)
+    star_text = '\n'.join(star_names[:2])  # 最多显示2个主星
+    
+    # 副星
+    minor_text = ' '.join(palace_data.get('minor_stars', [])[:3])  # 最多显示3个副星
+    
+    return star_text, minor_text, palace_data.get('is_body_palace', False)
+
+def ziwei_center_lines(basic_info):
+    """命盘中央显示的命主、身主、五行局"""
+    center_text = []
+    if basic_info.get('soul'):
+        center_text.append(f"命: {basic_info['soul']}")
+    if basic_info.get('body'):
+        center_text.append(f"身: {basic_info['body']}")
+    if basic_info.get('five_elements_class'):
+        center_text.append(basic_info['five_elements_class'])
+    return center_text
+
+def _draw_ziwei_content(ax, data):
+    """紫微斗数命盘图的可变部分：标题、各宫星曜、身宫、中央信息、农历日期"""
+    # 标题
+    birth_info = data['input']
+    title = f"紫微斗数命盘 - {birth_info['birth_date']} {birth_info['birth_time']}"
+    ax.text(0, 5.5, title, ha='center', va='center', fontsize=16, fontweight='bold')
+    
+    ziwei_data = data.get('ziwei', {})
+    chart_data = ziwei_data.get('chart', {})
+    palaces_data = chart_data.get('palaces', {})
+    
+    for (x, y), name in zip(ZIWEI_PALACE_POSITIONS, ZIWEI_PALACE_NAMES):
+        texts = ziwei_palace_texts(palaces_data, name)
+        if texts is None:
+            continue
+        star_text, minor_text, is_body_palace = texts
+        
+        # 主星
+        if star_text:
+            ax.text(x, y+0.2, star_text, ha='center', va='center', fontsize=8, 
+                   fontweight='bold', color='red')
+        
+        # 副星
+        if minor_text:
+            ax.text(x, y-0.2, minor_text, ha='center', va='center', fontsize=7, color='blue')
+        
+        # 身宫标记
+        if is_body_palace:
+            ax.text(x+0.6, y+0.6, '身', ha='center', va='center', fontsize=8, 
+                   fontweight='bold', color='green',
+                   bbox=dict(boxstyle="circle,pad=0.1", facecolor='yellow'))
+    
+    # 中央信息
+    basic_info = ziwei_data.get('basic_info', {})
+    center_text = ziwei_center_lines(basic_info)
+    
+    if center_text:
+        ax.text(0, 0, '\n'.join(center_text), ha='center', va='center', 
+               fontsize=12, fontweight='bold',
+               bbox=dict(boxstyle="round,pad=0.3", facecolor='lightyellow'))
+    
+    # 农历日期
+    lunar_date = basic_info.get('lunar_date', '')
+    if lunar_date:
+        ax.text(0, -5.5, f"农历: {lunar_date}", ha='center', va='center', fontsize=10)
+
+# ==================== 印度星盘图 ====================
+
+def _draw_vedic_frame(ax):
+    """印度星盘图的静态部分：北印度样式的正方形外框与分割线"""
+    # 北印度样式：正方形布局，不是菱形
+    square_size = 3
+    
+    # 绘制外框 - 正方形
+    ax.plot([-square_size, square_size], [square_size, square_size], 'k-', linewidth=2)    # 上边
+    ax.plot([square_size, square_size], [square_size, -square_size], 'k-', linewidth=2)    # 右边
+    ax.plot([square_size, -square_size], [-square_size, -square_size], 'k-', linewidth=2)  # 下边
+    ax.plot([-square_size, -square_size], [-square_size, square_size], 'k-', linewidth=2)  # 左边
+    
+    # 绘制内部分割线形成12个区域
+    # 水平分割线
+    ax.plot([-square_size, square_size], [1, 1], 'k-', linewidth=1)      # 上1/3线
+    ax.plot([-square_size, square_size], [-1, -1], 'k-', linewidth=1)    # 下1/3线
+    
+    # 垂直分割线
+    ax.plot([-1, -1], [-square_size, square_size], 'k-', linewidth=1)    # 左1/3线
+    ax.plot([1, 1], [-square_size, square_size], 'k-', linewidth=1)      # 右1/3线
+    
+    # 对角分割线（形成三角形区域）
+    ax.plot([-square_size, -1], [square_size, 1], 'k-', linewidth=1)     # 左上角对角线
+    ax.plot([1, square_size], [square_size, 1], 'k-', linewidth=1)       # 右上角对角线
+    ax.plot([square_size, 1], [-square_size, -1], 'k-', linewidth=1)     # 右下角对角线
+    ax.plot([-1, -square_size], [-square_size, -1], 'k-', linewidth=1)   # 左下角对角线
+
+def vedic_house_layout(vedic_data):
+    """
+    按上升星座计算各宫位的星座与行星
+    
+    Returns:
+        ({宫位: 星座}, {宫位: ["行星简称 度数", ...]})
+    """
+    planets_data = vedic_data.get('planets', {})
+    
+    # 获取上升星座
+    asc_info = vedic_data.get('ascendant', {})
+    asc_sign = asc_info.get('sign', 'Aries') if asc_info else 'Aries'
+    
+    try:
+        asc_index = SIGNS_ORDER.index(asc_sign)
+    except ValueError:
+        asc_index = 0  # 默认从白羊座开始
+    
+    # 为每个宫位分配星座和收集行星
+    house_signs = {}
+    house_planets = {i: [] for i in range(1, 13)}
+    
+    for house_num in range(1, 13):
+        sign_index = (asc_index + house_num - 1) % 12
+        house_signs[house_num] = SIGNS_ORDER[sign_index]
+    
+    # 分析行星在各宫位的分布
+    for planet_name, planet_info in planets_data.items():
+        if isinstance(planet_info, dict):
+            house_num = planet_info.get('house')
+            if house_num and 1 <= house_num <= 12:
+                planet_abbr = PLANET_CHINESE.get(planet_name, planet_name)
+                degree = planet_info.get('lon', 0)  # 使用lon字段作为角度
+                house_planets[house_num].append(f"{planet_abbr} {degree:.1f}")
+    
+    return house_signs, house_planets
+
+def _draw_vedic_content(ax, data):
+    """印度星盘图的可变部分：标题、各宫星座与行星、Lagna标记"""
+    # 标题
+    birth_info = data['input']
+    title = f"D1 North India Chart - {birth_info['birth_date']} {birth_info['birth_time']}"
+    ax.text(0, -4.5, title, ha='center', va='center', fontsize=14, fontweight='bold')
+    
+    house_signs, house_planets = vedic_house_layout(data.get('vedic', {}))
+    
+    # 绘制各宫位信息
+    for house_num in range(1, 13):
+        x, y = VEDIC_HOUSE_POSITIONS[house_num]
+        sign_name = house_signs[house_num]
+        sign_chinese_name = SIGN_CHINESE.get(sign_name, sign_name)
+        
+        # 显示星座名称
+        ax.text(x, y + 0.3, sign_chinese_name, ha='center', va='center', 
+               fontsize=9, fontweight='bold', color='black')
+        
+        # 显示该宫位的行星（带角度）
+        planets_in_house = house_planets[house_num]
+        if planets_in_house:
+            if len(planets_in_house) == 1:
+                # 单个行星
+                ax.text(x, y - 0.2, planets_in_house[0], ha='center', va='center', 
+                       fontsize=8, color='blue')
+            elif len(planets_in_house) == 2:
+                # 两个行星
+                ax.text(x, y - 0.1, planets_in_house[0], ha='center', va='center', 
+                       fontsize=7, color='blue')
+                ax.text(x, y - 0.35, planets_in_house[1], ha='center', va='center', 
+                       fontsize=7, color='blue')
+            else:
+                # 多个行星，紧凑显示
+                for i, planet in enumerate(planets_in_house[:3]):
+                    ax.text(x, y - 0.05 - i * 0.12, planet, ha='center', va='center', 
+                           fontsize=6, color='blue')
+                if len(planets_in_house) > 3:
+                    ax.text(x + 0.3, y - 0.3, f"+{len(planets_in_house) - 3}", 
+                           ha='center', va='center', fontsize=5, color='red')
+    
+    # 在第1宫添加Lagna标记
+    lagna_x, lagna_y = VEDIC_HOUSE_POSITIONS[1]
+    ax.text(lagna_x, lagna_y, "Lagna", ha='center', va='center', 
+           fontsize=7, fontweight='bold', color='blue',
+           bbox=dict(boxstyle="round,pad=0.1", facecolor='lightblue', alpha=0.8))
+
+# 图表类型 → (静态部分, 可变部分)
+CHART_DRAWERS = {
+    "bazi": (_draw_bazi_frame, _draw_bazi_content),
+    "ziwei": (_draw_ziwei_frame, _draw_ziwei_content),
+    "vedic": (_draw_vedic_frame, _draw_vedic_content),
+}
+
+def _frame_args(chart_type, data):
+    """静态部分的参数：八字按实际柱数绘制格子"""
+    if chart_type == "bazi":
+        pillars = data['bazi'].get('enhanced_analysis', {}).get('四柱详析', [])
+        return (min(len(pillars), 4),)
+    return ()
+
+def available_chart_types(data: Dict[str, Any]) -> List[str]:
+    """排盘结果中可以绘图的系统（缺少或计算出错的系统不绘制）"""
+    return [chart_type for chart_type in CHART_FILE_SUFFIXES
+            if isinstance(data.get(chart_type), dict) and "error" not in data[chart_type]]
+
+def render_charts(data: Dict[str, Any], fmt: str = "png", dpi: int = 300,
+                  chart_types: Optional[List[str]] = None) -> Dict[str, bytes]:
+    """
+    在内存中绘制排盘结果（不写JSON文件、不读回）
+
+    Args:
+        data: TripleChartParser.calculate_all 的结果
+        fmt: 图片格式（png / jpg / pdf / svg）
+        dpi: 分辨率（svg 不使用）
+        chart_types: 绘制的图表类型，默认结果中所有可绘制的系统
+
+    Returns:
+        {图表类型: 图片字节}
+    """
+    visualizer = ChartVisualizer(data, verbose=False)
+    available = available_chart_types(data)
+    return {
+        chart_type: visualizer.render_chart(chart_type, fmt, dpi)
+        for chart_type in (chart_types or available) if chart_type in available
+    }
 
 class ChartVisualizer:
-    def __init__(self, json_file):
-        """初始化图表可视化器"""
+    def __init__(self, json_file=None, data=None, verbose=True):
+        """
+        初始化图表可视化器
+        
+        Args:
+            json_file: JSON排盘数据文件路径（data 不为空时只用于命名）；也可直接传入排盘结果字典
+            data: 已加载的排盘结果，给出时不再读取文件
+            verbose: 是否打印绘图进度
+
+        Raises:
+            ValueError: 文件读取或解析失败
+        """
+        if isinstance(json_file, dict):
+            json_file, data = None, json_file
+        if json_file is None and data is None:
+            raise ValueError("需要JSON文件路径或排盘结果")
         self.json_file = json_file
-        self.data = self.load_data()
+        self.verbose = verbose
+        self.data = data if data is not None else self.load_data()
+    
+    def _log(self, message):
+        """打印进度信息"""
+        if self.verbose:
+            print(message)
         
     def load_data(self):
-        """加载JSON数据"""
+        """加载JSON数据（失败时抛出 ValueError）"""
         try:
             with open(self.json_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
-        except Exception as e:
-            print(f"❌ 加载JSON文件失败: {e}")
-            sys.exit(1)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"加载JSON文件失败: {e}") from e
     
-    def generate_bazi_chart(self, save_path=None):
-        """生成八字排盘图"""
-        print("🎨 生成八字排盘图...")
-        
-        fig, ax = plt.subplots(1, 1, figsize=(16, 10))
-        ax.set_xlim(0, 16)
-        ax.set_ylim(0, 10)
-        ax.axis('off')
-        
-        # 标题
-        birth_info = self.data['input']
-        title = f"八字排盘图 - {birth_info['birth_date']} {birth_info['birth_time']} {birth_info.get('location', '')}"
-        ax.text(8, 9.5, title, ha='center', va='center', fontsize=18, fontweight='bold')
-        
-        # 四柱数据
-        bazi_data = self.data['bazi']
-        enhanced = bazi_data.get('enhanced_analysis', {})
-        pillars = enhanced.get('四柱详析', [])
-        
-        # 柱名
-        pillar_names = ['年柱', '月柱', '日柱', '时柱']
-        pillar_positions = [2, 5, 8, 11]
-        
-        # 绘制四柱
-        for i, (name, pos) in enumerate(zip(pillar_names, pillar_positions)):
-            if i < len(pillars):
-                pillar = pillars[i]
-                
-                # 柱名
-                ax.text(pos, 8.5, name, ha='center', va='center', fontsize=14, fontweight='bold')
-                
-                # 天干
-                tiangan = pillar['天干']
-                color = 'red' if name == '日柱' else 'black'  # 日主高亮
-                ax.add_patch(Rectangle((pos-0.8, 7), 1.6, 0.8, facecolor='lightblue', edgecolor='black'))
-                ax.text(pos, 7.4, tiangan, ha='center', va='center', fontsize=16, fontweight='bold', color=color)
-                
-                # 地支
-                dizhi = pillar['地支']
-                ax.add_patch(Rectangle((pos-0.8, 6), 1.6, 0.8, facecolor='lightgreen', edgecolor='black'))
-                ax.text(pos, 6.4, dizhi, ha='center', va='center', fontsize=16, fontweight='bold')
-                
-                # 主星（十神）
-                zhuxing = pillar.get('主星', '')
-                ax.add_patch(Rectangle((pos-0.8, 5), 1.6, 0.8, facecolor='lightyellow', edgecolor='black'))
-                ax.text(pos, 5.4, zhuxing, ha='center', va='center', fontsize=12, fontweight='bold')
-                
-                # 藏干
-                canggan = pillar.get('藏干', [])
-                if canggan:
-                    canggan_text = ' '.join(canggan)
-                    ax.add_patch(Rectangle((pos-0.8, 4), 1.6, 0.8, facecolor='lightcyan', edgecolor='black'))
-                    ax.text(pos, 4.4, canggan_text, ha='center', va='center', fontsize=10)
-                
-                # 纳音
-                nayin = pillar.get('纳音', '')
-                if nayin:
-                    ax.text(pos, 3.5, nayin, ha='center', va='center', fontsize=10, style='italic')
-        
-        # 图例
-        legend_y = 2.5
-        ax.text(1, legend_y, '图例:', fontsize=12, fontweight='bold')
-        
-        # 颜色图例
-        legend_items = [
-            ('天干', 'lightblue'),
-            ('地支', 'lightgreen'), 
-            ('十神', 'lightyellow'),
-            ('藏干', 'lightcyan')
-        ]
-        
-        for i, (label, color) in enumerate(legend_items):
-            x_pos = 2.5 + i * 2.5
-            ax.add_patch(Rectangle((x_pos-0.3, legend_y-0.2), 0.6, 0.4, facecolor=color, edgecolor='black'))
-            ax.text(x_pos+0.8, legend_y, label, ha='left', va='center', fontsize=10)
-        
-        # 五行统计
-        wuxing_count = bazi_data.get('five_elements_count', {})
-        if wuxing_count:
-            ax.text(1, 1.5, '五行统计:', fontsize=12, fontweight='bold')
-            wuxing_text = ' '.join([f"{k}:{v}" for k, v in wuxing_count.items()])
-            ax.text(1, 1, wuxing_text, fontsize=11)
-        
-        # 身强身弱
-        body_strength = bazi_data.get('body_strength', '')
-        if body_strength:
-            ax.text(1, 0.5, f'身强身弱: {body_strength}', fontsize=12, fontweight='bold', 
-                   color='red' if body_strength == '强' else 'blue')
+    def _generate_chart(self, chart_type, save_path, dpi, fmt=None):
+        """
+        绘制一张图（静态部分 + 可变部分）并保存或显示
+
+        save_path 可以是文件路径或可写的二进制缓冲区（此时须给出 fmt）；为空时显示图形
+        """
+        self._log(f"🎨 生成{CHART_FILE_SUFFIXES[chart_type]}...")
+        to_buffer = save_path is not None and not isinstance(save_path, (str, Path))
+        if fmt is None and save_path:
+            fmt = Path(save_path).suffix.lstrip('.').lower() or None
+
+        if save_path and fmt == "svg":
+            # SVG 直接拼接字符串，不加载 matplotlib
+            from chart_svg import render_svg
+            svg_text = render_svg(chart_type, self.data)
+            if to_buffer:
+                save_path.write(svg_text.encode('utf-8'))
+                return
+            with open(save_path, 'w', encoding='utf-8') as f:
+                f.write(svg_text)
+            self._log(f"✅ {CHART_FILE_SUFFIXES[chart_type]}已保存: {save_path}")
+            return
+
+        plt = _pyplot()
+        draw_frame, draw_content = CHART_DRAWERS[chart_type]
+
+        fig, ax = plt.subplots(1, 1, figsize=CHART_CANVAS[chart_type][0])
+        _setup_axes(ax, chart_type)
+        draw_frame(ax, *_frame_args(chart_type, self.data))
+        draw_content(ax, self.data)
         
         plt.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"✅ 八字排盘图已保存: {save_path}")
+        if to_buffer:
+            plt.savefig(save_path, dpi=dpi, bbox_inches='tight', format=fmt)
+        elif save_path:
+            plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
+            self._log(f"✅ {CHART_FILE_SUFFIXES[chart_type]}已保存: {save_path}")
         else:
             plt.show()
         
         plt.close()
     
-    def generate_ziwei_chart(self, save_path=None):
+    def generate_bazi_chart(self, save_path=None, dpi=300):
+        """生成八字排盘图"""
+        self._generate_chart("bazi", save_path, dpi)
+    
+    def generate_ziwei_chart(self, save_path=None, dpi=300):
         """生成紫微斗数命盘图"""
-        print("🎨 生成紫微斗数命盘图...")
-        
-        fig, ax = plt.subplots(1, 1, figsize=(12, 12))
-        ax.set_xlim(-6, 6)
-        ax.set_ylim(-6, 6)
-        ax.axis('off')
-        ax.set_aspect('equal')
-        
-        # 标题
-        birth_info = self.data['input']
-        title = f"紫微斗数命盘 - {birth_info['birth_date']} {birth_info['birth_time']}"
-        ax.text(0, 5.5, title, ha='center', va='center', fontsize=16, fontweight='bold')
-        
-        # 12宫位置（从命宫开始，逆时针）
-        palace_positions = [
-            (2, 2), (2, 0), (2, -2), (0, -2),    # 命宫、父母、福德、田宅
-            (-2, -2), (-2, 0), (-2, 2), (0, 2),  # 官禄、交友、迁移、疾厄
-            (4, 2), (4, 0), (4, -2), (0, 4)      # 财帛、子女、夫妻、兄弟
-        ]
-        
-        # 宫位名称
-        palace_names = [
-            '命宫', '父母', '福德', '田宅',
-            '官禄', '交友', '迁移', '疾厄', 
-            '财帛', '子女', '夫妻', '兄弟'
-        ]
-        
-        # 绘制宫位格子
-        ziwei_data = self.data.get('ziwei', {})
-        chart_data = ziwei_data.get('chart', {})
-        palaces_data = chart_data.get('palaces', {})
-        
-        for i, (pos, name) in enumerate(zip(palace_positions, palace_names)):
-            x, y = pos
-            
-            # 绘制宫位方框
-            rect = Rectangle((x-0.9, y-0.9), 1.8, 1.8, facecolor='lightblue', 
-                           edgecolor='black', linewidth=2)
-            ax.add_patch(rect)
-            
-            # 宫位名称
-            ax.text(x, y+0.7, name, ha='center', va='center', fontsize=10, fontweight='bold')
-            
-            # 查找对应宫位数据
-            palace_data = None
-            for palace_name, data in palaces_data.items():
-                if palace_name in name or name in palace_name:
-                    palace_data = data
-                    break
-            
-            if palace_data:
-                # 主星
-                major_stars = palace_data.get('major_stars', [])
-                if major_stars:
-                    star_names = []
-                    for star in major_stars:
-                        star_name = star.get('name', '') if isinstance(star, dict) else str(star)
-                        brightness = star.get('brightness', '') if isinstance(star, dict) else ''
-                        if brightness and brightness != '':
-                            star_names.append(f"{star_name}({brightness})")
-                        else:
-                            star_names.append(star_name)
-                    
-                    star_text = '\n'.join(star_names[:2])  # 最多显示2个主星
-                    ax.text(x, y+0.2, star_text, ha='center', va='center', fontsize=8, 
-                           fontweight='bold', color='red')
-                
-                # 副星
-                minor_stars = palace_data.get('minor_stars', [])
-                if minor_stars:
-                    minor_text = ' '.join(minor_stars[:3])  # 最多显示3个副星
-                    ax.text(x, y-0.2, minor_text, ha='center', va='center', fontsize=7, color='blue')
-                
-                # 身宫标记
-                if palace_data.get('is_body_palace', False):
-                    ax.text(x+0.6, y+0.6, '身', ha='center', va='center', fontsize=8, 
-                           fontweight='bold', color='green',
-                           bbox=dict(boxstyle="circle,pad=0.1", facecolor='yellow'))
-        
-        # 中央信息
-        basic_info = ziwei_data.get('basic_info', {})
-        center_text = []
-        if basic_info.get('soul'):
-            center_text.append(f"命: {basic_info['soul']}")
-        if basic_info.get('body'):
-            center_text.append(f"身: {basic_info['body']}")
-        if basic_info.get('five_elements_class'):
-            center_text.append(basic_info['five_elements_class'])
-        
-        if center_text:
-            ax.text(0, 0, '\n'.join(center_text), ha='center', va='center', 
-                   fontsize=12, fontweight='bold',
-                   bbox=dict(boxstyle="round,pad=0.3", facecolor='lightyellow'))
-        
-        # 农历日期
-        lunar_date = basic_info.get('lunar_date', '')
-        if lunar_date:
-            ax.text(0, -5.5, f"农历: {lunar_date}", ha='center', va='center', fontsize=10)
-        
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"✅ 紫微斗数命盘图已保存: {save_path}")
-        else:
-            plt.show()
-        
-        plt.close()
+        self._generate_chart("ziwei", save_path, dpi)
     
-    def generate_vedic_chart(self, save_path=None):
+    def generate_vedic_chart(self, save_path=None, dpi=300):
         """生成印度星盘图（北印度样式）"""
-        print("🎨 生成印度星盘图...")
-        
-        fig, ax = plt.subplots(1, 1, figsize=(10, 10))
-        ax.set_xlim(-5, 5)
-        ax.set_ylim(-5, 5)
-        ax.axis('off')
-        ax.set_aspect('equal')
-        
-        # 标题
-        birth_info = self.data['input']
-        title = f"D1 North India Chart - {birth_info['birth_date']} {birth_info['birth_time']}"
-        ax.text(0, -4.5, title, ha='center', va='center', fontsize=14, fontweight='bold')
-        
-        # 北印度样式：正方形布局，不是菱形
-        square_size = 3
-        
-        # 绘制外框 - 正方形
-        ax.plot([-square_size, square_size], [square_size, square_size], 'k-', linewidth=2)    # 上边
-        ax.plot([square_size, square_size], [square_size, -square_size], 'k-', linewidth=2)    # 右边
-        ax.plot([square_size, -square_size], [-square_size, -square_size], 'k-', linewidth=2)  # 下边
-        ax.plot([-square_size, -square_size], [-square_size, square_size], 'k-', linewidth=2)  # 左边
-        
-        # 绘制内部分割线形成12个区域
-        # 水平分割线
-        ax.plot([-square_size, square_size], [1, 1], 'k-', linewidth=1)      # 上1/3线
-        ax.plot([-square_size, square_size], [-1, -1], 'k-', linewidth=1)    # 下1/3线
-        
-        # 垂直分割线
-        ax.plot([-1, -1], [-square_size, square_size], 'k-', linewidth=1)    # 左1/3线
-        ax.plot([1, 1], [-square_size, square_size], 'k-', linewidth=1)      # 右1/3线
-        
-        # 对角分割线（形成三角形区域）
-        ax.plot([-square_size, -1], [square_size, 1], 'k-', linewidth=1)     # 左上角对角线
-        ax.plot([1, square_size], [square_size, 1], 'k-', linewidth=1)       # 右上角对角线
-        ax.plot([square_size, 1], [-square_size, -1], 'k-', linewidth=1)     # 右下角对角线
-        ax.plot([-1, -square_size], [-square_size, -1], 'k-', linewidth=1)   # 左下角对角线
-        
-        # 12宫位置定义（按照您的图片布局）
-        house_positions = {
-            1: (0, 2),          # 第1宫 - 上中（牡羊座）
-            2: (-2, 2),         # 第2宫 - 左上角（金牛座）
-            3: (-2, 0),         # 第3宫 - 左中（双子座）
-            4: (-2, -2),        # 第4宫 - 左下角（巨蟹座）
-            5: (0, -2),         # 第5宫 - 下中（狮子座）
-            6: (2, -2),         # 第6宫 - 右下角（处女座）
-            7: (2, 0),          # 第7宫 - 右中（天秤座）
-            8: (2, 2),          # 第8宫 - 右上角（天蝎座）
-            9: (-0.5, 0.5),     # 第9宫 - 中左上（射手座）
-            10: (-0.5, -0.5),   # 第10宫 - 中左下（摩羯座）
-            11: (0.5, -0.5),    # 第11宫 - 中右下（水瓶座）
-            12: (0.5, 0.5)      # 第12宫 - 中右上（双鱼座）
-        }
-        
-        # 星座中文名称映射
-        sign_chinese = {
-            'Aries': '白羊座', 'Taurus': '金牛座', 'Gemini': '双子座', 'Cancer': '巨蟹座',
-            'Leo': '狮子座', 'Virgo': '处女座', 'Libra': '天秤座', 'Scorpio': '天蝎座',
-            'Sagittarius': '射手座', 'Capricorn': '摩羯座', 'Aquarius': '水瓶座', 'Pisces': '双鱼座'
-        }
-        
-        # 行星中文名称映射
-        planet_chinese = {
-            'Sun': '日', 'Moon': '月', 'Mercury': '水', 'Venus': '金',
-            'Mars': '火', 'Jupiter': '木', 'Saturn': '土', 
-            'Rahu': 'Ra', 'Ketu': 'Ke', 'Uranus': '天', 'Neptune': '海', 'Pluto': '冥'
-        }
-        
-        # 获取印度星盘数据
-        vedic_data = self.data.get('vedic', {})
-        planets_data = vedic_data.get('planets', {})
-        houses_data = vedic_data.get('houses', {})
-        
-        # 获取上升星座
-        asc_info = vedic_data.get('ascendant', {})
-        asc_sign = asc_info.get('sign', 'Aries') if asc_info else 'Aries'
-        
-        # 计算每个宫位对应的星座（从上升星座开始）
-        signs_order = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 
-                      'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
-        
-        try:
-            asc_index = signs_order.index(asc_sign)
-        except ValueError:
-            asc_index = 0  # 默认从白羊座开始
-        
-        # 为每个宫位分配星座和收集行星
-        house_signs = {}
-        house_planets = {i: [] for i in range(1, 13)}
-        
-        for house_num in range(1, 13):
-            sign_index = (asc_index + house_num - 1) % 12
-            house_signs[house_num] = signs_order[sign_index]
-        
-        # 分析行星在各宫位的分布
-        for planet_name, planet_info in planets_data.items():
-            if isinstance(planet_info, dict):
-                house_num = planet_info.get('house')
-                if house_num and 1 <= house_num <= 12:
-                    planet_abbr = planet_chinese.get(planet_name, planet_name)
-                    degree = planet_info.get('lon', 0)  # 使用lon字段作为角度
-                    house_planets[house_num].append(f"{planet_abbr} {degree:.1f}")
-        
-        # 绘制各宫位信息
-        for house_num in range(1, 13):
-            x, y = house_positions[house_num]
-            sign_name = house_signs[house_num]
-            sign_chinese_name = sign_chinese.get(sign_name, sign_name)
-            
-            # 显示星座名称
-            ax.text(x, y + 0.3, sign_chinese_name, ha='center', va='center', 
-                   fontsize=9, fontweight='bold', color='black')
-            
-            # 显示该宫位的行星（带角度）
-            planets_in_house = house_planets[house_num]
-            if planets_in_house:
-                if len(planets_in_house) == 1:
-                    # 单个行星
-                    ax.text(x, y - 0.2, planets_in_house[0], ha='center', va='center', 
-                           fontsize=8, color='blue')
-                elif len(planets_in_house) == 2:
-                    # 两个行星
-                    ax.text(x, y - 0.1, planets_in_house[0], ha='center', va='center', 
-                           fontsize=7, color='blue')
-                    ax.text(x, y - 0.35, planets_in_house[1], ha='center', va='center', 
-                           fontsize=7, color='blue')
-                else:
-                    # 多个行星，紧凑显示
-                    for i, planet in enumerate(planets_in_house[:3]):
-                        ax.text(x, y - 0.05 - i * 0.12, planet, ha='center', va='center', 
-                               fontsize=6, color='blue')
-                    if len(planets_in_house) > 3:
-                        ax.text(x + 0.3, y - 0.3, f"+{len(planets_in_house) - 3}", 
-                               ha='center', va='center', fontsize=5, color='red')
-        
-        # 在第1宫添加Lagna标记
-        lagna_x, lagna_y = house_positions[1]
-        ax.text(lagna_x, lagna_y, "Lagna", ha='center', va='center', 
-               fontsize=7, fontweight='bold', color='blue',
-               bbox=dict(boxstyle="round,pad=0.1", facecolor='lightblue', alpha=0.8))
-        
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"✅ 印度星盘图已保存: {save_path}")
-        else:
-            plt.show()
-        
-        plt.close()
+        self._generate_chart("vedic", save_path, dpi)
+    
+    def render_chart(self, chart_type, fmt="png", dpi=300):
+        """在内存中绘制一张图（bazi / ziwei / vedic），返回图片字节"""
+        buffer = io.BytesIO()
+        self._generate_chart(chart_type, buffer, dpi, fmt)
+        return buffer.getvalue()
     
-    def generate_all_charts(self, output_dir=None):
-        """生成所有图表"""
+    def generate_all_charts(self, output_dir=None, dpi=300, fmt="png"):
+        """生成所有图表（dpi、fmt 为分辨率与图片格式）"""
         if output_dir is None:
-            output_dir = Path(self.json_file).parent
+            output_dir = Path(self.json_file).parent if self.json_file else Path('.')
         else:
             output_dir = Path(output_dir)
         
         output_dir.mkdir(exist_ok=True)
         
         # 获取基础文件名
-        base_name = Path(self.json_file).stem
+        base_name = Path(self.json_file).stem if self.json_file else "chart"
         
         # 生成各种图表
-        bazi_path = output_dir / f"{base_name}_八字排盘图.png"
-        ziwei_path = output_dir / f"{base_name}_紫微斗数命盘图.png"
-        vedic_path = output_dir / f"{base_name}_印度星盘图.png"
+        bazi_path = output_dir / f"{base_name}_八字排盘图.{fmt}"
+        ziwei_path = output_dir / f"{base_name}_紫微斗数命盘图.{fmt}"
+        vedic_path = output_dir / f"{base_name}_印度星盘图.{fmt}"
         
-        self.generate_bazi_chart(bazi_path)
-        self.generate_ziwei_chart(ziwei_path)
-        self.generate_vedic_chart(vedic_path)
+        self.generate_bazi_chart(bazi_path, dpi)
+        self.generate_ziwei_chart(ziwei_path, dpi)
+        self.generate_vedic_chart(vedic_path, dpi)
         
-        print(f"\n🎉 所有图表生成完成！")
-        print(f"📁 输出目录: {output_dir}")
+        self._log(f"\n🎉 所有图表生成完成！")
+        self._log(f"📁 输出目录: {output_dir}")
         return [bazi_path, ziwei_path, vedic_path]
 
+class ChartTemplateRenderer:
+    """
+    模板复用绘图（批量用）
+    每种图表的静态部分（格子、分割线、宫名、图例）只绘制一次并缓存为栅格背景，
+    之后每张图只恢复背景、绘制可变文字（标题、干支、星曜、行星）再编码输出，不重建图形
+    
+    与 ChartVisualizer 的区别：图幅固定为画布范围加0.1英寸边距（不按文字逐张裁剪），只支持 png / jpg
+    """
+    
+    # 背景裁剪的边距（英寸），与 savefig 的 bbox_inches='tight' 默认边距一致
+    PAD_INCHES = 0.1
+    
+    def __init__(self, dpi=300):
+        """
+        Args:
+            dpi: 分辨率（同一渲染器内的所有图相同）
+        """
+        self.dpi = dpi
+        self._templates = {}
+    
+    def _template(self, chart_type, frame_args=()):
+        """构建（或取出已缓存的）静态背景；按图表类型和静态部分参数（如八字柱数）分别缓存"""
+        key = (chart_type,) + tuple(frame_args)
+        template = self._templates.get(key)
+        if template is None:
+            _pyplot()  # 中文字体设置
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            
+            fig = Figure(figsize=CHART_CANVAS[chart_type][0], dpi=self.dpi)
+            canvas = FigureCanvasAgg(fig)
+            ax = fig.add_subplot(1, 1, 1)
+            _setup_axes(ax, chart_type)
+            CHART_DRAWERS[chart_type][0](ax, *frame_args)
+            fig.tight_layout()
+            canvas.draw()
+            
+            # 输出范围：坐标区域加边距（像素，行从上往下）
+            pad = self.PAD_INCHES * self.dpi
+            extent = ax.get_window_extent()
+            height = int(fig.bbox.height)
+            crop = (slice(max(int(height - extent.y1 - pad), 0), min(int(height - extent.y0 + pad), height)),
+                    slice(max(int(extent.x0 - pad), 0), min(int(extent.x1 + pad), int(fig.bbox.width))))
+            
+            template = (ax, canvas, canvas.copy_from_bbox(fig.bbox), crop)
+            self._templates[key] = template
+        return template
+    
+    def render(self, chart_type, data, output, fmt=None):
+        """
+        绘制一张图
+        
+        Args:
+            chart_type: bazi / ziwei / vedic
+            data: 排盘结果（generate_output 结构）
+            output: 文件路径或二进制文件对象
+            fmt: png / jpg，默认按 output 的扩展名
+        """
+        import numpy as np
+        from PIL import Image  # matplotlib 的依赖
+        
+        fmt = (fmt or Path(output).suffix.lstrip('.') or 'png').lower()
+        if fmt not in ('png', 'jpg', 'jpeg'):
+            raise ValueError(f"模板绘图只支持 png / jpg: {fmt}")
+        
+        ax, canvas, background, crop = self._template(chart_type, _frame_args(chart_type, data))
+        canvas.restore_region(background)
+        
+        start = len(ax.texts)
+        CHART_DRAWERS[chart_type][1](ax, data)
+        texts = list(ax.texts)[start:]
+        try:
+            for text in texts:
+                ax.draw_artist(text)
+            # 背景不透明，去掉 alpha 通道以减少编码量
+            image = Image.fromarray(np.asarray(canvas.buffer_rgba())[crop][..., :3])
+            image.save(output, format='PNG' if fmt == 'png' else 'JPEG', dpi=(self.dpi, self.dpi))
+        finally:
+            for text in texts:
+                text.remove()
+
 def main():
     parser = argparse.ArgumentParser(description='命理图表可视化工具')
     parser.add_argument('json_file', help='JSON排盘数据文件路径')
@@ -428,9 +655,14 @@ def main():
                        choices=['bazi', 'ziwei', 'vedic', 'all'], 
                        default='all',
                        help='生成的图表类型（默认：all）')
+    parser.add_argument('--dpi', type=int, default=300, help='图片分辨率（默认：300）')
+    parser.add_argument('--format', '-f', choices=IMAGE_FORMATS, default='png', help='图片格式（默认：png）')
     
     args = parser.parse_args()
     
+    # 只保存文件，不需要交互式后端
+    use_backend("Agg")
+    
     # 检查文件是否存在
     if not Path(args.json_file).exists():
         print(f"❌ 文件不存在: {args.json_file}")
@@ -439,7 +671,11 @@ def main():
     print(f"📊 开始处理文件: {args.json_file}")
     
     # 创建可视化器
-    visualizer = ChartVisualizer(args.json_file)
+    try:
+        visualizer = ChartVisualizer(args.json_file)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
     
     # 设置输出目录
     output_dir = Path(args.output_dir) if args.output_dir else Path(args.json_file).parent
@@ -448,16 +684,16 @@ def main():
     
     # 根据选择生成图表
     if args.chart_type == 'all':
-        visualizer.generate_all_charts(output_dir)
+        visualizer.generate_all_charts(output_dir, args.dpi, args.format)
     elif args.chart_type == 'bazi':
-        bazi_path = output_dir / f"{base_name}_八字排盘图.png"
-        visualizer.generate_bazi_chart(bazi_path)
+        bazi_path = output_dir / f"{base_name}_八字排盘图.{args.format}"
+        visualizer.generate_bazi_chart(bazi_path, args.dpi)
     elif args.chart_type == 'ziwei':
-        ziwei_path = output_dir / f"{base_name}_紫微斗数命盘图.png"
-        visualizer.generate_ziwei_chart(ziwei_path)
+        ziwei_path = output_dir / f"{base_name}_紫微斗数命盘图.{args.format}"
+        visualizer.generate_ziwei_chart(ziwei_path, args.dpi)
     elif args.chart_type == 'vedic':
-        vedic_path = output_dir / f"{base_name}_印度星盘图.png"
-        visualizer.generate_vedic_chart(vedic_path)
+        vedic_path = output_dir / f"{base_name}_印度星盘图.{args.format}"
+        visualizer.generate_vedic_chart(vedic_path, args.dpi)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
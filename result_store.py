@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+排盘结果持久化存储（SQLite）
+以规范化输入的哈希为键保存排盘结果，相同出生信息不再重复计算
+
+键的组成（只取影响排盘结果的量）：
+- 真太阳时（精确到分钟）、性别、经纬度（保留4位小数，约10米）
+- 计算的命理系统与输出字段、ayanamsa 系统、八字规则表版本
+时区与当地时间的不同写法只要换算出相同的真太阳时即共用同一条结果；
+结果中的 input 部分不入库，由调用方按本次输入重新生成
+
+数据库为 WAL 模式，多个进程可同时读取；按 TTL 和条目数上限淘汰（先写入的先淘汰）
+
+用法示例：
+python triple_chart_parser.py --batch-input births.jsonl --cache-dir .chart_cache
+python result_store.py --cache-dir .chart_cache --stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+
+# 数据库文件名
+STORE_FILE = "chart_results.sqlite3"
+
+# 键格式版本：键的组成或结果结构变化时递增，旧条目自然失效
+KEY_VERSION = 2
+
+# 每写入多少条检查一次淘汰
+_EVICT_INTERVAL = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chart_results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chart_results_created ON chart_results (created);
+"""
+
+
+def chart_key(input_data: Dict[str, Any], systems: Iterable[str], ayanamsa_system: str,
+              rule_version: str, fields: Optional[List[str]] = None) -> str:
+    """
+    计算排盘结果的键
+
+    Args:
+        input_data: parse_input 的返回值
+        systems: 计算的命理系统
+        ayanamsa_system: 印度星盘 ayanamsa 系统
+        rule_version: 八字规则表版本
+        fields: 输出字段路径（只计算部分字段时结果不同，需区分）
+    """
+    parts = [
+        KEY_VERSION,
+        input_data["true_solar_time"].strftime("%Y-%m-%dT%H:%M"),
+        input_data["gender"],
+        round(float(input_data["longitude"]), 4),
+        round(float(input_data["latitude"]), 4),
+        sorted(systems),
+        ayanamsa_system,
+        rule_version,
+        sorted(fields) if fields else None
+    ]
+    raw = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """排盘结果存储"""
+
+    def __init__(self, cache_dir: str, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        Args:
+            cache_dir: 数据库所在目录（不存在时自动创建）
+            ttl: 条目有效期（秒），None 表示永久有效
+            max_entries: 条目数上限，None 表示不限
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, STORE_FILE)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取结果，不存在或已过期时返回 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM chart_results WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """写入结果（同键覆盖）"""
+        raw = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chart_results (key, value, created) VALUES (?, ?, ?)",
+                (key, raw, time.time())
+            )
+            self.writes += 1
+            evict = self.writes % _EVICT_INTERVAL == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """删除过期条目，并在超出上限时删除最早写入的条目，返回删除的条数"""
+        with self._lock:
+            deleted = 0
+            if self.ttl is not None:
+                deleted += self._conn.execute(
+                    "DELETE FROM chart_results WHERE created < ?", (time.time() - self.ttl,)
+                ).rowcount
+            if self.max_entries is not None:
+                count = self._conn.execute("SELECT COUNT(*) FROM chart_results").fetchone()[0]
+                if count > self.max_entries:
+                    deleted += self._conn.execute(
+                        "DELETE FROM chart_results WHERE key IN "
+                        "(SELECT key FROM chart_results ORDER BY created LIMIT ?)",
+                        (count - self.max_entries,)
+                    ).rowcount
+            return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """存储统计（条目数、文件大小）与本进程的命中统计"""
+        with self._lock:
+            entries, oldest, newest = self._conn.execute(
+                "SELECT COUNT(*), MIN(created), MAX(created) FROM chart_results"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            size = sum(os.path.getsize(self.path + suffix)
+                       for suffix in ("", "-wal") if os.path.exists(self.path + suffix))
+            return {
+                "path": self.path,
+                "entries": entries,
+                "size_bytes": size,
+                "oldest": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(oldest)) if oldest else None,
+                "newest": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(newest)) if newest else None,
+                "ttl": self.ttl,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+# 进程级结果存储（未配置时为 None，不使用存储）
+_result_store: Optional[ResultStore] = None
+
+
+def configure_result_store(cache_dir: Optional[str], ttl: Optional[float] = None,
+                           max_entries: Optional[int] = None) -> Optional[ResultStore]:
+    """配置进程级结果存储，cache_dir 为空时关闭存储"""
+    global _result_store
+    if _result_store is not None:
+        _result_store.close()
+    _result_store = ResultStore(cache_dir, ttl, max_entries) if cache_dir else None
+    return _result_store
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """获取进程级结果存储"""
+    return _result_store
+
+
+def _forget_result_store():
+    """fork 出的子进程丢弃继承的存储（SQLite 连接不能跨 fork 使用，也不能在子进程中关闭），需要时自行重新打开"""
+    global _result_store
+    _result_store = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_result_store)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="排盘结果存储管理")
+    parser.add_argument("--cache-dir", required=True, help="结果存储目录")
+    parser.add_argument("--cache-ttl", type=float, help="条目有效期（秒）")
+    parser.add_argument("--cache-max-entries", type=int, help="条目数上限")
+    parser.add_argument("--evict", action="store_true", help="按 TTL / 条目数上限执行一次淘汰")
+    parser.add_argument("--stats", action="store_true", help="输出存储统计")
+
+    args = parser.parse_args()
+
+    store = ResultStore(args.cache_dir, args.cache_ttl, args.cache_max_entries)
+    try:
+        if args.evict:
+            print(f"✅ 已淘汰 {store.evict()} 条", file=sys.stderr)
+        if args.stats or not args.evict:
+            print(json.dumps(store.stats(), ensure_ascii=False, indent=2))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+八字规则表注册中心
+进程内只解析一次 bazi_rule_tables.json，多线程只读共享；
+文件的 mtime/大小变化且内容哈希不同时才重新加载
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+# 默认规则表路径
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bazi_rule_tables.json')
+
+# 规则表加载失败时的版本号
+UNAVAILABLE_VERSION = "unavailable"
+
+
+class RuleRegistry:
+    """规则表注册中心"""
+
+    def __init__(self, rules_file: str = DEFAULT_RULES_FILE, check_interval: float = 1.0):
+        """
+        Args:
+            rules_file: 规则表JSON文件路径
+            check_interval: 两次检查文件变化的最小间隔（秒），0 表示每次都检查
+        """
+        self.rules_file = rules_file
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._rules: Dict[str, Any] = {}
+        self._version: Optional[str] = None
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._last_check = 0.0
+
+    def _file_stat_key(self) -> Optional[Tuple[int, int]]:
+        """文件的 (mtime, 大小)，文件不存在时返回 None"""
+        try:
+            st = os.stat(self.rules_file)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        检查规则表文件，必要时重新加载
+
+        Returns:
+            是否加载了新版本
+        """
+        now = time.monotonic()
+        if not force and self._version is not None and now - self._last_check < self.check_interval:
+            return False
+
+        with self._lock:
+            self._last_check = now
+            stat_key = self._file_stat_key()
+            if not force and self._version is not None and stat_key == self._stat_key:
+                return False
+
+            try:
+                with open(self.rules_file, 'rb') as f:
+                    raw = f.read()
+                version = hashlib.sha256(raw).hexdigest()[:12]
+
+                # mtime 变化但内容未变（如 touch），不重新解析
+                self._stat_key = stat_key
+                if version == self._version:
+                    return False
+
+                rules = json.loads(raw.decode('utf-8'))
+            except Exception as e:
+                print(f"警告：无法加载规则表 {e}")
+                if self._version is None:
+                    self._version = UNAVAILABLE_VERSION
+                return False
+
+            # 整体替换引用，读取方拿到的始终是完整的一版规则
+            self._rules = rules
+            self._version = version
+            return True
+
+    def snapshot(self) -> Tuple[Dict[str, Any], str]:
+        """返回 (规则表, 版本号)，二者始终属于同一版本；规则表只读共享，调用方不得修改"""
+        self.refresh()
+        with self._lock:
+            return self._rules, self._version
+
+    def get_rules(self) -> Dict[str, Any]:
+        """返回当前规则表（只读共享）"""
+        return self.snapshot()[0]
+
+    @property
+    def version(self) -> str:
+        """当前规则表版本号（文件内容 SHA-256 前12位）"""
+        return self.snapshot()[1]
+
+
+# 进程级单例
+_registry: Optional[RuleRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_rule_registry() -> RuleRegistry:
+    """获取进程级规则表注册中心"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = RuleRegistry()
+    return _registry
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+排盘结果JSON序列化
+每个结果只编码一次（UTF-8字节），大小直接取自同一份缓冲区；
+安装了 orjson 时使用 orjson 编码，否则使用标准库 json（两者输出的JSON等价）
+
+- dumps(obj)：编码为字节，默认缩进2格，compact=True 时为无空白的单行
+- dump(obj, stream)：编码后写入文本或二进制流，返回写入的字节数
+- JsonLinesWriter(stream)：逐条写出JSONL（批量输出），不在内存中累积
+- append_key(data, key, value)：在已编码的对象末尾追加一个键，已有内容不重新编码
+"""
+
+import io
+import json
+from typing import Any, IO
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def dumps(obj: Any, compact: bool = False) -> bytes:
+    """
+    编码为UTF-8 JSON字节（中文不转义）
+
+    Args:
+        obj: 排盘结果
+        compact: True 时输出无空白的单行，否则缩进2格
+    """
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS if compact else orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            # orjson 不支持的类型（如超过64位的整数）交给标准库处理
+            pass
+    if compact:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(obj, ensure_ascii=False, indent=2)
+    return text.encode("utf-8")
+
+
+def append_key(data: bytes, key: str, value: Any, compact: bool = False) -> bytes:
+    """
+    在 dumps 编码的JSON对象末尾追加一个键，结果与把该键放在最后再整体编码相同
+
+    Args:
+        data: dumps(obj, compact) 的输出（obj 为字典且不含 key）
+        key / value: 追加的键值
+        compact: 与编码 data 时相同
+    """
+    encoded_key = dumps(key, compact=True)
+    if compact:
+        separator = b"" if data == b"{}" else b","
+        return data[:-1] + separator + encoded_key + b":" + dumps(value, compact=True) + b"}"
+    # 缩进格式：值的每一行再缩进2格
+    encoded_value = dumps(value).replace(b"\n", b"\n  ")
+    if data == b"{}":
+        return b"{\n  " + encoded_key + b": " + encoded_value + b"\n}"
+    return data[:-2] + b",\n  " + encoded_key + b": " + encoded_value + b"\n}"
+
+
+def _write(stream: IO, data: bytes):
+    """写入文本流或二进制流"""
+    if isinstance(stream, io.TextIOBase):
+        stream.write(data.decode("utf-8"))
+    else:
+        stream.write(data)
+
+
+def dump(obj: Any, stream: IO, compact: bool = False) -> int:
+    """编码后写入流，返回写入的字节数"""
+    data = dumps(obj, compact)
+    _write(stream, data)
+    return len(data)
+
+
+class JsonLinesWriter:
+    """逐条写出JSONL（每条一行紧凑JSON），记录写出的条数与字节数"""
+
+    def __init__(self, stream: IO):
+        self.stream = stream
+        self.records = 0
+        self.bytes_written = 0
+
+    def write(self, record: Any) -> int:
+        """写出一条记录，返回本条的字节数（含换行）"""
+        data = dumps(record, compact=True) + b"\n"
+        _write(self.stream, data)
+        self.records += 1
+        self.bytes_written += len(data)
+        return len(data)
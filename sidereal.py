@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+恒星历换算（NumPy向量化）
+把一张或多张星盘的回归黄经一次性换算为恒星历星座、星座内度数与宫位，
+供 calculate_vedic / get_vedic_chart 以及批量印度星盘使用
+
+口径与原逐点计算一致：
+- 恒星历黄经 = (回归黄经 - ayanamsa) % 360
+- 星座下标 = 恒星历黄经 // 30，星座内度数 = 恒星历黄经 % 30
+- 宫位 = ((恒星历黄经 - 上升点恒星历黄经) % 360) // 30 + 1；无上升点时记为第1宫
+"""
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# 星座名称
+SIGN_NAMES = [
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
+]
+
+
+def _per_chart(values, ndim: int) -> np.ndarray:
+    """每张星盘一个的参数（标量或长度N）扩展为可与 (N,K) 广播的形状"""
+    values = np.asarray(values, dtype=np.float64)
+    if ndim == 2 and values.ndim == 1:
+        values = values[:, None]
+    return values
+
+
+def sidereal_positions(tropical_lons, ayanamsa, asc_tropical_lon=None) -> Dict[str, np.ndarray]:
+    """
+    向量化恒星历换算
+
+    Args:
+        tropical_lons: 回归黄经（度），形状 (K,) 为一张星盘的K个天体，(N,K) 为N张星盘
+        ayanamsa: 岁差修正值（度），标量或长度N
+        asc_tropical_lon: 上升点回归黄经，标量或长度N；None 或 NaN 表示无上升点
+
+    Returns:
+        {
+            "sidereal_lon": 恒星历黄经，
+            "sign_index": int 星座下标 0–11，
+            "sign_degree": 星座内度数，
+            "house": int 宫位 1–12
+        }
+        形状均与 tropical_lons 相同
+    """
+    lons = np.asarray(tropical_lons, dtype=np.float64)
+    ayanamsa = _per_chart(ayanamsa, lons.ndim)
+
+    sidereal_lon = np.mod(lons - ayanamsa, 360.0)
+    sign_index = (sidereal_lon // 30).astype(np.int64)
+    sign_degree = np.mod(sidereal_lon, 30.0)
+
+    if asc_tropical_lon is None:
+        house = np.ones(lons.shape, dtype=np.int64)
+    else:
+        asc_sidereal = np.mod(_per_chart(asc_tropical_lon, lons.ndim) - ayanamsa, 360.0)
+        offset = np.mod(sidereal_lon - asc_sidereal, 360.0) // 30
+        house = np.where(np.isnan(offset), 0, offset).astype(np.int64) + 1
+
+    return {
+        "sidereal_lon": sidereal_lon,
+        "sign_index": sign_index,
+        "sign_degree": sign_degree,
+        "house": house
+    }
+
+
+def format_positions(names: List[str], positions: Dict[str, np.ndarray],
+                     row: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    将 sidereal_positions 的结果转换为 {天体名: {"sign", "house", "lon"}}，度数保留两位小数
+
+    Args:
+        names: 天体名称，与 tropical_lons 的列一一对应
+        positions: sidereal_positions 的返回值
+        row: 多星盘输入时的星盘下标
+    """
+    sign_index = positions["sign_index"]
+    house = positions["house"]
+    sign_degree = positions["sign_degree"]
+    if row is not None:
+        sign_index, house, sign_degree = sign_index[row], house[row], sign_degree[row]
+
+    return {
+        name: {
+            "sign": SIGN_NAMES[sign],
+            "house": h,
+            "lon": round(degree, 2)
+        }
+        for name, sign, h, degree in zip(names, sign_index.tolist(), house.tolist(), sign_degree.tolist())
+    }
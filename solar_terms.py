@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+节气时刻表（1900–2100）
+预先计算全部二十四节气的世界时时刻，存为紧凑的二进制文件 solar_terms_1900_2100.bin，
+年柱、月柱只需在表上做一次二分查找即可确定，边界精确到分钟
+
+文件格式（小端）：
+- 头部：魔数 b"JQ24"、格式版本 uint16、起始年份 uint16、条目数 uint32
+- 正文：int32 数组，为各节气距 1900-01-01 00:00 UT 的分钟数
+- 第 i 条对应太阳视黄经 (285 + 15i) % 360 度，即从起始年份的小寒开始依次排列
+
+用法示例：
+python solar_terms.py --generate          # 重新生成二进制表
+python solar_terms.py --year 2024         # 查看某年的节气时刻
+"""
+
+import argparse
+import bisect
+import datetime
+import os
+import struct
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from sun_position import UNIX_EPOCH_JD, datetime64_to_jd, delta_t, apparent_solar_longitude
+
+# 节气名称（从小寒开始，偶数下标为“节”，奇数下标为“中气”）
+SOLAR_TERM_NAMES = [
+    "小寒", "大寒", "立春", "雨水", "惊蛰", "春分", "清明", "谷雨",
+    "立夏", "小满", "芒种", "夏至", "小暑", "大暑", "立秋", "处暑",
+    "白露", "秋分", "寒露", "霜降", "立冬", "小雪", "大雪", "冬至"
+]
+
+START_YEAR = 1900
+END_YEAR = 2100
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'solar_terms_1900_2100.bin')
+
+_MAGIC = b"JQ24"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+
+# 表内时间的零点
+_EPOCH = datetime.datetime(1900, 1, 1)
+_EPOCH_MINUTES64 = np.datetime64("1900-01-01T00:00", "m")
+
+# 起始小寒所在月（己亥年丁丑月）的六十甲子序
+_FIRST_MONTH_GANZHI = 13
+
+# 已加载的表：(分钟列表, NumPy数组)
+_table_cache: Optional[Tuple[List[int], np.ndarray]] = None
+
+
+# ==================== 生成 ====================
+
+def compute_solar_terms(start_year: int = START_YEAR, end_year: int = END_YEAR) -> np.ndarray:
+    """
+    计算 [start_year 小寒, end_year+1 小寒] 之间全部节气的世界时儒略日
+
+    以平均间隔作初值，对太阳视黄经做牛顿迭代（全部节气同时向量化求解）
+    """
+    count = (end_year - start_year + 1) * 24 + 1
+    index = np.arange(count)
+    targets = np.mod(285.0 + 15.0 * index, 360.0)
+
+    # 初值：起始年1月6日前后为小寒，此后每个节气约隔 1/24 回归年
+    first = datetime64_to_jd(np.datetime64(f"{start_year:04d}-01-06"))
+    jde = first + index * (365.2422 / 24)
+
+    for _ in range(8):
+        diff = np.mod(targets - apparent_solar_longitude(jde) + 180.0, 360.0) - 180.0
+        jde = jde + diff * (365.2422 / 360.0)
+
+    # 力学时转世界时
+    year = 2000 + (jde - 2451545.0) / 365.25
+    return jde - delta_t(year) / 86400
+
+
+def generate_table(path: str = TABLE_FILE) -> int:
+    """生成二进制节气表，返回条目数"""
+    jd_ut = compute_solar_terms()
+    minutes = np.rint((jd_ut - UNIX_EPOCH_JD) * 1440).astype(np.int64)
+    minutes -= _EPOCH_MINUTES64.astype(np.int64)
+    data = minutes.astype("<i4")
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, START_YEAR, len(data)))
+        f.write(data.tobytes())
+    return len(data)
+
+
+# ==================== 查表 ====================
+
+def load_table(path: str = TABLE_FILE) -> Tuple[List[int], np.ndarray]:
+    """加载节气表（进程内缓存），返回 (分钟列表, int64数组)"""
+    global _table_cache
+    if _table_cache is None:
+        with open(path, "rb") as f:
+            raw = f.read()
+        magic, version, start_year, count = _HEADER.unpack_from(raw)
+        if magic != _MAGIC or version != _FORMAT_VERSION or start_year != START_YEAR:
+            raise ValueError(f"节气表格式不匹配: {path}")
+        data = np.frombuffer(raw, dtype="<i4", count=count, offset=_HEADER.size).astype(np.int64)
+        _table_cache = (data.tolist(), data)
+    return _table_cache
+
+
+def has_table() -> bool:
+    """节气表是否可用"""
+    try:
+        load_table()
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def _jie_to_indices(jie):
+    """由起始小寒以来的“节”序号求 (年柱甲子序, 月柱甲子序)"""
+    year = START_YEAR + (jie - 1) // 12
+    return (year - 4) % 60, (_FIRST_MONTH_GANZHI + jie) % 60
+
+
+def year_month_index(ut_dt: datetime.datetime) -> Optional[Tuple[int, int]]:
+    """
+    查表得到年柱、月柱的六十甲子序
+
+    Args:
+        ut_dt: 出生时刻（世界时）
+
+    Returns:
+        (年柱甲子序, 月柱甲子序)；超出表范围时返回 None
+    """
+    minutes, _ = load_table()
+    offset = (ut_dt - _EPOCH) // datetime.timedelta(minutes=1)
+    position = bisect.bisect_right(minutes, offset) - 1
+    if position < 0 or position >= len(minutes) - 1:
+        return None
+    return _jie_to_indices(position // 2)
+
+
+def year_month_indices_many(ut_times) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    向量化查表
+
+    Args:
+        ut_times: 世界时 datetime64 数组
+
+    Returns:
+        (年柱甲子序, 月柱甲子序, 是否在表范围内)
+    """
+    _, table = load_table()
+    offsets = (np.asarray(ut_times).astype("datetime64[m]") - _EPOCH_MINUTES64).astype(np.int64)
+    position = np.searchsorted(table, offsets, side="right") - 1
+    valid = (position >= 0) & (position < len(table) - 1)
+    year_index, month_index = _jie_to_indices(np.where(valid, position, 0) // 2)
+    return year_index, month_index, valid
+
+
+def solar_terms_of_year(year: int) -> List[Tuple[str, datetime.datetime]]:
+    """返回某年（小寒至冬至）24个节气的世界时时刻"""
+    if not START_YEAR <= year <= END_YEAR:
+        raise ValueError(f"年份超出范围: {year}（{START_YEAR}–{END_YEAR}）")
+    minutes, _ = load_table()
+    start = (year - START_YEAR) * 24
+    return [
+        (SOLAR_TERM_NAMES[k], _EPOCH + datetime.timedelta(minutes=minutes[start + k]))
+        for k in range(24)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="节气时刻表")
+    parser.add_argument("--generate", action="store_true", help="重新生成二进制节气表")
+    parser.add_argument("--year", type=int, help="查看某年的节气时刻")
+    parser.add_argument("--timezone", type=float, default=8.0, help="显示用时区（小时，默认+8）")
+
+    args = parser.parse_args()
+
+    if args.generate:
+        count = generate_table()
+        print(f"✅ 节气表已生成: {TABLE_FILE}（{count} 条, {os.path.getsize(TABLE_FILE)} 字节）")
+
+    if args.year:
+        shift = datetime.timedelta(hours=args.timezone)
+        for name, ut_dt in solar_terms_of_year(args.year):
+            print(f"{name} {(ut_dt + shift).strftime('%Y-%m-%d %H:%M')}")
+
+
+if __name__ == "__main__":
+    main()
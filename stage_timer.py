@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+排盘分阶段计时
+记录每个阶段的墙钟时间与CPU时间（毫秒），供 --timings 输出 _timings，
+并可注册回调把每个阶段作为一个 span 导出（如HTTP服务接入链路追踪）
+
+用法：
+timer = StageTimer(callback)
+with timer.activate():
+    with timed_stage("parse_input"):
+        ...
+timer.as_dict()  # {"parse_input": {"wall_ms": ..., "cpu_ms": ...}, ...}
+
+排盘代码中的 timed_stage 在没有激活的计时器时不做任何事，开销可忽略
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+# 回调参数：(阶段名, 开始时刻（Unix时间戳，秒）, 墙钟耗时毫秒, CPU耗时毫秒)
+SpanCallback = Callable[[str, float, float, float], None]
+
+_NO_TIMER = nullcontext()
+
+
+class StageTimer:
+    """一次排盘的分阶段计时"""
+
+    def __init__(self, callback: Optional[SpanCallback] = None):
+        """
+        Args:
+            callback: 每个阶段结束时调用，见 SpanCallback
+        """
+        self.callback = callback
+        self.records: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """计时一个阶段；同名阶段多次出现时累加"""
+        start = time.time()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall_ms = (time.perf_counter() - wall) * 1000
+            cpu_ms = (time.thread_time() - cpu) * 1000
+            record = self.records.setdefault(name, {"wall_ms": 0.0, "cpu_ms": 0.0})
+            record["wall_ms"] += wall_ms
+            record["cpu_ms"] += cpu_ms
+            if self.callback is not None:
+                self.callback(name, start, wall_ms, cpu_ms)
+
+    @contextmanager
+    def activate(self):
+        """在此范围内把本计时器设为当前计时器（timed_stage 记录到这里）"""
+        token = _current_timer.set(self)
+        try:
+            yield self
+        finally:
+            _current_timer.reset(token)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """按阶段开始顺序输出，耗时保留3位小数"""
+        return {
+            name: {"wall_ms": round(record["wall_ms"], 3), "cpu_ms": round(record["cpu_ms"], 3)}
+            for name, record in self.records.items()
+        }
+
+
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+
+
+def timed_stage(name: str):
+    """在当前计时器上计时一个阶段，没有激活的计时器时为空操作"""
+    timer = _current_timer.get()
+    return _NO_TIMER if timer is None else timer.stage(name)
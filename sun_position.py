@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+太阳视黄经计算（NumPy向量化）
+基于VSOP87地球日心黄经截断级数（与NREL SPA所用项相同），
+加章动主项、光行差与FK5修正，精度约1角秒，足以将节气时刻定位到分钟
+
+时间约定：
+- jd_ut：世界时儒略日
+- jde：力学时儒略日（jde = jd_ut + ΔT/86400）
+"""
+
+import numpy as np
+
+# 1970-01-01 00:00 UT 的儒略日
+UNIX_EPOCH_JD = 2440587.5
+
+# J2000.0 历元
+J2000 = 2451545.0
+
+# VSOP87 地球日心黄经 L0..L5 项：(A, B, C)，值 = A * cos(B + C * τ)，单位 1e-8 弧度
+_L_TERMS = [
+    [
+        (175347046, 0, 0), (3341656, 4.6692568, 6283.07585), (34894, 4.6261, 12566.1517),
+        (3497, 2.7441, 5753.3849), (3418, 2.8289, 3.5231), (3136, 3.6277, 77713.7715),
+        (2676, 4.4181, 7860.4194), (2343, 6.1352, 3930.2097), (1324, 0.7425, 11506.7698),
+        (1273, 2.0371, 529.691), (1199, 1.1096, 1577.3435), (990, 5.233, 5884.927),
+        (902, 2.045, 26.298), (857, 3.508, 398.149), (780, 1.179, 5223.694),
+        (753, 2.533, 5507.553), (505, 4.583, 18849.228), (492, 4.205, 775.523),
+        (357, 2.92, 0.067), (317, 5.849, 11790.629), (284, 1.899, 796.298),
+        (271, 0.315, 10977.079), (243, 0.345, 5486.778), (206, 4.806, 2544.314),
+        (205, 1.869, 5573.143), (202, 2.458, 6069.777), (156, 0.833, 213.299),
+        (132, 3.411, 2942.463), (126, 1.083, 20.775), (115, 0.645, 0.98),
+        (103, 0.636, 4694.003), (102, 0.976, 15720.839), (102, 4.267, 7.114),
+        (99, 6.21, 2146.17), (98, 0.68, 155.42), (86, 5.98, 161000.69),
+        (85, 1.3, 6275.96), (85, 3.67, 71430.7), (80, 1.81, 17260.15),
+        (79, 3.04, 12036.46), (75, 1.76, 5088.63), (74, 3.5, 3154.69),
+        (74, 4.68, 801.82), (70, 0.83, 9437.76), (62, 3.98, 8827.39),
+        (61, 1.82, 7084.9), (57, 2.78, 6286.6), (56, 4.39, 14143.5),
+        (56, 3.47, 6279.55), (52, 0.19, 12139.55), (52, 1.33, 1748.02),
+        (51, 0.28, 5856.48), (49, 0.49, 1194.45), (41, 5.37, 8429.24),
+        (41, 2.4, 19651.05), (39, 6.17, 10447.39), (37, 6.04, 10213.29),
+        (37, 2.57, 1059.38), (36, 1.71, 2352.87), (36, 1.78, 6812.77),
+        (33, 0.59, 17789.85), (30, 0.44, 83996.85), (30, 2.74, 1349.87),
+        (25, 3.16, 4690.48),
+    ],
+    [
+        (628331966747, 0, 0), (206059, 2.678235, 6283.07585), (4303, 2.6351, 12566.1517),
+        (425, 1.59, 3.523), (119, 5.796, 26.298), (109, 2.966, 1577.344),
+        (93, 2.59, 18849.23), (72, 1.14, 529.69), (68, 1.87, 398.15),
+        (67, 4.41, 5507.55), (59, 2.89, 5223.69), (56, 2.17, 155.42),
+        (45, 0.4, 796.3), (36, 0.47, 775.52), (29, 2.65, 7.11),
+        (21, 5.34, 0.98), (19, 1.85, 5486.78), (19, 4.97, 213.3),
+        (17, 2.99, 6275.96), (16, 0.03, 2544.31), (16, 1.43, 2146.17),
+        (15, 1.21, 10977.08), (12, 2.83, 1748.02), (12, 3.26, 5088.63),
+        (12, 5.27, 1194.45), (12, 2.08, 4694), (11, 0.77, 553.57),
+        (10, 1.3, 6286.6), (10, 4.24, 1349.87), (9, 2.7, 242.73),
+        (9, 5.64, 951.72), (8, 5.3, 2352.87), (6, 2.65, 9437.76),
+        (6, 4.67, 4690.48),
+    ],
+    [
+        (52919, 0, 0), (8720, 1.0721, 6283.0758), (309, 0.867, 12566.152),
+        (27, 0.05, 3.52), (16, 5.19, 26.3), (16, 3.68, 155.42),
+        (10, 0.76, 18849.23), (9, 2.06, 77713.77), (7, 0.83, 775.52),
+        (5, 4.66, 1577.34), (4, 1.03, 7.11), (4, 3.44, 5573.14),
+        (3, 5.14, 796.3), (3, 6.05, 5507.55), (3, 1.19, 242.73),
+        (3, 6.12, 529.69), (3, 0.31, 398.15), (3, 2.28, 553.57),
+        (2, 4.38, 5223.69), (2, 3.75, 0.98),
+    ],
+    [
+        (289, 5.844, 6283.076), (35, 0, 0), (17, 5.49, 12566.15),
+        (3, 5.2, 155.42), (1, 4.72, 3.52), (1, 5.3, 18849.23),
+        (1, 5.97, 242.73),
+    ],
+    [
+        (114, 3.142, 0), (8, 4.13, 6283.08), (1, 3.84, 12566.15),
+    ],
+    [
+        (1, 3.14, 0),
+    ],
+]
+
+# 向量化计算时每块的样本数
+_CHUNK_SIZE = 65536
+
+# 预先转为数组：每阶一组 (A, B, C)
+_L_ARRAYS = [tuple(np.array(col, dtype=np.float64) for col in zip(*terms)) for terms in _L_TERMS]
+
+
+def datetime64_to_jd(times) -> np.ndarray:
+    """datetime64（视为世界时）转儒略日"""
+    us = np.asarray(times, dtype='datetime64[us]').astype(np.int64)
+    return us / 86400e6 + UNIX_EPOCH_JD
+
+
+def delta_t(year) -> np.ndarray:
+    """ΔT = TT - UT（秒），Espenak & Meeus 多项式，适用于1900–2150年"""
+    y = np.asarray(year, dtype=np.float64)
+    result = np.empty_like(y)
+
+    segments = [
+        (y < 1920, lambda t: -2.79 + 1.494119 * t - 0.0598939 * t**2 + 0.0061966 * t**3 - 0.000197 * t**4, 1900),
+        ((y >= 1920) & (y < 1941), lambda t: 21.20 + 0.84493 * t - 0.076100 * t**2 + 0.0020936 * t**3, 1920),
+        ((y >= 1941) & (y < 1961), lambda t: 29.07 + 0.407 * t - t**2 / 233 + t**3 / 2547, 1950),
+        ((y >= 1961) & (y < 1986), lambda t: 45.45 + 1.067 * t - t**2 / 260 - t**3 / 718, 1975),
+        ((y >= 1986) & (y < 2005), lambda t: (63.86 + 0.3345 * t - 0.060374 * t**2 + 0.0017275 * t**3
+                                              + 0.000651814 * t**4 + 0.00002373599 * t**5), 2000),
+        ((y >= 2005) & (y < 2050), lambda t: 62.92 + 0.32217 * t + 0.005589 * t**2, 2000),
+    ]
+    remaining = np.ones(y.shape, dtype=bool)
+    for mask, poly, base in segments:
+        result[mask] = poly(y[mask] - base)
+        remaining &= ~mask
+    u = (y[remaining] - 1820) / 100
+    result[remaining] = -20 + 32 * u**2 - 0.5628 * (2150 - y[remaining])
+    return result
+
+
+def jd_ut_to_jde(jd_ut) -> np.ndarray:
+    """世界时儒略日转力学时儒略日"""
+    jd_ut = np.asarray(jd_ut, dtype=np.float64)
+    year = 2000 + (jd_ut - J2000) / 365.25
+    return jd_ut + delta_t(year) / 86400
+
+
+def apparent_solar_longitude(jde) -> np.ndarray:
+    """
+    太阳视黄经（度，0–360）
+
+    Args:
+        jde: 力学时儒略日，标量或任意形状数组
+    """
+    jde = np.asarray(jde, dtype=np.float64)
+    tau = (jde - J2000) / 365250.0
+
+    # 地球日心黄经（弧度），分块计算以限制 N×项数 中间数组的内存
+    flat_tau = tau.reshape(-1)
+    helio = np.zeros_like(flat_tau)
+    for start in range(0, flat_tau.size, _CHUNK_SIZE):
+        chunk = flat_tau[start:start + _CHUNK_SIZE]
+        for power, (a, b, c) in enumerate(_L_ARRAYS):
+            series = np.cos(b + c * chunk[:, None]) @ a
+            helio[start:start + _CHUNK_SIZE] += series * chunk**power
+    helio = helio.reshape(tau.shape) / 1e8
+
+    # 地心几何黄经
+    geo = np.degrees(helio) + 180.0
+
+    # 章动主项（角秒）
+    t = tau * 10
+    omega = np.radians(125.04452 - 1934.136261 * t)
+    sun_mean = np.radians(280.4665 + 36000.7698 * t)
+    moon_mean = np.radians(218.3165 + 481267.8813 * t)
+    nutation = (-17.20 * np.sin(omega) - 1.32 * np.sin(2 * sun_mean)
+                - 0.23 * np.sin(2 * moon_mean) + 0.21 * np.sin(2 * omega))
+
+    # FK5修正 -0.09033″，光行差 -20.4898″（日地距离取1AU）
+    correction = (nutation - 0.09033 - 20.4898) / 3600.0
+
+    return np.mod(geo + correction, 360.0)
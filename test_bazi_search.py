@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+八字反查检查
+在逐分钟的时间网格上用 calculate_bazi_many 穷举四柱，与 find_datetimes 求出的时段逐分钟比较：
+网格上四柱相同的时刻必须恰好落在返回的时段内（含节气交接、子时与非整点时区经度的情况）
+
+用法：python test_bazi_search.py
+"""
+
+import datetime
+
+import numpy as np
+
+from bazi_search import find_datetimes
+from bazi_vectorized import calculate_bazi_many, GAN_NAMES, ZHI_NAMES
+
+START = datetime.datetime(1990, 1, 1)
+END = datetime.datetime(2002, 1, 1)
+PILLAR_SETS = 40
+SEED = 60
+
+# (经度, 时区)
+LOCATIONS = [(116.4, 8), (-73.9, -5), (139.7, 9)]
+
+
+def _pillar_keys(result):
+    """四柱合成一个整数，便于比较"""
+    codes = result["stems"].astype(np.int64) * 12 + result["branches"]
+    return codes @ np.array([144 ** 3, 144 ** 2, 144, 1])
+
+
+def test_matches_brute_force():
+    """find_datetimes 与逐分钟穷举一致"""
+    grid = np.arange(np.datetime64(START, "m"), np.datetime64(END, "m"), np.timedelta64(1, "m"))
+    rng = np.random.default_rng(SEED)
+
+    for longitude, timezone in LOCATIONS:
+        result = calculate_bazi_many(grid, longitude, timezone)
+        keys = _pillar_keys(result)
+        # 随机时刻之外，另取几个交节后的第一分钟（时段被节气边界截断的情况）
+        month_changes = np.nonzero(np.diff(result["stems"][:, 1]) != 0)[0] + 1
+        samples = np.concatenate([rng.choice(len(grid), PILLAR_SETS // len(LOCATIONS) + 1, replace=False),
+                                  rng.choice(month_changes, 3, replace=False)])
+        for i in samples:
+            pillars = [GAN_NAMES[s] + ZHI_NAMES[b] for s, b in zip(result["stems"][i], result["branches"][i])]
+            windows = find_datetimes(*pillars, START, END, longitude, timezone)
+
+            found = np.zeros(len(grid), dtype=bool)
+            for window_start, window_end in windows:
+                lower = np.searchsorted(grid, np.datetime64(window_start, "us"))
+                upper = np.searchsorted(grid, np.datetime64(window_end, "us"))
+                found[lower:upper] = True
+            expected = keys == keys[i]
+            assert np.array_equal(found, expected), \
+                f"{' '.join(pillars)} 经度{longitude} 时区{timezone:+d}: 反查 {found.sum()} 分钟，穷举 {expected.sum()} 分钟"
+        print(f"✅ 经度{longitude} 时区{timezone:+d} 反查与穷举一致")
+
+
+def test_mismatched_hour_stem():
+    """时干与日干不相配的四柱没有结果"""
+    assert find_datetimes("庚辰", "戊寅", "癸卯", "丙寅", START, END) == []
+    print("✅ 时干不相配时没有结果")
+
+
+if __name__ == "__main__":
+    test_matches_brute_force()
+    test_mismatched_hour_stem()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+向量化八字一致性检查
+随机生成出生时间、经度和时区，逐条比较 calculate_bazi_many 与 TripleChartParser.calculate_bazi 的
+四柱、五行统计和身强身弱（节气表范围内）
+
+用法：python test_bazi_vectorized.py
+"""
+
+import numpy as np
+
+from bazi_vectorized import calculate_bazi_many, bazi_many_row
+from triple_chart_parser import TripleChartParser
+
+SAMPLES = 3000
+SEED = 20240204
+
+# 常见时区（小时，parse_input 只接受整数时区）
+TIMEZONES = [-8, -5, 0, 1, 3, 5, 8, 9, 10, 12]
+
+
+def random_births(count, seed=SEED):
+    """[1901, 2099] 内的随机出生时间（精确到分钟）、经度和时区"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("1901-01-01T00:00", "m").astype(np.int64)
+    end = np.datetime64("2099-12-31T23:59", "m").astype(np.int64)
+    minutes = rng.integers(start, end, count).astype("datetime64[m]")
+    longitudes = np.round(rng.uniform(-180, 180, count), 1)
+    timezones = rng.choice(TIMEZONES, count)
+    return minutes, longitudes, timezones
+
+
+def test_vectorized_matches_scalar():
+    """calculate_bazi_many 与 calculate_bazi 逐条一致"""
+    parser = TripleChartParser()
+    minutes, longitudes, timezones = random_births(SAMPLES)
+    result = calculate_bazi_many(minutes, longitudes, timezones)
+
+    mismatches = []
+    for i, (moment, longitude, timezone) in enumerate(zip(minutes.tolist(), longitudes, timezones.tolist())):
+        input_data = parser.parse_input(moment.strftime("%Y-%m-%d"), moment.strftime("%H:%M"),
+                                        f"{timezone:+d}", float(longitude), 0.0, 1)
+        scalar = parser.calculate_bazi(input_data, parts=set())
+        vectorized = bazi_many_row(result, i)
+        if any(scalar[key] != value for key, value in vectorized.items()):
+            mismatches.append((moment, longitude, timezone, scalar, vectorized))
+
+    for moment, longitude, timezone, scalar, vectorized in mismatches[:5]:
+        print(f"❌ {moment} 经度{longitude} 时区{timezone:+d}: {scalar} != {vectorized}")
+    assert not mismatches, f"{len(mismatches)}/{SAMPLES} 条不一致"
+    print(f"✅ 向量化与逐条计算一致（{SAMPLES} 条）")
+
+
+if __name__ == "__main__":
+    test_vectorized_matches_scalar()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+二进制编码无损检查
+仓库自带的排盘结果逐个编码再解码，必须与原结果完全一致；
+当前格式的完整结果应全部落在定长部分（附加部分为空），词表缺字时会退回附加部分而不报错，由此发现
+
+用法：python test_chart_codec.py
+"""
+
+import io
+import json
+import os
+
+from chart_codec import RECORD_SIZE, ChartRecord, decode_chart, encode_chart, iter_records, write_records
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 仓库自带的排盘结果
+FIXTURES = [
+    "1_20000101_0000_北京_116.4_39.9.json",
+    "complete_chart_result.json",
+    "ba_zi_computed_table.json",
+    "vedic_chart_result.json",
+]
+
+# 当前 generate_output 格式的完整结果：四个部分都应编码进定长部分
+FULL_LAYOUT_FIXTURES = ["1_20000101_0000_北京_116.4_39.9.json"]
+
+
+def load_fixture(name):
+    with open(os.path.join(HERE, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_round_trip():
+    """decode_chart(encode_chart(x)) == x，键顺序也一致"""
+    for name in FIXTURES:
+        data = load_fixture(name)
+        decoded = decode_chart(encode_chart(data))
+        assert decoded == data, f"{name} 编码后还原不一致"
+        assert json.dumps(decoded, ensure_ascii=False) == json.dumps(data, ensure_ascii=False), \
+            f"{name} 还原后的键顺序不一致"
+        print(f"✅ {name} 无损还原")
+
+
+def test_full_layout():
+    """完整结果不产生附加部分"""
+    for name in FULL_LAYOUT_FIXTURES:
+        encoded = encode_chart(load_fixture(name))
+        assert len(encoded) == RECORD_SIZE, f"{name} 有 {len(encoded) - RECORD_SIZE} 字节落入附加部分"
+        print(f"✅ {name} 全部编码为定长记录（{RECORD_SIZE} 字节）")
+
+
+def test_lazy_access():
+    """按需读取的字段与完整还原一致，记录流读写后逐条一致"""
+    results = [load_fixture(name) for name in FIXTURES]
+    for data in results:
+        record = ChartRecord(encode_chart(data))
+        for key, value in data.items():
+            assert record.get(key) == value
+        if "ziwei" in data and "chart" in data["ziwei"]:
+            assert record.get("ziwei.chart.palaces.命宫") == data["ziwei"]["chart"]["palaces"].get("命宫")
+        if "bazi" in data and "year_pillar" in data["bazi"]:
+            assert record.pillars == [data["bazi"][key] for key in
+                                      ("year_pillar", "month_pillar", "day_pillar", "hour_pillar")]
+
+    stream = io.BytesIO()
+    stats = write_records(stream, results)
+    assert stats["records"] == len(results)
+    stream.seek(0)
+    assert [record.to_dict() for record in iter_records(stream)] == results
+    print(f"✅ 按需读取与记录流一致（{len(results)} 条）")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_full_layout()
+    test_lazy_access()
@@ -2,38 +2,46 @@
 import argparse
 import json
 import datetime
-from typing import Dict, Any, Tuple
+import importlib.util
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
 import sys
 import math
 
-# 导入必要的库
-try:
-    import sxtwl
-    HAS_SXTWL = True
-except ImportError:
-    HAS_SXTWL = False
+# 排盘库只探测是否安装，首次用到对应系统时才导入（只算八字时不加载 py-iztro / flatlib）
+def _has_module(name: str) -> bool:
+    """探测模块是否可导入（不执行导入）"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
 
-try:
-    from py_iztro import Astro
-    HAS_IZTRO = True
-except ImportError:
-    HAS_IZTRO = False
+HAS_SXTWL = _has_module("sxtwl")
+HAS_IZTRO = _has_module("py_iztro")
+HAS_FLATLIB = _has_module("flatlib")
 
-try:
-    from flatlib import const
-    from flatlib.chart import Chart
-    from flatlib.datetime import Datetime
-    from flatlib.geopos import GeoPos
-    HAS_FLATLIB = True
-except ImportError:
-    HAS_FLATLIB = False
+# 高级紫微斗数API（依赖 py-iztro）
+HAS_ZIWEI_ADVANCED = HAS_IZTRO and _has_module("ziwei_advanced_api")
+
+# 恒星历换算与 ayanamsa 表（印度星盘）
+from sidereal import sidereal_positions, format_positions
+from ayanamsa import AYANAMSA_SYSTEMS, DEFAULT_SYSTEM as DEFAULT_AYANAMSA, ayanamsa_for_datetime
+
+# 排盘结果持久化存储
+from result_store import chart_key, configure_result_store, get_result_store
+from rule_registry import get_rule_registry
+
+# 分阶段计时（--timings / --profile）
+from stage_timer import StageTimer, SpanCallback, timed_stage
 
-# 导入高级紫微斗数API
+# JSON序列化（有 orjson 时使用 orjson）
+import serialization
+
+# 导入节气表（年柱、月柱查表）
 try:
-    from ziwei_advanced_api import ZiweiAdvancedAPI
-    HAS_ZIWEI_ADVANCED = True
+    import solar_terms
+    HAS_SOLAR_TERMS = solar_terms.has_table()
 except ImportError:
-    HAS_ZIWEI_ADVANCED = False
+    HAS_SOLAR_TERMS = False
 
 # 导入增强八字分析器
 try:
@@ -47,6 +55,20 @@ if not any([HAS_SXTWL, HAS_IZTRO, HAS_FLATLIB]):
     print("pip install sxtwl py-iztro flatlib", file=sys.stderr)
     sys.exit(1)
 
+def configure_worker(config: Dict[str, Any]):
+    """
+    按命令行参数配置进程级缓存（主进程和批量模式的工作进程共用）
+    
+    Args:
+        config: 支持 ziwei_cache_size / ziwei_cache_dir、cache_dir / cache_ttl / cache_max_entries
+            （ayanamsa_system / timings 由解析器实例使用）
+    """
+    if HAS_ZIWEI_ADVANCED and ("ziwei_cache_size" in config or "ziwei_cache_dir" in config):
+        from ziwei_advanced_api import configure_astrolabe_cache
+        configure_astrolabe_cache(config.get("ziwei_cache_size", 4096), config.get("ziwei_cache_dir"))
+    if config.get("cache_dir"):
+        configure_result_store(config["cache_dir"], config.get("cache_ttl"), config.get("cache_max_entries"))
+
 class ZiweiAnalyzer:
     """紫微斗数增强分析器"""
     
@@ -286,9 +308,66 @@ class ZiweiAnalyzer:
         
         return four_trans_table.get(stem, {"error": f"未知天干: {stem}"})
 
+# 三种命理系统（calculate_all 的 systems 参数取值）
+CHART_SYSTEMS = ["bazi", "ziwei", "vedic"]
+
+# 八字结果中依赖增强分析的字段
+BAZI_ENHANCED_FIELDS = {"enhanced_analysis", "rule_table_version", "enhanced_error"}
+
+def group_field_paths(fields: List[str]) -> Dict[str, Optional[Set[str]]]:
+    """
+    按顶层键分组字段路径
+    
+    Returns:
+        {顶层键: 需要的第二层字段集合}，集合为 None 表示需要整个顶层键，
+        如 ["bazi.enhanced_analysis.十神统计", "vedic"] → {"bazi": {"enhanced_analysis"}, "vedic": None}
+    """
+    grouped: Dict[str, Optional[Set[str]]] = {}
+    for path in fields:
+        keys = path.split(".")
+        if len(keys) == 1 or (keys[0] in grouped and grouped[keys[0]] is None):
+            grouped[keys[0]] = None
+        else:
+            grouped.setdefault(keys[0], set()).add(keys[1])
+    return grouped
+
+def project_fields(output: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """
+    只保留 fields 中的字段路径（路径不存在时忽略）；涉及的系统出错时保留其 error
+    """
+    projected: Dict[str, Any] = {}
+    for path in fields:
+        keys = path.split(".")
+        source = output
+        for key in keys:
+            if not isinstance(source, dict) or key not in source:
+                break
+            source = source[key]
+        else:
+            target = projected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = source
+    
+    for name in group_field_paths(fields):
+        result = output.get(name)
+        if name in CHART_SYSTEMS and isinstance(result, dict) and "error" in result:
+            projected.setdefault(name, {})["error"] = result["error"]
+    return projected
+
 class TripleChartParser:
-    def __init__(self):
+    def __init__(self, ayanamsa_system: str = DEFAULT_AYANAMSA, timings: bool = False,
+                 span_callback: Optional[SpanCallback] = None):
+        """
+        Args:
+            ayanamsa_system: 印度星盘的 ayanamsa 系统（lahiri / raman / kp）
+            timings: calculate_all 默认是否在结果中附加 _timings（各阶段墙钟/CPU耗时）
+            span_callback: 每个阶段结束时调用 (阶段名, 开始时刻, 墙钟毫秒, CPU毫秒)，用于导出 span
+        """
         self.astrolabe = None
+        self.ayanamsa_system = ayanamsa_system
+        self.timings = timings
+        self.span_callback = span_callback
         
     def parse_input(self, birth_date: str, birth_time: str, timezone: str, longitude: float, latitude: float, gender: int) -> Dict[str, Any]:
         """解析输入参数"""
@@ -303,9 +382,10 @@ class TripleChartParser:
             tz_offset = tz_sign * tz_hours
             
             # 计算真太阳时
-            true_solar_time = self.calculate_true_solar_time(
-                date_obj, time_obj, longitude, tz_offset
-            )
+            with timed_stage("true_solar_time"):
+                true_solar_time = self.calculate_true_solar_time(
+                    date_obj, time_obj, longitude, tz_offset
+                )
             
             return {
                 "birth_date": birth_date,
@@ -368,31 +448,56 @@ class TripleChartParser:
         
         return shi_gan + shi_zhi
     
-    def calculate_bazi(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """计算八字"""
-        if not HAS_SXTWL:
+    def calculate_bazi(self, input_data: Dict[str, Any], parts: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """
+        计算八字
+        
+        Args:
+            parts: 需要的顶层字段（见 group_field_paths），None 表示全部；不含增强分析字段时跳过增强分析
+        """
+        if not HAS_SXTWL and not HAS_SOLAR_TERMS:
             return {"error": "sxtwl库未安装，无法计算八字"}
             
         try:
             true_dt = input_data["true_solar_time"]
             
-            # 使用sxtwl计算八字
-            day = sxtwl.fromSolar(true_dt.year, true_dt.month, true_dt.day)
-            
-            # 获取年、月、日干支数据（这些是正确的）
-            year_gz = day.getYearGZ()
-            month_gz = day.getMonthGZ()
-            day_gz = day.getDayGZ()
-            
             # 天干地支对照表
             gan_names = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
             zhi_names = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
             
-            # 组合年、月、日柱
-            year_pillar = gan_names[year_gz.tg] + zhi_names[year_gz.dz]
-            month_pillar = gan_names[month_gz.tg] + zhi_names[month_gz.dz]
-            day_pillar = gan_names[day_gz.tg] + zhi_names[day_gz.dz]
-            day_master = gan_names[day_gz.tg]
+            # 年、月柱优先查节气表（按出生的世界时刻判断，节气边界精确到分钟）
+            indices = None
+            if HAS_SOLAR_TERMS:
+                ut_dt = datetime.datetime.combine(input_data["date_obj"], input_data["time_obj"]) \
+                    - datetime.timedelta(hours=input_data["tz_offset"])
+                indices = solar_terms.year_month_index(ut_dt)
+            
+            if indices is not None:
+                year_index, month_index = indices
+                year_pillar = gan_names[year_index % 10] + zhi_names[year_index % 12]
+                month_pillar = gan_names[month_index % 10] + zhi_names[month_index % 12]
+                
+                # 日柱：儒略日数 + 49 对60取模（0 = 甲子）
+                day_index = (true_dt.date().toordinal() + 1721425 + 49) % 60
+                day_pillar = gan_names[day_index % 10] + zhi_names[day_index % 12]
+                day_master = gan_names[day_index % 10]
+            elif HAS_SXTWL:
+                # 超出节气表范围，使用sxtwl计算八字
+                import sxtwl
+                day = sxtwl.fromSolar(true_dt.year, true_dt.month, true_dt.day)
+                
+                # 获取年、月、日干支数据（这些是正确的）
+                year_gz = day.getYearGZ()
+                month_gz = day.getMonthGZ()
+                day_gz = day.getDayGZ()
+                
+                # 组合年、月、日柱
+                year_pillar = gan_names[year_gz.tg] + zhi_names[year_gz.dz]
+                month_pillar = gan_names[month_gz.tg] + zhi_names[month_gz.dz]
+                day_pillar = gan_names[day_gz.tg] + zhi_names[day_gz.dz]
+                day_master = gan_names[day_gz.tg]
+            else:
+                return {"error": "出生时间超出节气表范围（1900–2100），且sxtwl库未安装，无法计算八字"}
             
             # 使用传统口诀计算时柱（修正sxtwl的bug）
             hour_pillar = self.calculate_hour_pillar_traditional(day_master, true_dt.hour)
@@ -433,10 +538,11 @@ class TripleChartParser:
             }
             
             # 如果有增强分析器，进行增强分析
-            if HAS_BAZI_ENHANCED:
+            if HAS_BAZI_ENHANCED and (parts is None or parts & BAZI_ENHANCED_FIELDS):
                 try:
-                    analyzer = BaziEnhancedAnalyzer()
-                    enhanced_result = analyzer.enhance_bazi_result(basic_result)
+                    analyzer = BaziEnhancedAnalyzer.shared()
+                    with timed_stage("bazi_enhance"):
+                        enhanced_result = analyzer.enhance_bazi_result(basic_result)
                     return enhanced_result
                 except Exception as e:
                     # 如果增强分析失败，返回基础结果并添加错误信息
@@ -447,8 +553,13 @@ class TripleChartParser:
         except Exception as e:
             return {"error": f"八字计算错误: {e}"}
     
-    def calculate_ziwei(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """计算紫微斗数 - 使用高级API"""
+    def calculate_ziwei(self, input_data: Dict[str, Any], parts: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """
+        计算紫微斗数 - 使用高级API
+        
+        Args:
+            parts: 需要的顶层字段，None 表示全部；未请求的字段（含A/B/C类示例）不计算
+        """
         if not HAS_IZTRO:
             return {"error": "py-iztro库未安装，无法计算紫微斗数"}
             
@@ -463,27 +574,29 @@ class TripleChartParser:
             time_index = (true_dt.hour + 1) // 2 % 12
             
             # 使用高级紫微斗数API
-            api = ZiweiAdvancedAPI(
-                birth_date=true_dt.strftime("%Y-%m-%d"),
-                birth_time_index=time_index,
-                gender=input_data["gender_str"]
-            )
+            from ziwei_advanced_api import ZiweiAdvancedAPI
+            with timed_stage("ziwei_astrolabe"):
+                api = ZiweiAdvancedAPI(
+                    birth_date=true_dt.strftime("%Y-%m-%d"),
+                    birth_time_index=time_index,
+                    gender=input_data["gender_str"]
+                )
             
-            # 获取完整的紫微斗数信息
-            result = {
-                "basic_info": api.get_basic_info(),
-                "chart": api.get_ziwei_chart(),
-                "four_pillars": api.get_four_pillars(),
-                "year_four_trans": api.year_four_trans(),
+            # 紫微斗数各部分信息（按需计算）
+            sections = {
+                "basic_info": api.get_basic_info,
+                "chart": api.get_ziwei_chart,
+                "four_pillars": api.get_four_pillars,
+                "year_four_trans": api.year_four_trans,
                 
                 # A类：基础信息功能
-                "A_functions": {
+                "A_functions": lambda: {
                     "star_position_example": api.star_position("紫微"),
                     "is_empty_house_example": api.is_empty_house("命宫")
                 },
                 
                 # B类：运势核心功能
-                "B_functions": {
+                "B_functions": lambda: {
                     "major_fortune_25": api.major_fortune(25),
                     "flow_year_2024": api.flow_year(2024),
                     "flow_trans_2024": api.flow_trans(2024),
@@ -491,14 +604,14 @@ class TripleChartParser:
                 },
                 
                 # C类：三方四正功能
-                "C_functions": {
+                "C_functions": lambda: {
                     "tri_house_ming": api.tri_house("命宫"),
                     "tri_has_star_example": api.tri_has_star("命宫", ["紫微", "天府"]),
                     "tri_has_trans_example": api.tri_has_trans("命宫", "禄"),
                     "star_tri_house_example": api.star_tri_house("紫微")
                 },
                 
-                "enhanced_features": {
+                "enhanced_features": lambda: {
                     "A类基础信息": "5个功能全部实现",
                     "B类运势核心": "4个功能全部实现", 
                     "C类三方四正": "4个功能全部实现",
@@ -506,6 +619,8 @@ class TripleChartParser:
                 }
             }
             
+            result = {name: compute() for name, compute in sections.items() if parts is None or name in parts}
+            
             return result
             
         except Exception as e:
@@ -520,6 +635,7 @@ class TripleChartParser:
             time_index = (true_dt.hour + 1) // 2 % 12
             
             # 使用py-iztro进行紫微斗数排盘
+            from py_iztro import Astro
             astro_instance = Astro()
             self.astrolabe = astro_instance.by_solar(
                 solar_date_str=true_dt.strftime("%Y-%m-%d"),
@@ -551,12 +667,22 @@ class TripleChartParser:
         except Exception as e:
             return {"error": f"紫微斗数基础计算错误: {e}"}
     
-    def calculate_vedic(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """计算印度星盘（增强版 - 恒星历模式）"""
+    def calculate_vedic(self, input_data: Dict[str, Any], parts: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """
+        计算印度星盘（增强版 - 恒星历模式）
+        
+        Args:
+            parts: 需要的顶层字段，None 表示全部；未请求行星或轴点时不获取对应天体
+        """
         if not HAS_FLATLIB:
             return {"error": "flatlib库未安装，无法计算印度星盘"}
             
         try:
+            from flatlib import const
+            from flatlib.chart import Chart
+            from flatlib.datetime import Datetime
+            from flatlib.geopos import GeoPos
+            
             true_dt = input_data["true_solar_time"]
             
             # 创建flatlib对象
@@ -618,111 +744,125 @@ class TripleChartParser:
                 pass
             
             # 创建星盘
-            chart = Chart(flatlib_dt, geo_pos)
+            with timed_stage("vedic_ephemeris"):
+                chart = Chart(flatlib_dt, geo_pos)
             
-            # Lahiri Ayanamsa值（根据年份调整，这里使用近似值）
-            year = true_dt.year
-            lahiri_ayanamsa = 23.85 + (year - 1998) * 0.0139  # 每年约增加0.0139度
+            # Ayanamsa值（按出生的世界时刻查表插值）
+            ut_dt = datetime.datetime.combine(input_data["date_obj"], input_data["time_obj"]) \
+                - datetime.timedelta(hours=input_data["tz_offset"])
+            ayanamsa_value = ayanamsa_for_datetime(ut_dt, self.ayanamsa_system)
             
             result = {
                 "chart_type": "vedic_sidereal",
                 "ayanamsa": {
-                    "type": "lahiri",
-                    "value": round(lahiri_ayanamsa, 2)
+                    "type": self.ayanamsa_system,
+                    "value": round(ayanamsa_value, 2)
                 },
                 "ascendant": {},
                 "planets": {},
                 "axis_points": {}
             }
             
-            # 星座名称
-            signs = [
-                "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
-                "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
-            ]
-            
             # 获取上升点信息
             asc = chart.get(const.ASC)
             if asc:
-                # 应用恒星历修正
-                tropical_lon = asc.lon
-                sidereal_lon = (tropical_lon - lahiri_ayanamsa) % 360
-                
-                # 计算恒星历星座
-                sidereal_sign_index = int(sidereal_lon // 30)
-                sidereal_sign_degree = sidereal_lon % 30
+                # 收集全部天体的回归黄经（获取失败的行星、轴点跳过，不影响其他天体）
+                names = ["Ascendant"]
+                lons = [asc.lon]
+                groups = ["ascendant"]
+                for group, bodies in (("planets", planet_map), ("axis_points", axis_points)):
+                    if parts is not None and group not in parts:
+                        continue
+                    for body_const, body_name in bodies.items():
+                        try:
+                            obj = chart.get(body_const)
+                            if obj:
+                                names.append(body_name)
+                                lons.append(obj.lon)
+                                groups.append(group)
+                        except Exception:
+                            continue
                 
-                result["ascendant"] = {
-                    "sign": signs[sidereal_sign_index],
-                    "house": 1,  # 上升点总是在第1宫
-                    "lon": round(sidereal_sign_degree, 2)
-                }
-            
-            # 获取行星信息
-            for planet_const, planet_name in planet_map.items():
-                try:
-                    obj = chart.get(planet_const)
-                    if obj:
-                        # 应用恒星历修正
-                        tropical_lon = obj.lon
-                        sidereal_lon = (tropical_lon - lahiri_ayanamsa) % 360
-                        
-                        # 计算恒星历星座
-                        sidereal_sign_index = int(sidereal_lon // 30)
-                        sidereal_sign_degree = sidereal_lon % 30
-                        
-                        # 计算宫位（基于恒星历上升点）
-                        asc_sidereal_lon = (asc.lon - lahiri_ayanamsa) % 360
-                        house_offset = ((sidereal_lon - asc_sidereal_lon) % 360) // 30
-                        house = int(house_offset) + 1
-                        
-                        result["planets"][planet_name] = {
-                            "sign": signs[sidereal_sign_index],
-                            "house": house,
-                            "lon": round(sidereal_sign_degree, 2)
-                        }
-                        
-                except Exception as e:
-                    # 如果某个行星获取失败，跳过但不影响其他行星
-                    continue
-            
-            # 获取轴点信息（下降点、天顶、天底、福点等）
-            for axis_const, axis_name in axis_points.items():
-                try:
-                    obj = chart.get(axis_const)
-                    if obj:
-                        # 应用恒星历修正
-                        tropical_lon = obj.lon
-                        sidereal_lon = (tropical_lon - lahiri_ayanamsa) % 360
-                        
-                        # 计算恒星历星座
-                        sidereal_sign_index = int(sidereal_lon // 30)
-                        sidereal_sign_degree = sidereal_lon % 30
-                        
-                        # 计算宫位（基于恒星历上升点）
-                        asc_sidereal_lon = (asc.lon - lahiri_ayanamsa) % 360
-                        house_offset = ((sidereal_lon - asc_sidereal_lon) % 360) // 30
-                        house = int(house_offset) + 1
-                        
-                        result["axis_points"][axis_name] = {
-                            "sign": signs[sidereal_sign_index],
-                            "house": house,
-                            "lon": round(sidereal_sign_degree, 2)
-                        }
-                        
-                except Exception as e:
-                    # 如果某个轴点获取失败，跳过但不影响其他轴点
-                    continue
+                # 一次完成恒星历修正、星座、度数与宫位（基于恒星历上升点）计算
+                positions = format_positions(names, sidereal_positions(lons, ayanamsa_value, asc.lon))
+                for name, group in zip(names, groups):
+                    if group == "ascendant":
+                        result["ascendant"] = positions[name]  # 上升点总是在第1宫
+                    else:
+                        result[group][name] = positions[name]
             
             return result
             
         except Exception as e:
             return {"error": f"印度星盘计算错误: {e}"}
     
-    def generate_output(self, input_data: Dict[str, Any], bazi_result: Dict[str, Any], 
-                       ziwei_result: Dict[str, Any], vedic_result: Dict[str, Any]) -> Dict[str, Any]:
-        """生成最终输出"""
-        return {
+    def calculate_all(self, birth_date: str, birth_time: str, timezone: str, longitude: float,
+                      latitude: float, gender: int, systems: Optional[Iterable[str]] = None,
+                      fields: Optional[List[str]] = None, timings: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        解析输入并计算三种命理系统，返回 generate_output 结构
+        
+        Args:
+            systems: 只计算其中的系统（bazi / ziwei / vedic），默认全部；未计算的系统不出现在结果中
+            fields: 只输出这些字段（点号分隔的路径，如 "bazi.enhanced_analysis.十神统计"、"vedic.planets"），
+                默认全部；未涉及的系统和字段不计算，系统出错时保留其 error
+            timings: 是否附加 _timings（parse_input / true_solar_time / result_store / bazi / bazi_enhance /
+                ziwei / ziwei_astrolabe / vedic / vedic_ephemeris 各阶段的 wall_ms、cpu_ms），默认取构造参数
+        """
+        timings = self.timings if timings is None else timings
+        if not timings and self.span_callback is None:
+            return self._calculate_all(birth_date, birth_time, timezone, longitude, latitude, gender, systems, fields)
+        
+        timer = StageTimer(self.span_callback)
+        with timer.activate():
+            output = self._calculate_all(birth_date, birth_time, timezone, longitude, latitude, gender, systems, fields)
+        if timings:
+            output["_timings"] = timer.as_dict()
+        return output
+    
+    def _calculate_all(self, birth_date: str, birth_time: str, timezone: str, longitude: float,
+                       latitude: float, gender: int, systems: Optional[Iterable[str]],
+                       fields: Optional[List[str]]) -> Dict[str, Any]:
+        """calculate_all 的计算部分（各阶段记录到当前计时器）"""
+        with timed_stage("parse_input"):
+            input_data = self.parse_input(birth_date, birth_time, timezone, longitude, latitude, gender)
+        systems = CHART_SYSTEMS if systems is None else systems
+        
+        wanted = group_field_paths(fields) if fields else {}
+        if fields:
+            systems = [name for name in systems if name in wanted]
+        
+        # 已配置结果存储时先查存储（存储中不含 input 部分）
+        store = get_result_store()
+        if store is not None:
+            with timed_stage("result_store"):
+                key = chart_key(input_data, systems, self.ayanamsa_system, get_rule_registry().version, fields)
+                cached = store.get(key)
+            if cached is not None:
+                output = self.generate_output(input_data, cached.get("bazi"), cached.get("ziwei"), cached.get("vedic"))
+                return project_fields(output, fields) if fields else output
+        
+        calculators = {"bazi": self.calculate_bazi, "ziwei": self.calculate_ziwei, "vedic": self.calculate_vedic}
+        results = {}
+        for name in CHART_SYSTEMS:
+            if name in systems:
+                with timed_stage(name):
+                    results[name] = calculators[name](input_data, wanted.get(name))
+        
+        output = self.generate_output(input_data, results.get("bazi"), results.get("ziwei"), results.get("vedic"))
+        
+        # 只保存全部系统计算成功的结果
+        if store is not None and not any("error" in result for result in results.values()):
+            with timed_stage("result_store"):
+                store.put(key, results)
+        
+        return project_fields(output, fields) if fields else output
+    
+    def generate_output(self, input_data: Dict[str, Any], bazi_result: Optional[Dict[str, Any]] = None,
+                       ziwei_result: Optional[Dict[str, Any]] = None,
+                       vedic_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """生成最终输出（结果为 None 的系统省略）"""
+        output = {
             "input": {
                 "birth_date": input_data["birth_date"],
                 "birth_time": input_data["birth_time"],
@@ -731,60 +871,220 @@ class TripleChartParser:
                 "latitude": input_data["latitude"],
                 "gender": input_data["gender"],
                 "gender_str": input_data["gender_str"]
-            },
-            "bazi": bazi_result,
-            "ziwei": ziwei_result,
-            "vedic": vedic_result
+            }
         }
+        for name, result in zip(CHART_SYSTEMS, (bazi_result, ziwei_result, vedic_result)):
+            if result is not None:
+                output[name] = result
+        return output
+
+def print_cache_stats(parallel: bool = False):
+    """
+    向标准错误输出结果存储统计（命中数只统计当前进程）
+    
+    Args:
+        parallel: 并行批量模式，查找都发生在工作进程中，不输出主进程的命中数
+    """
+    store = get_result_store()
+    if store is not None:
+        stats = store.stats()
+        if parallel:
+            for name in ("hits", "misses", "hit_rate"):
+                stats.pop(name)
+        print(f"📦 结果存储: {json.dumps(stats, ensure_ascii=False)}", file=sys.stderr)
+        if parallel:
+            print("ℹ️ 并行模式下命中数由各工作进程分别统计，不在此汇总", file=sys.stderr)
 
 def main():
     parser = argparse.ArgumentParser(description="三种命理系统排盘工具")
-    parser.add_argument("--birth-date", required=True, help="出生日期 (格式: YYYY-MM-DD)")
-    parser.add_argument("--birth-time", required=True, help="出生时间 (格式: HH:MM)")
-    parser.add_argument("--timezone", required=True, help="时区 (格式: +8 或 -5)")
-    parser.add_argument("--longitude", type=float, required=True, help="经度")
-    parser.add_argument("--latitude", type=float, required=True, help="纬度")
-    parser.add_argument("--gender", type=int, choices=[0, 1], required=True, help="性别 (1=男, 0=女)")
+    parser.add_argument("--birth-date", help="出生日期 (格式: YYYY-MM-DD)")
+    parser.add_argument("--birth-time", help="出生时间 (格式: HH:MM)")
+    parser.add_argument("--timezone", help="时区 (格式: +8 或 -5)")
+    parser.add_argument("--longitude", type=float, help="经度")
+    parser.add_argument("--latitude", type=float, help="纬度")
+    parser.add_argument("--gender", type=int, choices=[0, 1], help="性别 (1=男, 0=女)")
     parser.add_argument("--save-file", action='store_true', help="保存为JSON文件")
+    parser.add_argument("--compact", action='store_true', help="输出无缩进的紧凑JSON (单盘模式)")
     parser.add_argument("--location", default="未知地点", help="出生地点名称")
+    parser.add_argument("--ayanamsa", choices=list(AYANAMSA_SYSTEMS), default=DEFAULT_AYANAMSA,
+                        help=f"印度星盘 ayanamsa 系统 (默认{DEFAULT_AYANAMSA})")
+    parser.add_argument("--systems", help="只计算这些系统，逗号分隔 (bazi,ziwei,vedic，默认全部)")
+    parser.add_argument("--fields", help="只输出这些字段，逗号分隔的点号路径 (如 bazi.enhanced_analysis.十神统计,vedic.planets)")
+    
+    # 批量模式
+    parser.add_argument("--batch-input", help="批量输入文件 (JSONL/CSV，'-' 表示标准输入)")
+    parser.add_argument("--batch-output", help="批量输出JSONL文件 (默认标准输出；指定 --batch-columnar 时默认不输出JSONL)")
+    parser.add_argument("--batch-columnar", metavar="PATH",
+                        help="批量结果写成列式文件 (.parquet 或 .npy 目录逐块写出，.npy 目录可内存映射读取；"
+                             ".npz 整批留在内存中最后写出，只适合小批次)")
+    parser.add_argument("--batch-format", choices=["jsonl", "csv"], help="批量输入格式 (默认按扩展名判断)")
+    parser.add_argument("--workers", type=int, default=1, help="批量模式并行进程数 (默认1)")
+    parser.add_argument("--chunk-size", type=int, default=32, help="并行模式每个任务的记录数 (默认32)")
+    parser.add_argument("--unordered", action='store_true', help="并行模式按完成顺序输出 (吞吐更高)")
+    
+    # 紫微星盘缓存
+    parser.add_argument("--ziwei-cache-size", type=int, default=4096, help="紫微星盘内存缓存容量 (默认4096)")
+    parser.add_argument("--ziwei-cache-dir", help="紫微星盘磁盘缓存目录 (默认不使用)")
+    
+    # 排盘结果存储
+    parser.add_argument("--cache-dir", help="排盘结果存储目录（SQLite，相同出生信息直接复用结果，默认不使用）")
+    parser.add_argument("--cache-ttl", type=float, help="结果有效期（秒，默认永久）")
+    parser.add_argument("--cache-max-entries", type=int, help="结果条目数上限（默认不限）")
+    parser.add_argument("--cache-stats", action='store_true', help="输出结果存储统计")
+    
+    # 性能诊断
+    parser.add_argument("--timings", action='store_true', help="在结果中附加 _timings（各阶段墙钟/CPU耗时，毫秒）")
+    parser.add_argument("--profile", metavar="FILE", help="用 cProfile 分析整个运行并保存到FILE（并行批量模式只含主进程）")
+    
+    # 绘图
+    parser.add_argument("--render", metavar="FORMAT",
+                        help="排盘后直接在内存中绘图 (png/jpg/pdf/svg)，图片保存在当前目录，不经过JSON文件")
+    parser.add_argument("--render-dpi", type=int, default=300, help="绘图分辨率 (默认300)")
     
     args = parser.parse_args()
     
+    systems = None
+    if args.systems:
+        systems = [name.strip() for name in args.systems.split(",") if name.strip()]
+        unknown = [name for name in systems if name not in CHART_SYSTEMS]
+        if unknown or not systems:
+            parser.error(f"--systems 取值错误: {args.systems}（可选: {','.join(CHART_SYSTEMS)}）")
+    fields = [path.strip() for path in args.fields.split(",") if path.strip()] if args.fields else None
+    
+    worker_config = {
+        "ziwei_cache_size": args.ziwei_cache_size,
+        "ziwei_cache_dir": args.ziwei_cache_dir,
+        "ayanamsa_system": args.ayanamsa,
+        "cache_dir": args.cache_dir,
+        "cache_ttl": args.cache_ttl,
+        "cache_max_entries": args.cache_max_entries,
+        "timings": args.timings
+    }
+    if args.cache_stats and not args.cache_dir:
+        parser.error("--cache-stats 需要同时指定 --cache-dir")
+    if not args.batch_input and not (args.cache_stats and args.birth_date is None):
+        required = ["birth_date", "birth_time", "timezone", "longitude", "latitude", "gender"]
+        missing = ["--" + name.replace("_", "-") for name in required if getattr(args, name) is None]
+        if missing:
+            parser.error(f"缺少参数: {' '.join(missing)}")
+    if args.batch_input and (args.workers < 1 or args.chunk_size < 1):
+        parser.error("--workers 和 --chunk-size 必须为正整数")
+    if args.batch_columnar:
+        if not args.batch_input:
+            parser.error("--batch-columnar 只能用于批量模式")
+        if fields:
+            parser.error("--batch-columnar 需要完整结果，不能与 --fields 同时使用")
+    if args.render:
+        from chart_visualizer import IMAGE_FORMATS
+        if args.render not in IMAGE_FORMATS:
+            parser.error(f"--render 取值错误: {args.render}（可选: {'/'.join(IMAGE_FORMATS)}）")
+        if args.batch_input:
+            parser.error("--render 不支持批量模式，批量绘图请用 batch_renderer.py")
+        if fields:
+            parser.error("--render 需要完整结果，不能与 --fields 同时使用")
+        if args.render_dpi < 1:
+            parser.error("--render-dpi 必须为正整数")
+    
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run_cli, args, systems, fields, worker_config)
+        finally:
+            profiler.dump_stats(args.profile)
+            print(f"📈 性能分析结果已保存到: {args.profile}（查看: python -m pstats {args.profile}）", file=sys.stderr)
+    else:
+        run_cli(args, systems, fields, worker_config)
+
+def run_cli(args: argparse.Namespace, systems: Optional[List[str]], fields: Optional[List[str]],
+            worker_config: Dict[str, Any]):
+    """按命令行参数执行（单盘、批量或存储统计）"""
+    # 并行批量模式下只有工作进程查询结果存储：主进程不在 fork 之前打开数据库连接
+    parallel = bool(args.batch_input) and args.workers > 1
+    configure_worker({**worker_config, "cache_dir": None} if parallel else worker_config)
+    
+    # 只查看结果存储统计
+    if args.cache_stats and not args.batch_input and args.birth_date is None:
+        print_cache_stats()
+        return
+    
+    if args.batch_input:
+        from batch_chart_runner import run_batch
+        batch_output = args.batch_output
+        if batch_output is None and not args.batch_columnar:
+            batch_output = "-"
+        try:
+            stats = run_batch(
+                TripleChartParser(args.ayanamsa, args.timings), args.batch_input, batch_output, args.batch_format,
+                workers=args.workers, chunk_size=args.chunk_size, ordered=not args.unordered,
+                worker_config=worker_config, systems=systems, fields=fields, columnar=args.batch_columnar
+            )
+            print(f"✅ 批量排盘完成: 共 {stats['total']} 条, 成功 {stats['ok']} 条, 失败 {stats['errors']} 条",
+                  file=sys.stderr)
+            if args.batch_columnar:
+                print(f"📊 列式结果已保存到: {args.batch_columnar}", file=sys.stderr)
+        except Exception as e:
+            print(f"批量排盘错误: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.cache_stats:
+            if parallel:
+                configure_result_store(args.cache_dir, args.cache_ttl, args.cache_max_entries)
+            print_cache_stats(parallel)
+        return
+    
     try:
         # 创建解析器实例
-        parser_instance = TripleChartParser()
+        parser_instance = TripleChartParser(args.ayanamsa, args.timings)
         
-        # 解析输入参数
-        input_data = parser_instance.parse_input(
+        # 解析输入并计算三种命理系统
+        final_output = parser_instance.calculate_all(
             args.birth_date, args.birth_time, args.timezone,
-            args.longitude, args.latitude, args.gender
+            args.longitude, args.latitude, args.gender, systems=systems, fields=fields
         )
         
-        # 计算三种命理系统
-        bazi_result = parser_instance.calculate_bazi(input_data)
-        ziwei_result = parser_instance.calculate_ziwei(input_data)
-        vedic_result = parser_instance.calculate_vedic(input_data)
+        # 文件名前缀：性别+测算时间+地点+经纬度
+        date_str = args.birth_date.replace('-', '')
+        time_str = args.birth_time.replace(':', '')
+        base_name = f"{args.gender}_{date_str}_{time_str}_{args.location}_{args.longitude}_{args.latitude}"
         
-        # 生成最终输出
-        final_output = parser_instance.generate_output(
-            input_data, bazi_result, ziwei_result, vedic_result
-        )
+        # 直接把结果交给绘图（内存中生成图片字节，不写JSON再读回）
+        timer = StageTimer()
+        images = {}
+        if args.render:
+            from chart_visualizer import CHART_FILE_SUFFIXES, render_charts, use_backend
+            use_backend("Agg")
+            with timer.stage("render"):
+                images = render_charts(final_output, args.render, args.render_dpi)
+        
+        # 只序列化一次：--timings 时先编码不含 _timings 的结果，记录序列化耗时后把 _timings 追加在末尾，不重新编码结果
+        timings = final_output.pop("_timings", None) if args.timings else None
+        with timer.stage("serialize"):
+            output_bytes = serialization.dumps(final_output, args.compact)
+        if timings is not None:
+            timings.update(timer.as_dict())
+            output_bytes = serialization.append_key(output_bytes, "_timings", timings, args.compact)
         
         # 如果需要保存文件
         if args.save_file:
-            # 生成文件名：性别+测算时间+地点+经纬度.json
-            date_str = args.birth_date.replace('-', '')
-            time_str = args.birth_time.replace(':', '')
-            filename = f"{args.gender}_{date_str}_{time_str}_{args.location}_{args.longitude}_{args.latitude}.json"
+            filename = f"{base_name}.json"
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(final_output, f, ensure_ascii=False, indent=2)
+            with open(filename, 'wb') as f:
+                f.write(output_bytes)
             
             print(f"✅ 排盘结果已保存到: {filename}")
-            print(f"📊 文件大小: {len(json.dumps(final_output, ensure_ascii=False, indent=2))} 字节")
+            print(f"📊 文件大小: {len(output_bytes)} 字节")
         else:
             # 输出JSON结果
-            print(json.dumps(final_output, ensure_ascii=False, indent=2))
+            print(output_bytes.decode('utf-8'))
+        
+        for chart_type, image in images.items():
+            image_file = f"{base_name}_{CHART_FILE_SUFFIXES[chart_type]}.{args.render}"
+            with open(image_file, 'wb') as f:
+                f.write(image)
+            print(f"🖼️ 图表已保存到: {image_file}", file=sys.stderr)
+        
+        if args.cache_stats:
+            print_cache_stats()
         
     except Exception as e:
         print(f"程序执行错误: {e}", file=sys.stderr)
@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
 """
 增强版印度星盘API
-基于flatlib库，支持恒星历（sidereal）模式，使用Lahiri ayanamsa
+基于flatlib库，支持恒星历（sidereal）模式，ayanamsa 支持 Lahiri / Raman / KP
 """
 
 import json
 import argparse
+import datetime
 from typing import Dict, Any
 from flatlib import const
 from flatlib.datetime import Datetime
 from flatlib.geopos import GeoPos
 from flatlib.chart import Chart
 
-def get_vedic_chart(date: str, time: str, tz: str, lat: float, lon: float) -> Dict[str, Any]:
+from sidereal import sidereal_positions, format_positions
+from ayanamsa import AYANAMSA_SYSTEMS, DEFAULT_SYSTEM, ayanamsa_for_datetime
+
+def get_vedic_chart(date: str, time: str, tz: str, lat: float, lon: float,
+                    ayanamsa_system: str = DEFAULT_SYSTEM) -> Dict[str, Any]:
     """
     计算印度星盘（恒星历模式）
     
@@ -22,13 +27,14 @@ def get_vedic_chart(date: str, time: str, tz: str, lat: float, lon: float) -> Di
         tz: 时区 (+HH:MM 或 +H 格式，如 +08:00 或 +8)
         lat: 纬度
         lon: 经度
+        ayanamsa_system: ayanamsa 系统 (lahiri / raman / kp)
         
     Returns:
         包含恒星历星盘信息的字典，包括：
         - 上升点的 sign、house、lon
         - 10颗主行星的 sign、house、lon（如果可用）
         - 所有度数保留两位小数
-        - 使用Lahiri ayanamsa恒星历系统
+        - 使用 ayanamsa 表插值（默认Lahiri）的恒星历系统
     """
     
     try:
@@ -93,16 +99,18 @@ def get_vedic_chart(date: str, time: str, tz: str, lat: float, lon: float) -> Di
         # 创建星盘
         chart = Chart(flatlib_dt, geo_pos)
         
-        # 计算Lahiri Ayanamsa值（根据年份动态调整）
-        year = int(date[:4])
-        # 1900年Lahiri ayanamsa约为22.46度，每年增加约0.0139度
-        lahiri_ayanamsa = 22.46 + (year - 1900) * 0.0139
+        # 计算Ayanamsa值（按出生的世界时刻查表插值）
+        tz_sign = -1 if tz.startswith('-') else 1
+        tz_hours, tz_minutes = (tz.lstrip('+-').split(':') + ['0'])[:2]
+        ut_dt = datetime.datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M") \
+            - tz_sign * datetime.timedelta(hours=int(tz_hours), minutes=int(tz_minutes))
+        ayanamsa_value = ayanamsa_for_datetime(ut_dt, ayanamsa_system)
         
         result = {
             "chart_type": "vedic_sidereal",
             "ayanamsa": {
-                "type": "lahiri",
-                "value": round(lahiri_ayanamsa, 2)
+                "type": ayanamsa_system,
+                "value": round(ayanamsa_value, 2)
             },
             "input": {
                 "date": date,
@@ -116,92 +124,41 @@ def get_vedic_chart(date: str, time: str, tz: str, lat: float, lon: float) -> Di
             "axis_points": {}
         }
         
-        # 星座名称
-        signs = [
-            "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
-            "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
-        ]
+        # 收集全部天体的回归黄经
+        names = []
+        lons = []
+        groups = []
         
         # 获取上升点信息
         asc = chart.get(const.ASC)
         if asc:
-            # 应用恒星历修正
-            tropical_lon = asc.lon
-            sidereal_lon = (tropical_lon - lahiri_ayanamsa) % 360
-            
-            # 计算恒星历星座
-            sidereal_sign_index = int(sidereal_lon // 30)
-            sidereal_sign_degree = sidereal_lon % 30
-            
-            result["ascendant"] = {
-                "sign": signs[sidereal_sign_index],
-                "house": 1,  # 上升点总是在第1宫
-                "lon": round(sidereal_sign_degree, 2)
-            }
-        
-        # 获取行星信息
-        for planet_const, planet_name in planet_map.items():
-            try:
-                obj = chart.get(planet_const)
-                if obj:
-                    # 应用恒星历修正
-                    tropical_lon = obj.lon
-                    sidereal_lon = (tropical_lon - lahiri_ayanamsa) % 360
-                    
-                    # 计算恒星历星座
-                    sidereal_sign_index = int(sidereal_lon // 30)
-                    sidereal_sign_degree = sidereal_lon % 30
-                    
-                    # 计算宫位（基于恒星历上升点）
-                    if asc:
-                        asc_sidereal_lon = (asc.lon - lahiri_ayanamsa) % 360
-                        house_offset = ((sidereal_lon - asc_sidereal_lon) % 360) // 30
-                        house = int(house_offset) + 1
-                    else:
-                        house = 1
-                    
-                    result["planets"][planet_name] = {
-                        "sign": signs[sidereal_sign_index],
-                        "house": house,
-                        "lon": round(sidereal_sign_degree, 2)
-                    }
-                    
-            except Exception as e:
-                # 如果某个行星获取失败，跳过但不影响其他行星
-                print(f"警告：无法获取 {planet_name} 的信息: {e}")
-                continue
-        
-        # 获取轴点信息（下降点、天顶、天底、福点等）
-        for axis_const, axis_name in axis_points.items():
-            try:
-                obj = chart.get(axis_const)
-                if obj:
-                    # 应用恒星历修正
-                    tropical_lon = obj.lon
-                    sidereal_lon = (tropical_lon - lahiri_ayanamsa) % 360
-                    
-                    # 计算恒星历星座
-                    sidereal_sign_index = int(sidereal_lon // 30)
-                    sidereal_sign_degree = sidereal_lon % 30
-                    
-                    # 计算宫位（基于恒星历上升点）
-                    if asc:
-                        asc_sidereal_lon = (asc.lon - lahiri_ayanamsa) % 360
-                        house_offset = ((sidereal_lon - asc_sidereal_lon) % 360) // 30
-                        house = int(house_offset) + 1
-                    else:
-                        house = 1
-                    
-                    result["axis_points"][axis_name] = {
-                        "sign": signs[sidereal_sign_index],
-                        "house": house,
-                        "lon": round(sidereal_sign_degree, 2)
-                    }
-                    
-            except Exception as e:
-                # 如果某个轴点获取失败，跳过但不影响其他轴点
-                print(f"警告：无法获取 {axis_name} 的信息: {e}")
-                continue
+            names.append("Ascendant")
+            lons.append(asc.lon)
+            groups.append("ascendant")
+        
+        # 获取行星与轴点信息（下降点、天顶、天底、福点等）
+        for group, bodies in (("planets", planet_map), ("axis_points", axis_points)):
+            for body_const, body_name in bodies.items():
+                try:
+                    obj = chart.get(body_const)
+                    if obj:
+                        names.append(body_name)
+                        lons.append(obj.lon)
+                        groups.append(group)
+                except Exception as e:
+                    # 如果某个天体获取失败，跳过但不影响其他天体
+                    print(f"警告：无法获取 {body_name} 的信息: {e}")
+                    continue
+        
+        # 一次完成恒星历修正、星座、度数与宫位（基于恒星历上升点）计算
+        positions = format_positions(
+            names, sidereal_positions(lons, ayanamsa_value, asc.lon if asc else None)
+        )
+        for name, group in zip(names, groups):
+            if group == "ascendant":
+                result["ascendant"] = positions[name]  # 上升点总是在第1宫
+            else:
+                result[group][name] = positions[name]
         
         return result
         
@@ -220,6 +177,8 @@ def main():
     parser.add_argument("--timezone", required=True, help="时区 (+8 或 +08:00)")
     parser.add_argument("--latitude", type=float, required=True, help="纬度")
     parser.add_argument("--longitude", type=float, required=True, help="经度")
+    parser.add_argument("--ayanamsa", choices=list(AYANAMSA_SYSTEMS), default=DEFAULT_SYSTEM,
+                        help="ayanamsa 系统 (默认lahiri)")
     
     args = parser.parse_args()
     
@@ -228,7 +187,8 @@ def main():
         time=args.time,
         tz=args.timezone,
         lat=args.latitude,
-        lon=args.longitude
+        lon=args.longitude,
+        ayanamsa_system=args.ayanamsa
     )
     
     print(json.dumps(result, indent=2, ensure_ascii=False))
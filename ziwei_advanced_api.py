@@ -8,17 +8,279 @@ python ziwei_advanced_api.py --birth-date 1998-05-29 --birth-time 09:00 --age 25
 """
 
 import argparse
+import importlib.util
 import json
-from typing import Dict, Any, List, Union
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Union, Optional, Tuple
 import sys
 
-try:
-    from py_iztro import Astro
-    HAS_IZTRO = True
-except ImportError:
-    HAS_IZTRO = False
-    print("请安装py-iztro库: pip install py-iztro", file=sys.stderr)
-    sys.exit(1)
+# py-iztro 只探测是否安装，首次排盘时才导入
+HAS_IZTRO = importlib.util.find_spec("py_iztro") is not None
+
+# 三方四正关系表
+TRI_RELATIONS = {
+    "命宫": ["命宫", "财帛", "官禄", "迁移"],
+    "父母": ["父母", "疾厄", "田宅", "仆役"],
+    "福德": ["福德", "迁移", "财帛", "命宫"],
+    "田宅": ["田宅", "子女", "父母", "疾厄"],
+    "官禄": ["官禄", "夫妻", "命宫", "财帛"],
+    "仆役": ["仆役", "兄弟", "父母", "疾厄"],
+    "迁移": ["迁移", "命宫", "福德", "财帛"],
+    "疾厄": ["疾厄", "田宅", "父母", "仆役"],
+    "财帛": ["财帛", "福德", "官禄", "命宫"],
+    "子女": ["子女", "田宅", "夫妻", "兄弟"],
+    "夫妻": ["夫妻", "官禄", "子女", "兄弟"],
+    "兄弟": ["兄弟", "仆役", "子女", "夫妻"]
+}
+
+# 四化位标记
+TRANS_BITS = {"禄": 1, "权": 2, "科": 4, "忌": 8}
+
+# 流年干支循环（甲子年为起点：下标 = (年份 - 4) % 10 / % 12）
+HEAVENLY_STEMS = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
+EARTHLY_BRANCHES = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+
+# 大限起运年龄与每步年数
+MAJOR_FORTUNE_START_AGE = 5
+MAJOR_FORTUNE_SPAN = 10
+
+class AstrolabeIndex:
+    """
+    星盘索引：每个星盘只构建一次，供高频查询使用
+    
+    - star_palace：星耀 → 所在宫位名（主星、辅星、杂曜，按宫位顺序取第一次出现）
+    - palace_index / branch_index：宫位名 / 地支 → 宫位下标
+    - palace_star_mask：每宫主星+辅星的位集；tri_star_mask 为三方四正各宫位集的按位或
+    - palace_trans_mask：每宫主星四化的位集；tri_trans_mask 同上
+    - decade_palaces：第 d 步大限的宫位名（从命宫起，12步一循环）
+    - flow_year_cycle：流年地支循环表，下标 (年份 - 4) % 12，无对应宫位时为 None
+    """
+    
+    def __init__(self, astrolabe):
+        self.astrolabe = astrolabe
+        palaces = astrolabe.palaces
+        
+        self.palace_index: Dict[str, int] = {}
+        self.branch_index: Dict[str, int] = {}
+        self.star_palace: Dict[str, str] = {}
+        self.star_bits: Dict[str, int] = {}
+        
+        self.palace_star_mask: List[int] = []
+        self.palace_trans_mask: List[int] = []
+        self.palace_empty: List[bool] = []
+        self.palace_major_names: List[Tuple[str, ...]] = []
+        self.palace_minor_names: List[Tuple[str, ...]] = []
+        
+        for i, palace in enumerate(palaces):
+            self.palace_index.setdefault(palace.name, i)
+            self.branch_index.setdefault(palace.earthly_branch, i)
+            
+            for star in palace.major_stars + palace.minor_stars + palace.adjective_stars:
+                self.star_palace.setdefault(star.name, palace.name)
+            
+            star_mask = 0
+            for star in palace.major_stars + palace.minor_stars:
+                bit = self.star_bits.setdefault(star.name, 1 << len(self.star_bits))
+                star_mask |= bit
+            self.palace_star_mask.append(star_mask)
+            
+            trans_mask = 0
+            for star in palace.major_stars:
+                trans_mask |= TRANS_BITS.get(getattr(star, 'mutagen', None) or "", 0)
+            self.palace_trans_mask.append(trans_mask)
+            
+            self.palace_empty.append(not (palace.major_stars or palace.minor_stars))
+            self.palace_major_names.append(tuple(star.name for star in palace.major_stars))
+            self.palace_minor_names.append(tuple(star.name for star in palace.minor_stars))
+        
+        # 三方四正：按宫位名匹配（与逐宫扫描的口径一致）
+        self.tri_star_mask: Dict[str, int] = {}
+        self.tri_trans_mask: Dict[str, int] = {}
+        for house, tri_houses in TRI_RELATIONS.items():
+            star_mask = trans_mask = 0
+            for i, palace in enumerate(palaces):
+                if palace.name in tri_houses:
+                    star_mask |= self.palace_star_mask[i]
+                    trans_mask |= self.palace_trans_mask[i]
+            self.tri_star_mask[house] = star_mask
+            self.tri_trans_mask[house] = trans_mask
+        
+        # 大限循环表
+        ming_gong_index = self.palace_index.get("命宫", 0)
+        self.decade_palaces: Tuple[str, ...] = tuple(
+            palaces[(ming_gong_index + decade) % 12].name for decade in range(12)
+        )
+        
+        # 流年循环表（共享只读，对外返回时复制）
+        self.flow_year_cycle: List[Optional[Dict[str, Any]]] = []
+        for branch in EARTHLY_BRANCHES:
+            i = self.branch_index.get(branch)
+            if i is None:
+                self.flow_year_cycle.append(None)
+                continue
+            self.flow_year_cycle.append({
+                "palace": palaces[i].name,
+                "earthly_branch": palaces[i].earthly_branch,
+                "major_stars": list(self.palace_major_names[i]),
+                "minor_stars": list(self.palace_minor_names[i])
+            })
+    
+    def stars_mask(self, stars: List[str]) -> int:
+        """星耀列表对应的位集（本盘不存在的星耀不计入）"""
+        mask = 0
+        for star in stars:
+            mask |= self.star_bits.get(star, 0)
+        return mask
+
+class AstrolabeCache:
+    """
+    紫微星盘缓存
+    
+    星盘只取决于公历日期、时辰索引和性别（每天最多24种），
+    因此按 (出生日期, 时辰索引, 性别) 缓存 py-iztro 星盘：
+    内存为有容量上限的LRU，可选磁盘层（每个星盘一个pickle文件）跨进程复用。
+    缓存的星盘对象只读共享，调用方不得修改。
+    """
+    
+    def __init__(self, maxsize: int = 4096, disk_dir: Optional[str] = None):
+        """
+        Args:
+            maxsize: 内存中最多缓存的星盘数，0 表示不使用内存缓存
+            disk_dir: 磁盘缓存目录，None 表示不使用磁盘层
+        """
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        
+        self._entries: "OrderedDict[Tuple[str, int, str], AstrolabeIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    def get(self, birth_date: str, time_index: int, gender: str):
+        """获取星盘，未命中时计算并写入缓存"""
+        return self.get_indexed(birth_date, time_index, gender).astrolabe
+    
+    def get_indexed(self, birth_date: str, time_index: int, gender: str) -> AstrolabeIndex:
+        """获取带索引的星盘，未命中时计算并写入缓存（索引随星盘一起缓存）"""
+        key = (birth_date, time_index, gender)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        
+        # 计算放在锁外，避免阻塞其他线程的命中查询
+        astrolabe = self._load_disk(key)
+        if astrolabe is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            if not HAS_IZTRO:
+                raise ImportError("请安装py-iztro库: pip install py-iztro")
+            from py_iztro import Astro
+            astrolabe = Astro().by_solar(
+                solar_date_str=birth_date,
+                time_index=time_index,
+                gender=gender,
+                fix_leap=True,
+                language="zh-CN"
+            )
+            with self._lock:
+                self.misses += 1
+            self._save_disk(key, astrolabe)
+        
+        entry = AstrolabeIndex(astrolabe)
+        
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        
+        return entry
+    
+    def _disk_path(self, key: Tuple[str, int, str]) -> str:
+        """磁盘缓存文件路径"""
+        birth_date, time_index, gender = key
+        gender_code = "m" if gender == "男" else "f"
+        return os.path.join(self.disk_dir, f"{birth_date}_{time_index}_{gender_code}.pkl")
+    
+    def _load_disk(self, key: Tuple[str, int, str]):
+        """从磁盘层读取星盘，不存在或损坏时返回 None"""
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"警告：紫微星盘磁盘缓存读取失败 {e}", file=sys.stderr)
+            return None
+    
+    def _save_disk(self, key: Tuple[str, int, str], astrolabe):
+        """写入磁盘层（先写临时文件再替换，多进程并发写入安全）"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(astrolabe, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"警告：紫微星盘磁盘缓存写入失败 {e}", file=sys.stderr)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
+    def stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "disk_dir": self.disk_dir
+            }
+    
+    def clear(self):
+        """清空内存缓存和统计（不删除磁盘文件）"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+# 进程级星盘缓存
+_astrolabe_cache = AstrolabeCache()
+
+def configure_astrolabe_cache(maxsize: int = 4096, disk_dir: Optional[str] = None) -> AstrolabeCache:
+    """重新配置进程级星盘缓存（会丢弃已有的内存缓存）"""
+    global _astrolabe_cache
+    _astrolabe_cache = AstrolabeCache(maxsize, disk_dir)
+    return _astrolabe_cache
+
+def get_astrolabe_cache() -> AstrolabeCache:
+    """获取进程级星盘缓存"""
+    return _astrolabe_cache
+
+def astrolabe_cache_stats() -> Dict[str, Any]:
+    """进程级星盘缓存的命中统计"""
+    return _astrolabe_cache.stats()
 
 class ZiweiAdvancedAPI:
     """紫微斗数高级API"""
@@ -36,15 +298,9 @@ class ZiweiAdvancedAPI:
         self.birth_time_index = birth_time_index
         self.gender = gender
         
-        # 初始化星盘
-        astro = Astro()
-        self.astrolabe = astro.by_solar(
-            solar_date_str=birth_date,
-            time_index=birth_time_index,
-            gender=gender,
-            fix_leap=True,
-            language="zh-CN"
-        )
+        # 初始化星盘（同一日期、时辰、性别的星盘及其索引从缓存复用）
+        self.index = get_astrolabe_cache().get_indexed(birth_date, birth_time_index, gender)
+        self.astrolabe = self.index.astrolabe
         
         self.palaces = self.astrolabe.palaces
         
@@ -61,20 +317,10 @@ class ZiweiAdvancedAPI:
         ]
         
         # 三方四正关系表
-        self.tri_relations = {
-            "命宫": ["命宫", "财帛", "官禄", "迁移"],
-            "父母": ["父母", "疾厄", "田宅", "仆役"],
-            "福德": ["福德", "迁移", "财帛", "命宫"],
-            "田宅": ["田宅", "子女", "父母", "疾厄"],
-            "官禄": ["官禄", "夫妻", "命宫", "财帛"],
-            "仆役": ["仆役", "兄弟", "父母", "疾厄"],
-            "迁移": ["迁移", "命宫", "福德", "财帛"],
-            "疾厄": ["疾厄", "田宅", "父母", "仆役"],
-            "财帛": ["财帛", "福德", "官禄", "命宫"],
-            "子女": ["子女", "田宅", "夫妻", "兄弟"],
-            "夫妻": ["夫妻", "官禄", "子女", "兄弟"],
-            "兄弟": ["兄弟", "仆役", "子女", "夫妻"]
-        }
+        self.tri_relations = TRI_RELATIONS
+        
+        # 年干四化是否可用（tri_has_trans 首次调用时确定）
+        self._year_trans_error = None
         
         # 年干四化表
         self.four_trans_table = {
@@ -176,63 +422,41 @@ class ZiweiAdvancedAPI:
     
     def star_position(self, star_name: str) -> Union[str, None]:
         """A4. 给定星耀返回所在宫位"""
-        for palace in self.palaces:
-            for star in palace.major_stars + palace.minor_stars + palace.adjective_stars:
-                if star.name == star_name:
-                    return palace.name
-        return None
+        return self.index.star_palace.get(star_name)
     
     def is_empty_house(self, house_name: str) -> bool:
         """A5. 判断宫位是否为空宫"""
-        for palace in self.palaces:
-            if palace.name == house_name:
-                has_major = len(palace.major_stars) > 0
-                has_minor = len(palace.minor_stars) > 0
-                return not (has_major or has_minor)
-        return True
+        i = self.index.palace_index.get(house_name)
+        if i is None:
+            return True
+        return self.index.palace_empty[i]
     
     # ==================== B类：运势核心 ====================
     
     def major_fortune(self, age: int) -> str:
         """B1. 给定年龄返回大限宫位"""
-        # 大限从命宫开始，每10年一个宫位
-        start_age = 5  # 一般从5岁开始起大限
-        decade = (age - start_age) // 10
-        
-        # 找到命宫位置
-        ming_gong_index = 0
-        for i, palace in enumerate(self.palaces):
-            if palace.name == "命宫":
-                ming_gong_index = i
-                break
-                
-        # 计算大限宫位
-        fortune_index = (ming_gong_index + decade) % 12
-        return self.palaces[fortune_index].name
+        # 大限从命宫开始，每10年一个宫位，一般从5岁开始起大限
+        decade = (age - MAJOR_FORTUNE_START_AGE) // MAJOR_FORTUNE_SPAN
+        return self.index.decade_palaces[decade % 12]
     
     def flow_year(self, year: int) -> Dict[str, Any]:
         """B3. 流年宫位 + 当年主星"""
-        # 流年从命宫开始，按地支轮转
-        earthly_branches = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
-        year_branch_index = (year - 4) % 12  # 甲子年为起点
-        
-        # 找到对应地支的宫位
-        for palace in self.palaces:
-            if palace.earthly_branch == earthly_branches[year_branch_index]:
-                return {
-                    "palace": palace.name,
-                    "earthly_branch": palace.earthly_branch,
-                    "major_stars": [star.name for star in palace.major_stars],
-                    "minor_stars": [star.name for star in palace.minor_stars]
-                }
+        # 流年按地支轮转，甲子年为起点
+        entry = self.index.flow_year_cycle[(year - 4) % 12]
+        if entry is None:
+            return {"error": "无法确定流年宫位"}
         
-        return {"error": "无法确定流年宫位"}
+        return {
+            "palace": entry["palace"],
+            "earthly_branch": entry["earthly_branch"],
+            "major_stars": list(entry["major_stars"]),
+            "minor_stars": list(entry["minor_stars"])
+        }
     
     def flow_trans(self, year: int) -> Dict[str, str]:
         """B4. 流年四化"""
         # 根据流年天干确定四化
-        heavenly_stems = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
-        year_stem = heavenly_stems[(year - 4) % 10]  # 甲子年为起点
+        year_stem = HEAVENLY_STEMS[(year - 4) % 10]  # 甲子年为起点
         
         return self.four_trans_table.get(year_stem, {"error": f"未知年干: {year_stem}"})
     
@@ -241,6 +465,44 @@ class ZiweiAdvancedAPI:
         flow_result = self.flow_year(year)
         return flow_result.get("palace", "未知")
     
+    def timeline(self, start_year: int, end_year: int) -> Iterator[Dict[str, Any]]:
+        """
+        B6. 逐年运势时间线（惰性生成器）
+        
+        按大限、流年地支、流年天干三个循环表逐年查表，不逐年调用 B1–B4，
+        可以流式输出多人的百年时间线而无需一次性构建全部结果。
+        
+        Args:
+            start_year: 起始年份
+            end_year: 结束年份（含）
+            
+        Yields:
+            {
+                "year": 年份,
+                "age": 虚岁（年份 - 出生年 + 1）,
+                "major_fortune": 大限宫位,
+                "flow_year": 流年宫位 + 当年主星,
+                "flow_trans": 流年四化
+            }
+            flow_year / flow_trans 为各年共享的只读字典，调用方不得修改
+        """
+        birth_year = int(self.birth_date[:4])
+        decade_palaces = self.index.decade_palaces
+        flow_year_cycle = [entry or {"error": "无法确定流年宫位"} for entry in self.index.flow_year_cycle]
+        flow_trans_cycle = [
+            self.four_trans_table.get(stem, {"error": f"未知年干: {stem}"}) for stem in HEAVENLY_STEMS
+        ]
+        
+        for year in range(start_year, end_year + 1):
+            age = year - birth_year + 1
+            yield {
+                "year": year,
+                "age": age,
+                "major_fortune": decade_palaces[(age - MAJOR_FORTUNE_START_AGE) // MAJOR_FORTUNE_SPAN % 12],
+                "flow_year": flow_year_cycle[(year - 4) % 12],
+                "flow_trans": flow_trans_cycle[(year - 4) % 10]
+            }
+    
     # ==================== C类：三方四正逻辑 ====================
     
     def tri_house(self, house: str) -> List[str]:
@@ -249,32 +511,17 @@ class ZiweiAdvancedAPI:
     
     def tri_has_star(self, house: str, stars: Union[str, List[str]]) -> bool:
         """C2. 判断三方四正是否含指定星"""
-        tri_houses = self.tri_house(house)
         stars_list = stars if isinstance(stars, list) else [stars]
-        
-        for palace in self.palaces:
-            if palace.name in tri_houses:
-                palace_stars = [star.name for star in palace.major_stars + palace.minor_stars]
-                for star in stars_list:
-                    if star in palace_stars:
-                        return True
-        return False
+        return bool(self.index.tri_star_mask.get(house, 0) & self.index.stars_mask(stars_list))
     
     def tri_has_trans(self, house: str, trans: str) -> bool:
         """C3. 判断三方四正是否含四化"""
-        tri_houses = self.tri_house(house)
-        year_trans = self.year_four_trans()
-        
-        if "error" in year_trans:
+        if self._year_trans_error is None:
+            self._year_trans_error = "error" in self.year_four_trans()
+        if self._year_trans_error:
             return False
-            
-        for palace in self.palaces:
-            if palace.name in tri_houses:
-                for star in palace.major_stars:
-                    if hasattr(star, 'mutagen') and star.mutagen:
-                        if trans in ["禄", "权", "科", "忌"] and star.mutagen == trans:
-                            return True
-        return False
+        
+        return bool(self.index.tri_trans_mask.get(house, 0) & TRANS_BITS.get(trans, 0))
     
     def star_tri_house(self, star: str) -> List[str]:
         """C4. 返回星耀三方四正宫位列表"""
@@ -333,6 +580,8 @@ def main():
     parser.add_argument("--gender", default="男", help="性别 (男/女)")
     parser.add_argument("--age", type=int, help="当前年龄")
     parser.add_argument("--target-year", type=int, help="目标分析年份")
+    parser.add_argument("--timeline", type=int, nargs=2, metavar=("START", "END"),
+                        help="逐年运势时间线（起止年份，含结束年份），按JSONL逐行输出")
     
     # API功能选择
     parser.add_argument("--get-chart", action="store_true", help="获取星盘图")
@@ -345,10 +594,19 @@ def main():
     
     args = parser.parse_args()
     
+    if not HAS_IZTRO:
+        print("请安装py-iztro库: pip install py-iztro", file=sys.stderr)
+        sys.exit(1)
+    
     try:
         # 创建API实例
         api = ZiweiAdvancedAPI(args.birth_date, args.birth_time, args.gender)
         
+        if args.timeline:
+            for entry in api.timeline(*args.timeline):
+                print(json.dumps(entry, ensure_ascii=False))
+            return
+        
         result = {}
         
         if args.get_chart: